@@ -4,3 +4,7 @@ import os
 
 # Ajouter le dossier src au path
 sys.path.append(os.path.abspath("../src"))
+
+# Afficher les messages des modules de src (journal "ventes")
+from instrumentation import configurer_journal
+configurer_journal()
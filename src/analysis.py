@@ -4,7 +4,11 @@ import sys
 from sklearn.ensemble import IsolationForest   
 from sklearn.cluster import DBSCAN
 from sklearn.preprocessing import MinMaxScaler, RobustScaler, StandardScaler
+
+from instrumentation import instrumenter_classe
+from scaling import Echelle
              
+@instrumenter_classe
 class Analisis: 
     def __init__(self, ventes):
         self.ventes = ventes
@@ -18,7 +22,11 @@ class Analisis:
     # L'IQR est calculé comme la différence entre le troisième quartile (Q3) et le premier quartile (Q1)
     # Les valeurs en dehors de l'intervalle [Q1 - 1.5 * IQR, Q3 + 1.5 * IQR] sont considérées comme des outliers
     # Cette méthode est efficace pour les données qui ne suivent pas une distribution normale   
-    def iqr(self, col):
+    # bornes : estimateur déjà ajusté (voir bornes.py) pour éviter de recalculer les quantiles
+    def iqr(self, col, bornes=None):
+        if bornes is not None:
+            return self.ventes[bornes.detecter(self.ventes[col])]
+
         q1 = self.ventes[col].quantile(0.25)
         q3 = self.ventes[col].quantile(0.75)
         iqr = q3 - q1
@@ -33,7 +41,8 @@ class Analisis:
     # l'intervalle interquartile (IQR) multiplié par un facteur (généralement 1.5)
     # Cela permet de réduire l'influence des valeurs extrêmes sur les statistiques descriptives
     
-    def winsorize_column(self, column, method='iqr', factor=1.5, lower_percentile=0.05, upper_percentile=0.95):
+    def winsorize_column(self, column, method='iqr', factor=1.5, lower_percentile=0.05, upper_percentile=0.95,
+                         bornes=None):
         """
         Winsorize a column of the dataframe.
         
@@ -41,8 +50,12 @@ class Analisis:
                 'percentile' -> percentile-based method
         factor: multiplier for IQR (used only if method='iqr')
         lower_percentile / upper_percentile: used if method='percentile'
+        bornes: fitted estimator from bornes.py (BornesIQR, BornesPercentile...);
+                when given, its bounds are used and no quantile is recomputed
         """
-        if method == 'iqr':
+        if bornes is not None:
+            lower_bound, upper_bound = bornes.bornes
+        elif method == 'iqr':
             Q1 = self.ventes[column].quantile(0.25)
             Q3 = self.ventes[column].quantile(0.75)
             IQR = Q3 - Q1
@@ -73,6 +86,16 @@ class Analisis:
         
         
     
+    # Mise à l'échelle réutilisable (voir scaling.py)
+    # methode : 'minmax', 'standard' ou 'robust'
+    # echelle : objet Echelle déjà ajusté (ou rechargé) ; sinon il est ajusté sur self.ventes
+    # Renvoie (bloc float32 des colonnes mises à l'échelle, echelle) sans copier self.ventes ;
+    # avec inplace=True les colonnes de self.ventes sont remplacées
+    def mise_a_echelle(self, colonnes_numeriques, methode='standard', echelle=None, inplace=False):
+        if echelle is None:
+            echelle = Echelle(methode).fit(self.ventes, colonnes_numeriques)
+        return echelle.transform(self.ventes, inplace=inplace), echelle
+
     def min_maxscaling(self, colonnes_numeriques): 
         min_max_scaler = MinMaxScaler()
         ventes_scaled = self.ventes.copy()
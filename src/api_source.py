@@ -0,0 +1,146 @@
+import hashlib
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import pandas as pd
+import requests
+
+from instrumentation import obtenir_journal
+
+journal = obtenir_journal(__name__)
+
+
+class SourceAPI:
+    """
+    Ingestion d'une API JSON paginée.
+
+    Les pages sont téléchargées en parallèle (max_workers requêtes à la fois),
+    avec nouvelles tentatives et attente exponentielle en cas d'erreur, puis
+    converties en DataFrame dès leur arrivée.
+
+    url : adresse de l'API
+    page_param : nom du paramètre de page (None = une seule requête, sans pagination)
+    pages : nombre de pages si connu ; sinon on avance jusqu'à la première page vide
+    params : paramètres fixes ajoutés à chaque requête (ex: {"per_page": 500})
+    cle_donnees : clé du JSON contenant la liste des enregistrements (ex: "data")
+    cache_dir : dossier du cache des réponses (ETag / If-None-Match)
+    max_age : durée (s) pendant laquelle une réponse sans ETag est réutilisée
+    """
+
+    def __init__(self, url, page_param=None, pages=None, premiere_page=1, params=None,
+                 cle_donnees=None, max_workers=4, tentatives=3, backoff=0.5,
+                 timeout=30, cache_dir=None, max_age=None):
+        self.url = url
+        self.page_param = page_param
+        self.pages = pages
+        self.premiere_page = premiere_page
+        self.params = params or {}
+        self.cle_donnees = cle_donnees
+        self.max_workers = max_workers
+        self.tentatives = tentatives
+        self.backoff = backoff
+        self.timeout = timeout
+        self.cache_dir = Path(cache_dir) if cache_dir is not None else None
+        self.max_age = max_age
+        self._local = threading.local()
+
+    # Une session HTTP par thread (réutilisation des connexions keep-alive)
+    @property
+    def session(self):
+        if not hasattr(self._local, "session"):
+            self._local.session = requests.Session()
+        return self._local.session
+
+    def _params(self, page):
+        params = dict(self.params)
+        if self.page_param is not None and page is not None:
+            params[self.page_param] = page
+        return params
+
+    def _fichier_cache(self, params):
+        cle = json.dumps([self.url, sorted(params.items())], default=str)
+        return self.cache_dir / (hashlib.sha1(cle.encode("utf-8")).hexdigest() + ".json")
+
+    def telecharger(self, page=None):
+        """
+        Renvoie le JSON d'une page, depuis le cache si la réponse n'a pas changé.
+        """
+        params = self._params(page)
+        fichier = self._fichier_cache(params) if self.cache_dir is not None else None
+        en_cache = None
+        if fichier is not None and fichier.is_file():
+            with open(fichier, encoding="utf-8") as f:
+                en_cache = json.load(f)
+            if not en_cache.get("etag") and self.max_age is not None \
+                    and time.time() - en_cache["date"] < self.max_age:
+                return en_cache["corps"]
+
+        entetes = {}
+        if en_cache is not None and en_cache.get("etag"):
+            entetes["If-None-Match"] = en_cache["etag"]
+
+        for essai in range(self.tentatives):
+            try:
+                response = self.session.get(self.url, params=params, headers=entetes, timeout=self.timeout)
+                if response.status_code == 304 and en_cache is not None:
+                    return en_cache["corps"]
+                if response.status_code == 429 or response.status_code >= 500:
+                    response.raise_for_status()
+                break
+            except (requests.ConnectionError, requests.Timeout, requests.HTTPError):
+                if essai == self.tentatives - 1:
+                    raise
+                time.sleep(self.backoff * 2 ** essai)
+        response.raise_for_status()
+        corps = response.json()
+
+        if fichier is not None:
+            fichier.parent.mkdir(parents=True, exist_ok=True)
+            tmp = fichier.with_suffix(".tmp")
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump({"etag": response.headers.get("ETag"), "date": time.time(), "corps": corps}, f)
+            tmp.replace(fichier)
+        return corps
+
+    def _page(self, page):
+        corps = self.telecharger(page)
+        if self.cle_donnees is not None:
+            corps = corps[self.cle_donnees]
+        return pd.DataFrame.from_records(corps) if corps else pd.DataFrame()
+
+    def iter_pages(self):
+        """
+        Génère les pages (DataFrames) dans l'ordre.
+
+        Sans nombre de pages connu, les pages sont demandées par vagues de
+        max_workers jusqu'à la première page vide.
+        """
+        if self.page_param is None:
+            yield self._page(None)
+            return
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            if self.pages is not None:
+                numeros = range(self.premiere_page, self.premiere_page + self.pages)
+                yield from pool.map(self._page, numeros)
+                return
+
+            page = self.premiere_page
+            while True:
+                vague = range(page, page + self.max_workers)
+                for df in pool.map(self._page, vague):
+                    if df.empty:
+                        return
+                    yield df
+                page += self.max_workers
+
+    def charger(self):
+        pages = [df for df in self.iter_pages() if not df.empty]
+        if not pages:
+            return pd.DataFrame()
+        df = pd.concat(pages, ignore_index=True)
+        journal.info("%d page(s) chargée(s) depuis l'API %s", len(pages), self.url)
+        return df
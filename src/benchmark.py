@@ -0,0 +1,328 @@
+import json
+import platform
+import shutil
+import subprocess
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+import synthetique
+from data_loader import LoadData
+from hors_memoire import TableDisque
+from instrumentation import configurer_journal, obtenir_journal
+
+journal = obtenir_journal(__name__)
+
+
+# Mesures de performance des modules de src/ sur des données synthétiques
+# Chaque cas prépare ses données (non mesuré), puis appelle une méthode publique :
+# on relève le temps, le pic mémoire (tracemalloc, dans une exécution à part) et
+# le débit en lignes/s.
+# Les données sont relues depuis les annexes écrites sur disque ; au-delà de
+# TAILLE_MAX_MEMOIRE seuls les cas par morceaux (LoadData.iter_chunks, TableDisque)
+# sont lancés, ce qui permet d'aller jusqu'à 1e8 lignes.
+# Les résultats sont ajoutés à un fichier JSON lines avec la version du code
+# (commit git) pour comparer deux versions avec comparer().
+
+TAILLES = (10**4, 10**5, 10**6)
+TAILLE_MAX_MEMOIRE = 10**7
+CHUNKSIZE = 1_000_000
+COLONNES = ['QuantityKg', 'UnitPrice', 'WholesalePrice', 'LossRate']
+COLONNES_ANNEXE = ['Quantity Sold (kilo)', 'Unit Selling Price (RMB/kg)']
+# Cas qui lisent les annexes par morceaux, sans charger la table entière
+CAS_MORCEAUX = ("LoadData.iter_chunks", "TableDisque.ajouter", "TableDisque.detecter_colonnes",
+                "TableDisque.quantiles", "TableDisque.remove_outliers_by_clusters",
+                "TableDisque.mise_a_echelle", "TableDisque.winsorize_column")
+
+
+class Donnees:
+    """
+    Jeux de données d'une taille donnée, construits à la demande à partir des
+    annexes écrites par synthetique.ecrire_annexes, avec les étapes de
+    pipeline.py (mêmes transformations que les notebooks).
+    """
+
+    def __init__(self, n, dossier, seed=0):
+        self.n = n
+        self.dossier = Path(dossier) / f"n_{n}"
+        self.seed = seed
+        self._cache = {}
+
+    def _obtenir(self, nom, construire):
+        if nom not in self._cache:
+            self._cache[nom] = construire()
+        return self._cache[nom]
+
+    @property
+    def annexes(self):
+        return self._obtenir("annexes", lambda: synthetique.ecrire_annexes(self.dossier, self.n, seed=self.seed))
+
+    def tables(self):
+        return [pd.read_csv(fichier) for fichier in self.annexes]
+
+    @property
+    def fusionnees(self):
+        return self._obtenir("fusionnees", lambda: synthetique.fusionner_annexes(*self.tables()))
+
+    @property
+    def table(self):
+        # annex2 découpée par mois sur disque, remplie morceau par morceau
+        def construire():
+            table = TableDisque(self.dossier / "table")
+            shutil.rmtree(table.dossier, ignore_errors=True)
+            return table.ajouter(LoadData(self.annexes[1], "csv", chunksize=CHUNKSIZE).iter_chunks())
+        return self._obtenir("table", construire)
+
+    @property
+    def nettoyees(self):
+        from pipeline import etape_nettoyage, etape_segmentation
+        return self._obtenir("nettoyees", lambda: etape_segmentation(etape_nettoyage(self.fusionnees.copy())))
+
+    @property
+    def non_saisonnier(self):
+        from pipeline import etape_non_saisonnier
+        return self._obtenir("non_saisonnier", lambda: etape_non_saisonnier(self.nettoyees))
+
+    @property
+    def rapport(self):
+        from pipeline import etape_rapport_non_saisonnier
+        return self._obtenir("rapport", lambda: etape_rapport_non_saisonnier(self.non_saisonnier))
+
+    @property
+    def journalier(self):
+        from pipeline import etape_rapport_saisonnier, etape_saisonnier
+        return self._obtenir("journalier", lambda: etape_rapport_saisonnier(etape_saisonnier(self.non_saisonnier)))
+
+
+def _vider(dossier):
+    shutil.rmtree(dossier, ignore_errors=True)
+    return dossier
+
+
+def _cas():
+    # {nom : (préparation(donnees) -> arguments, appel(arguments))}
+    from analysis import Analisis
+    from cleaning import Cleaning
+    from exploratory import Exploratory
+    import reports
+
+    def figure(d):
+        return str(d.dossier / "figure.png")
+
+    return {
+        "LoadData.load_data": (lambda d: d.annexes[1], lambda a: LoadData(a, "csv")),
+        "LoadData.iter_chunks": (lambda d: LoadData(d.annexes[1], "csv", chunksize=100_000),
+                                 lambda a: sum(len(c) for c in a.iter_chunks())),
+        "LoadData.profil": (lambda d: LoadData(d.annexes[1], "csv"), lambda a: a.profil()),
+        "LoadData.charger_sources": (lambda d: [{"source": str(f), "source_type": "csv"} for f in d.annexes],
+                                     lambda a: LoadData.charger_sources(a)),
+        "LoadData.fusionner": (lambda d: (LoadData(d.annexes[0], "csv"), _tables(d)),
+                               lambda a: a[0].fusionner(a[1], on="Item Code")),
+        "LoadData.fusionner_planifie": (lambda d: (LoadData(d.annexes[0], "csv"), _tables(d)),
+                                        lambda a: a[0].fusionner_planifie(a[1], on="Item Code")),
+
+        "Cleaning.clean_data": (lambda d: Cleaning(d.fusionnees.copy()), lambda a: a.clean_data()),
+        "Cleaning.detecter_colonnes": (lambda d: Cleaning(d.fusionnees.copy()), lambda a: a.detecter_colonnes()),
+        "Cleaning.clear_nunique": (lambda d: Cleaning(d.fusionnees.copy()), lambda a: a.clear_nunique()),
+        "Cleaning.clear_categorical": (lambda d: Cleaning(d.fusionnees.copy()), lambda a: a.clear_categorical()),
+        "Cleaning.inferer_types": (lambda d: Cleaning(d.fusionnees.copy()), lambda a: a.inferer_types()),
+        "Cleaning.clear_date": (lambda d: Cleaning(d.fusionnees.copy()), lambda a: a.clear_date()),
+        "Cleaning.optimiser_types": (lambda d: Cleaning(d.fusionnees.copy()), lambda a: a.optimiser_types()),
+        "Cleaning.remove_outliers_by_cluster": (
+            lambda d: d.nettoyees, lambda a: Cleaning.remove_outliers_by_cluster(a, 'QuantityCluster', 'UnitPrice')),
+        "Cleaning.remove_outliers_by_clusters": (
+            lambda d: d.nettoyees, lambda a: Cleaning.remove_outliers_by_clusters(a, 'QuantityCluster', COLONNES)),
+
+        "Exploratory.iqr": (lambda d: Exploratory(d.non_saisonnier), lambda a: a.iqr('UnitPrice')),
+        "Exploratory.winsorize_column": (lambda d: Exploratory(d.non_saisonnier.copy()),
+                                         lambda a: a.winsorize_column('UnitPrice')),
+        "Exploratory.z_score": (lambda d: Exploratory(d.non_saisonnier), lambda a: a.z_score('UnitPrice')),
+        "Exploratory.isolation_forest": (lambda d: Exploratory(d.non_saisonnier),
+                                         lambda a: a.isolation_forest('UnitPrice')),
+        "Exploratory.dbscan": (lambda d: Exploratory(d.non_saisonnier), lambda a: a.dbscan('UnitPrice')),
+        "Exploratory.detecter_lot": (lambda d: Exploratory(d.non_saisonnier), lambda a: a.detecter_lot(COLONNES)),
+
+        "Analisis.iqr": (lambda d: Analisis(d.non_saisonnier), lambda a: a.iqr('UnitPrice')),
+        "Analisis.winsorize_column": (lambda d: Analisis(d.non_saisonnier.copy()),
+                                      lambda a: a.winsorize_column('UnitPrice')),
+        "Analisis.mise_a_echelle": (lambda d: Analisis(d.non_saisonnier), lambda a: a.mise_a_echelle(COLONNES)),
+        "Analisis.min_maxscaling": (lambda d: Analisis(d.non_saisonnier), lambda a: a.min_maxscaling(COLONNES)),
+        "Analisis.standardisation": (lambda d: Analisis(d.non_saisonnier), lambda a: a.standardisation(COLONNES)),
+        "Analisis.robust_scaling": (lambda d: Analisis(d.non_saisonnier), lambda a: a.robust_scaling(COLONNES)),
+
+        "reports.sale_quantity": (lambda d: (d.rapport, figure(d)),
+                                  lambda a: reports.sale_quantity(a[0], 'QuantityCluster', 'QuantityKg', chemin=a[1])),
+        "reports.ratio_marge": (lambda d: (d.journalier, figure(d)), lambda a: reports.ratio_marge(a[0], chemin=a[1])),
+        "reports.marge_par_produit": (lambda d: (d.rapport, figure(d)),
+                                      lambda a: reports.marge_par_produit(a[0], chemin=a[1])),
+        "reports.relation_prix": (lambda d: (d.journalier, figure(d)),
+                                  lambda a: reports.relation_prix(a[0], chemin=a[1])),
+        "reports.generer_rapport": (lambda d: (d.rapport, d.journalier, d.dossier / "rapport"),
+                                    lambda a: reports.generer_rapport(a[0], a[2], ventes_journalieres=a[1])),
+
+        # Par morceaux : la table (annex2 sur disque) est construite une fois par taille ;
+        # winsorize_column modifie les fragments sur place, il passe donc en dernier
+        "TableDisque.ajouter": (
+            lambda d: (TableDisque(_vider(d.dossier / "ajout")),
+                       LoadData(d.annexes[1], "csv", chunksize=CHUNKSIZE)),
+            lambda a: a[0].ajouter(a[1].iter_chunks())),
+        "TableDisque.detecter_colonnes": (lambda d: d.table, lambda a: a.detecter_colonnes()),
+        "TableDisque.quantiles": (lambda d: d.table,
+                                  lambda a: a.quantiles(COLONNES_ANNEXE, [0.25, 0.5, 0.75], groupe='Item Code')),
+        "TableDisque.remove_outliers_by_clusters": (
+            lambda d: (d.table, _vider(d.dossier / "filtree")),
+            lambda a: a[0].remove_outliers_by_clusters('Item Code', COLONNES_ANNEXE, a[1])),
+        "TableDisque.mise_a_echelle": (
+            lambda d: (d.table, _vider(d.dossier / "echelle")),
+            lambda a: a[0].mise_a_echelle(COLONNES_ANNEXE, dossier=a[1])),
+        "TableDisque.winsorize_column": (lambda d: d.table,
+                                         lambda a: a.winsorize_column('Unit Selling Price (RMB/kg)')),
+    }
+
+
+def _tables(d):
+    annex1, annex2, annex3, annex4 = d.tables()
+    return [annex1, annex2, annex3.iloc[:1000], annex4]
+
+
+def mesurer(appel, preparer, lignes, memoire=True):
+    """
+    Temps d'exécution, pic mémoire (Mo, allocations Python et numpy) et débit d'un appel.
+    Le pic mémoire est relevé dans une seconde exécution, sur des arguments préparés
+    à nouveau : tracemalloc ralentit chaque allocation et fausserait le temps.
+    """
+    arguments = preparer()
+    debut = time.perf_counter()
+    try:
+        appel(arguments)
+        erreur = None
+    except Exception as e:
+        erreur = f"{type(e).__name__}: {e}"
+    temps = time.perf_counter() - debut
+    pic = None
+    if memoire and erreur is None:
+        arguments = None
+        arguments = preparer()
+        tracemalloc.start()
+        try:
+            appel(arguments)
+        except Exception as e:
+            erreur = f"{type(e).__name__}: {e}"
+        pic = tracemalloc.get_traced_memory()[1] / 1e6
+        tracemalloc.stop()
+    return {"temps_s": temps, "memoire_pic_mo": pic, "lignes_par_s": lignes / temps if temps > 0 else None,
+            "erreur": erreur}
+
+
+def version():
+    try:
+        sortie = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                                cwd=Path(__file__).parent, check=True)
+        return sortie.stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "inconnue"
+
+
+def executer(tailles=TAILLES, cas=None, fichier="../data/benchmarks/resultats.jsonl", dossier=None,
+             repetitions=1, memoire=True, seed=0, taille_max_memoire=TAILLE_MAX_MEMOIRE):
+    """
+    Lance les cas (tous par défaut, ou la liste des noms donnés) pour chaque taille
+    et ajoute les résultats à fichier (None = pas d'enregistrement).
+    Au-delà de taille_max_memoire, seuls les cas de CAS_MORCEAUX sont lancés.
+    Renvoie un DataFrame des résultats.
+    """
+    import matplotlib
+    matplotlib.use("Agg")
+
+    tous = _cas()
+    noms = list(tous) if cas is None else list(cas)
+    inconnus = [nom for nom in noms if nom not in tous]
+    if inconnus:
+        raise ValueError(f"Cas inconnus : {inconnus}")
+
+    contexte = {"version": version(), "date": datetime.now().isoformat(timespec="seconds"),
+                "machine": platform.node(), "python": platform.python_version(),
+                "pandas": pd.__version__, "numpy": np.__version__}
+    resultats = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in tailles:
+            donnees = Donnees(n, dossier or tmp, seed=seed)
+            for nom in noms:
+                if n > taille_max_memoire and nom not in CAS_MORCEAUX:
+                    journal.info("%s (%d lignes) : ignoré, table entière en mémoire", nom, n)
+                    continue
+                preparer, appel = tous[nom]
+                for repetition in range(repetitions):
+                    try:
+                        mesure = mesurer(appel, lambda: preparer(donnees), n, memoire=memoire)
+                    except Exception as e:
+                        mesure = {"temps_s": None, "memoire_pic_mo": None, "lignes_par_s": None,
+                                  "erreur": f"préparation : {type(e).__name__}: {e}"}
+                    resultats.append(dict(contexte, cas=nom, lignes=n, repetition=repetition, **mesure))
+                    etat = mesure["erreur"] or f"{mesure['temps_s']:.3f} s"
+                    journal.info("%s (%d lignes) : %s", nom, n, etat)
+
+    if fichier is not None:
+        enregistrer(resultats, fichier)
+    return pd.DataFrame(resultats)
+
+
+def enregistrer(resultats, fichier):
+    fichier = Path(fichier)
+    fichier.parent.mkdir(parents=True, exist_ok=True)
+    with open(fichier, "a", encoding="utf-8") as f:
+        for resultat in resultats:
+            f.write(json.dumps(resultat, ensure_ascii=False) + "\n")
+    journal.info("%d mesure(s) ajoutée(s) à %s", len(resultats), fichier)
+
+
+def lire_resultats(fichier):
+    with open(fichier, encoding="utf-8") as f:
+        return pd.DataFrame([json.loads(ligne) for ligne in f if ligne.strip()])
+
+
+def comparer(fichier, reference=None, candidate=None, seuil=1.2):
+    """
+    Compare deux versions (par défaut les deux dernières enregistrées) : temps
+    médian par (cas, lignes), rapport candidate / reference et régressions
+    (rapport > seuil).
+    """
+    resultats = lire_resultats(fichier)
+    resultats = resultats[resultats["erreur"].isna()]
+    versions = list(dict.fromkeys(resultats.sort_values("date")["version"]))
+    if reference is None or candidate is None:
+        if len(versions) < 2:
+            raise ValueError("Il faut au moins deux versions enregistrées pour comparer")
+        reference = versions[-2] if reference is None else reference
+        candidate = versions[-1] if candidate is None else candidate
+
+    def medianes(v):
+        return resultats[resultats["version"] == v].groupby(["cas", "lignes"])[["temps_s", "memoire_pic_mo"]].median()
+
+    table = medianes(reference).join(medianes(candidate), lsuffix="_reference", rsuffix="_candidate", how="inner")
+    table["rapport_temps"] = table["temps_s_candidate"] / table["temps_s_reference"]
+    table["rapport_memoire"] = table["memoire_pic_mo_candidate"] / table["memoire_pic_mo_reference"]
+    table["regression"] = table["rapport_temps"] > seuil
+    return table.sort_values("rapport_temps", ascending=False)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Benchmarks des modules de src/ sur données synthétiques")
+    parser.add_argument("--tailles", type=int, nargs="+", default=list(TAILLES))
+    parser.add_argument("--cas", nargs="+", default=None)
+    parser.add_argument("--fichier", default="../data/benchmarks/resultats.jsonl")
+    parser.add_argument("--repetitions", type=int, default=1)
+    parser.add_argument("--sans-memoire", action="store_true")
+    parser.add_argument("--dossier", default=None, help="Dossier des annexes (temporaire par défaut)")
+    parser.add_argument("--taille-max-memoire", type=int, default=TAILLE_MAX_MEMOIRE)
+    args = parser.parse_args()
+    configurer_journal()
+    executer(args.tailles, args.cas, args.fichier, dossier=args.dossier, repetitions=args.repetitions,
+             memoire=not args.sans_memoire, taille_max_memoire=args.taille_max_memoire)
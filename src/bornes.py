@@ -0,0 +1,244 @@
+import numpy as np
+import pandas as pd
+
+
+# Résumés statistiques fusionnables
+# Ils permettent de calculer des bornes (IQR, percentiles, Z-score) par lots :
+# chaque nouveau lot met à jour le résumé sans relire l'historique, et deux
+# résumés calculés en parallèle (un par morceau) se fusionnent.
+
+
+class Moments:
+    """
+    Effectif, moyenne, somme des carrés des écarts (M2), min et max.
+    La fusion (formule de Chan) est exacte.
+    """
+
+    def __init__(self):
+        self.n = 0
+        self.moyenne = 0.0
+        self.m2 = 0.0
+        self.min = np.inf
+        self.max = -np.inf
+
+    def ajouter(self, valeurs):
+        valeurs = _valeurs(valeurs)
+        if len(valeurs) == 0:
+            return self
+        lot = Moments()
+        lot.n = len(valeurs)
+        lot.moyenne = float(valeurs.mean())
+        lot.m2 = float(((valeurs - lot.moyenne) ** 2).sum())
+        lot.min = float(valeurs.min())
+        lot.max = float(valeurs.max())
+        return self.fusionner(lot)
+
+    def fusionner(self, autre):
+        if autre.n == 0:
+            return self
+        n = self.n + autre.n
+        delta = autre.moyenne - self.moyenne
+        self.m2 += autre.m2 + delta ** 2 * self.n * autre.n / n
+        self.moyenne += delta * autre.n / n
+        self.n = n
+        self.min = min(self.min, autre.min)
+        self.max = max(self.max, autre.max)
+        return self
+
+    def variance(self, ddof=1):
+        return self.m2 / (self.n - ddof) if self.n > ddof else np.nan
+
+    def ecart_type(self, ddof=1):
+        return float(np.sqrt(self.variance(ddof)))
+
+
+class TDigest:
+    """
+    Sketch de quantiles (t-digest) : la distribution est résumée par des
+    centroïdes (moyenne, poids), petits aux extrémités et plus gros au centre.
+
+    Tant que le nombre de valeurs ne dépasse pas compression, chaque valeur
+    garde son propre centroïde : les quantiles sont exacts (même interpolation
+    linéaire que pandas), y compris après fusion. Au-delà, ils sont approchés.
+    Avec compression=None aucune valeur n'est regroupée : les quantiles et les
+    fusions sont exacts, au prix d'une mémoire proportionnelle aux données.
+    """
+
+    def __init__(self, compression=200, tampon=5000):
+        self.compression = compression
+        self.taille_tampon = tampon
+        self.moyennes = np.empty(0)
+        self.poids = np.empty(0)
+        self.tampon = []
+        self.min = np.inf
+        self.max = -np.inf
+
+    @property
+    def n(self):
+        return float(self.poids.sum()) + sum(len(t) for t in self.tampon)
+
+    def ajouter(self, valeurs):
+        valeurs = _valeurs(valeurs)
+        if len(valeurs) == 0:
+            return self
+        self.min = min(self.min, float(valeurs.min()))
+        self.max = max(self.max, float(valeurs.max()))
+        self.tampon.append(valeurs)
+        if sum(len(t) for t in self.tampon) >= self.taille_tampon:
+            self.compresser()
+        return self
+
+    def fusionner(self, autre):
+        autre.compresser()
+        self.compresser()
+        self._fusionner_centroides(autre.moyennes, autre.poids)
+        self.min = min(self.min, autre.min)
+        self.max = max(self.max, autre.max)
+        return self
+
+    def compresser(self):
+        if not self.tampon:
+            return self
+        valeurs = np.concatenate(self.tampon)
+        self.tampon = []
+        self._fusionner_centroides(valeurs, np.ones(len(valeurs)))
+        return self
+
+    def _fusionner_centroides(self, moyennes, poids):
+        moyennes = np.concatenate([self.moyennes, moyennes])
+        poids = np.concatenate([self.poids, poids])
+        ordre = np.argsort(moyennes, kind="mergesort")
+        moyennes, poids = moyennes[ordre], poids[ordre]
+        total = poids.sum()
+        if self.compression is None or total <= self.compression:
+            self.moyennes, self.poids = moyennes, poids
+            return
+
+        # Fonction d'échelle k1 : chaque centroïde couvre au plus une unité de k
+        q_gauche = (np.cumsum(poids) - poids) / total
+        k = self.compression / (2 * np.pi) * np.arcsin(2 * q_gauche - 1)
+        groupes = np.floor(k - k[0]).astype(np.int64)
+        debuts = np.flatnonzero(np.r_[True, groupes[1:] != groupes[:-1]])
+
+        somme_poids = np.add.reduceat(poids, debuts)
+        self.moyennes = np.add.reduceat(moyennes * poids, debuts) / somme_poids
+        self.poids = somme_poids
+
+    def quantile(self, q):
+        """
+        Quantile(s) estimé(s) ; q est un nombre ou une liste dans [0, 1].
+        """
+        self.compresser()
+        q_tab = np.atleast_1d(np.asarray(q, dtype=np.float64))
+        if len(self.poids) == 0:
+            resultat = np.full(len(q_tab), np.nan)
+        else:
+            # Position de chaque centroïde sur l'axe des rangs (0.5 ... n - 0.5)
+            centres = np.cumsum(self.poids) - self.poids / 2
+            cibles = q_tab * (self.poids.sum() - 1) + 0.5
+            resultat = np.interp(cibles, centres, self.moyennes, left=self.min, right=self.max)
+        return resultat if np.ndim(q) else float(resultat[0])
+
+
+class _Bornes:
+    """
+    Base des estimateurs de bornes : fit / partial_fit / transform.
+    Les sous-classes définissent _nouveau_resume() et bornes.
+    """
+
+    def __init__(self):
+        self.resume = self._nouveau_resume()
+
+    def fit(self, valeurs):
+        self.resume = self._nouveau_resume()
+        return self.partial_fit(valeurs)
+
+    def partial_fit(self, valeurs):
+        self.resume.ajouter(valeurs)
+        return self
+
+    def fusionner(self, autre):
+        self.resume.fusionner(autre.resume)
+        return self
+
+    def transform(self, valeurs):
+        """
+        Winsorisation : renvoie une copie des valeurs ramenées dans les bornes.
+        """
+        lower, upper = self.bornes
+        if isinstance(valeurs, pd.Series):
+            return valeurs.clip(lower=lower, upper=upper)
+        return np.clip(valeurs, lower, upper)
+
+    def fit_transform(self, valeurs):
+        return self.fit(valeurs).transform(valeurs)
+
+    def detecter(self, valeurs):
+        """
+        Masque booléen des valeurs en dehors des bornes.
+        """
+        lower, upper = self.bornes
+        return (valeurs < lower) | (valeurs > upper)
+
+
+class BornesIQR(_Bornes):
+    """
+    Bornes [Q1 - factor * IQR, Q3 + factor * IQR] à partir d'un t-digest.
+    """
+
+    def __init__(self, factor=1.5, compression=200):
+        self.factor = factor
+        self.compression = compression
+        super().__init__()
+
+    def _nouveau_resume(self):
+        return TDigest(self.compression)
+
+    @property
+    def bornes(self):
+        q1, q3 = self.resume.quantile([0.25, 0.75])
+        iqr = q3 - q1
+        return float(q1 - self.factor * iqr), float(q3 + self.factor * iqr)
+
+
+class BornesPercentile(_Bornes):
+    """
+    Bornes aux percentiles lower_percentile et upper_percentile.
+    """
+
+    def __init__(self, lower_percentile=0.05, upper_percentile=0.95, compression=200):
+        self.lower_percentile = lower_percentile
+        self.upper_percentile = upper_percentile
+        self.compression = compression
+        super().__init__()
+
+    def _nouveau_resume(self):
+        return TDigest(self.compression)
+
+    @property
+    def bornes(self):
+        lower, upper = self.resume.quantile([self.lower_percentile, self.upper_percentile])
+        return float(lower), float(upper)
+
+
+class BornesZScore(_Bornes):
+    """
+    Bornes moyenne +/- seuil * écart-type (moments courants, fusion exacte).
+    """
+
+    def __init__(self, seuil=3):
+        self.seuil = seuil
+        super().__init__()
+
+    def _nouveau_resume(self):
+        return Moments()
+
+    @property
+    def bornes(self):
+        ecart = self.seuil * self.resume.ecart_type()
+        return self.resume.moyenne - ecart, self.resume.moyenne + ecart
+
+
+def _valeurs(valeurs):
+    valeurs = np.asarray(valeurs, dtype=np.float64).ravel()
+    return valeurs[~np.isnan(valeurs)]
@@ -0,0 +1,214 @@
+import hashlib
+import json
+import os
+import shutil
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from instrumentation import obtenir_journal
+
+journal = obtenir_journal(__name__)
+
+
+SCHEMA = "schema.json"
+
+
+# Format colonnaire sur disque
+# Chaque colonne est écrite dans son propre fichier .npy (lisible en memory-map)
+# Le fichier schema.json décrit l'ordre des colonnes, leur type et les catégories
+# Les colonnes texte sont stockées sous forme de codes entiers + liste des catégories
+# Les dates sont stockées en datetime64[ns], les flottants peuvent être réduits en float32
+def _type_stockage(serie, type_demande=None):
+    if type_demande is not None:
+        return type_demande
+    if isinstance(serie.dtype, pd.CategoricalDtype):
+        return "category"
+    if pd.api.types.is_datetime64_any_dtype(serie):
+        return "datetime"
+    if pd.api.types.is_bool_dtype(serie) or pd.api.types.is_numeric_dtype(serie):
+        return str(serie.dtype)
+    # Texte (object / str) : les valeurs répétées deviennent des catégories
+    return "category"
+
+
+def ecrire_colonnes(dossier, df, dtypes=None, meta=None):
+    """
+    Écrit un DataFrame colonne par colonne dans le dossier (un .npy par colonne).
+
+    dtypes : dictionnaire optionnel {colonne: 'category' | 'datetime' | 'float32' | ...}
+    meta : informations supplémentaires enregistrées dans le schéma
+    """
+    dtypes = dtypes or {}
+    dossier = Path(dossier)
+    tmp = dossier.with_name(dossier.name + ".tmp")
+    if tmp.exists():
+        shutil.rmtree(tmp)
+    tmp.mkdir(parents=True)
+
+    colonnes = []
+    for i, col in enumerate(df.columns):
+        serie = df[col]
+        type_col = _type_stockage(serie, dtypes.get(col))
+        fichier = f"col_{i}.npy"
+        info = {"nom": col, "fichier": fichier, "type": type_col}
+
+        if type_col == "category":
+            cat = serie if isinstance(serie.dtype, pd.CategoricalDtype) else serie.astype("category")
+            codes = cat.cat.codes.to_numpy()
+            info["categories"] = cat.cat.categories.tolist()
+            np.save(tmp / fichier, codes)
+        elif type_col == "datetime":
+            valeurs = pd.to_datetime(serie, errors="coerce").to_numpy(dtype="datetime64[ns]")
+            np.save(tmp / fichier, valeurs)
+        else:
+            np.save(tmp / fichier, serie.to_numpy(dtype=type_col))
+        colonnes.append(info)
+
+    schema = {"colonnes": colonnes, "lignes": len(df), "meta": meta or {}}
+    with open(tmp / SCHEMA, "w", encoding="utf-8") as f:
+        json.dump(schema, f, ensure_ascii=False)
+
+    # Remplacement atomique de l'ancienne version
+    if dossier.exists():
+        shutil.rmtree(dossier)
+    os.replace(tmp, dossier)
+    return schema
+
+
+def lire_schema(dossier):
+    fichier = Path(dossier) / SCHEMA
+    if not fichier.is_file():
+        return None
+    with open(fichier, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def lire_colonnes(dossier, columns=None, nrows=None, mmap=True):
+    """
+    Relit un dossier écrit par ecrire_colonnes.
+
+    Seules les colonnes demandées sont ouvertes ; avec mmap=True les fichiers
+    numériques sont projetés en mémoire au lieu d'être lus entièrement.
+    """
+    dossier = Path(dossier)
+    schema = lire_schema(dossier)
+    if schema is None:
+        raise FileNotFoundError(f"Aucun schéma dans {dossier}")
+
+    infos = {c["nom"]: c for c in schema["colonnes"]}
+    if columns is None:
+        columns = [c["nom"] for c in schema["colonnes"]]
+    manquantes = [c for c in columns if c not in infos]
+    if manquantes:
+        raise KeyError(f"Colonnes absentes du cache : {manquantes}")
+
+    donnees = {}
+    for col in columns:
+        info = infos[col]
+        valeurs = np.load(dossier / info["fichier"], mmap_mode="r" if mmap else None)
+        if nrows is not None:
+            valeurs = valeurs[:nrows]
+        if info["type"] == "category":
+            donnees[col] = pd.Categorical.from_codes(np.asarray(valeurs), categories=info["categories"])
+        else:
+            donnees[col] = valeurs
+    return pd.DataFrame(donnees, columns=columns)
+
+
+class CacheColonnes:
+    """
+    Cache colonnaire des fichiers sources (CSV, Excel).
+
+    Chaque source a son dossier, identifié par son chemin ; la signature
+    (mtime, taille) est enregistrée dans le schéma et le cache est reconstruit
+    dès que le fichier source change.
+    """
+
+    def __init__(self, cache_dir):
+        self.cache_dir = Path(cache_dir)
+
+    def dossier(self, source):
+        chemin = str(Path(source).resolve())
+        return self.cache_dir / hashlib.sha1(chemin.encode("utf-8")).hexdigest()[:16]
+
+    @staticmethod
+    def signature(source):
+        stat = Path(source).stat()
+        return {"chemin": str(Path(source).resolve()), "mtime": stat.st_mtime_ns, "taille": stat.st_size}
+
+    def est_valide(self, source, dtypes=None):
+        schema = lire_schema(self.dossier(source))
+        if schema is None:
+            return False
+        meta = schema.get("meta", {})
+        return meta.get("signature") == self.signature(source) and meta.get("dtypes") == (dtypes or {})
+
+    def construire(self, source, lecteur, dtypes=None):
+        """
+        Parse la source avec lecteur (fonction sans argument qui renvoie un DataFrame)
+        et écrit sa copie colonnaire.
+        """
+        df = lecteur()
+        meta = {"signature": self.signature(source), "dtypes": dtypes or {}}
+        ecrire_colonnes(self.dossier(source), df, dtypes=dtypes, meta=meta)
+        return df
+
+    def charger(self, source, lecteur, columns=None, dtypes=None, nrows=None):
+        """
+        Renvoie les colonnes demandées depuis le cache, en le (re)construisant si besoin.
+        """
+        if not self.est_valide(source, dtypes):
+            self.construire(source, lecteur, dtypes)
+            journal.info("Cache colonnaire construit pour %s", source)
+        return lire_colonnes(self.dossier(source), columns=columns, nrows=nrows)
+
+    def invalider(self, source):
+        dossier = self.dossier(source)
+        if dossier.exists():
+            shutil.rmtree(dossier)
+
+
+def remplacer_colonne(dossier, nom, serie, type_demande=None):
+    """
+    Remplace (ou ajoute) une colonne d'un dossier écrit par ecrire_colonnes,
+    sans réécrire les autres colonnes.
+    """
+    dossier = Path(dossier)
+    schema = lire_schema(dossier)
+    if schema is None:
+        raise FileNotFoundError(f"Aucun schéma dans {dossier}")
+    if len(serie) != schema["lignes"]:
+        raise ValueError(f"{nom} : {len(serie)} valeurs pour {schema['lignes']} lignes")
+
+    infos = {c["nom"]: c for c in schema["colonnes"]}
+    serie = pd.Series(serie)
+    type_col = _type_stockage(serie, type_demande)
+    if nom in infos:
+        info = infos[nom]
+    else:
+        info = {"nom": nom, "fichier": f"col_{len(schema['colonnes'])}.npy"}
+        schema["colonnes"].append(info)
+    info["type"] = type_col
+    info.pop("categories", None)
+
+    if type_col == "category":
+        cat = serie if isinstance(serie.dtype, pd.CategoricalDtype) else serie.astype("category")
+        valeurs = cat.cat.codes.to_numpy()
+        info["categories"] = cat.cat.categories.tolist()
+    elif type_col == "datetime":
+        valeurs = pd.to_datetime(serie, errors="coerce").to_numpy(dtype="datetime64[ns]")
+    else:
+        valeurs = serie.to_numpy(dtype=type_col)
+
+    # Fichier temporaire puis remplacement : une projection mémoire ouverte reste valide
+    tmp = dossier / (info["fichier"] + ".tmp")
+    with open(tmp, "wb") as f:
+        np.save(f, valeurs)
+    os.replace(tmp, dossier / info["fichier"])
+    tmp = dossier / (SCHEMA + ".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(schema, f, ensure_ascii=False)
+    os.replace(tmp, dossier / SCHEMA)
+    return schema
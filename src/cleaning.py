@@ -1,54 +1,82 @@
+import hashlib
+
+import numpy as np
 import pandas as pd
 
+from instrumentation import instrumenter_classe, obtenir_journal
+from profiling import Profil
+
+journal = obtenir_journal(__name__)
+
 
+@instrumenter_classe
 class Cleaning:
     def __init__(self, ventes):
         self.ventes = ventes
 
     def clean_data(self):
+        """
+        Nettoie les noms de colonnes et renvoie le profil du DataFrame
+        (premières / dernières lignes, forme, types, doublons, valeurs
+        uniques, valeurs manquantes, min / max, mémoire) calculé en un passage.
+        """
         # Nettoyer les noms de colonnes
         self.ventes.columns = self.ventes.columns.str.strip()
-        
-        # Afficher les premières lignes du DataFrame
-        print(self.ventes.head().to_string())
-        print("\n")
-        # Afficher les dernières lignes du DataFrame
-        print(self.ventes.tail().to_string())
-        print("\n")
-        # Afficher la forme du DataFrame
-        print(self.ventes.shape)
-        print("\n")
-        # Afficher les types de données de chaque colonne
-        print(self.ventes.dtypes)
-        print("\n")
-        # Compter le nombre de lignes dupliquées
-        print(self.ventes.duplicated().sum())
-        print("\n")
-        # Compter le nombre de valeurs uniques par colonne
-        print(self.ventes.nunique())
+
+        return Profil.construire(self.ventes)
         
     
-    def clear_nunique(self):
-        constantes = [col for col in self.ventes.columns if self.ventes[col].nunique() == 1]
-        print("Colonnes constantes :", constantes)
-        self.ventes = self.ventes.drop(columns=constantes, axis=1)
+    def detecter_colonnes(self):
+        """
+        Détecte en un seul passage les colonnes constantes et les colonnes identiques.
+
+        Chaque colonne est résumée par une empreinte (longueur, hachage de ses
+        valeurs, voir hacher_valeurs) ; la comparaison complète n'est faite que
+        pour les colonnes dont les empreintes sont égales. Mêmes résultats que
+        nunique() == 1 et (a == b).all(), y compris entre un entier et un réel.
+        Renvoie {'constantes': [...], 'doublons': {colonne: colonne_gardée}}.
+        """
+        constantes = []
+        groupes = {}
+        for col in self.ventes.columns:
+            serie = self.ventes[col]
+            hachages = hacher_valeurs(serie)
+            non_nuls = hachages[serie.notna().to_numpy()]
+            # Constante : une seule empreinte en dehors des valeurs manquantes,
+            # confirmée sur les valeurs (collision de hachage possible)
+            if len(non_nuls) and (non_nuls == non_nuls[0]).all() and serie.nunique() == 1:
+                constantes.append(col)
+                continue
+            empreinte = (len(serie), hashlib.sha1(hachages.tobytes()).hexdigest())
+            groupes.setdefault(empreinte, []).append(col)
 
+        doublons = {}
+        for cols in groupes.values():
+            gardees = []
+            for col in cols:
+                # Vérification complète seulement en cas de collision d'empreinte
+                origine = next((g for g in gardees if (self.ventes[g] == self.ventes[col]).all()), None)
+                if origine is None:
+                    gardees.append(col)
+                else:
+                    doublons[col] = origine
+        return {"constantes": constantes, "doublons": doublons}
 
-         # Vérifier les colonnes identiques (même valeur sur chaque ligne)
-        cols = self.ventes.columns.tolist()
-        to_drop = []
-        for i in range(len(cols)):
-            for j in range(i+1, len(cols)):
-                if (self.ventes[cols[i]] == self.ventes[cols[j]]).all():
-                    to_drop.append(cols[j])
-        # Garder la première, supprimer les suivantes
-        self.ventes = self.ventes.drop(columns=list(set(to_drop)), axis=1)
+    def clear_nunique(self):
+        colonnes = self.detecter_colonnes()
+        constantes = colonnes["constantes"]
+        journal.info("Colonnes constantes : %s", constantes)
+
+        # Colonnes identiques (même valeur sur chaque ligne) :
+        # garder la première, supprimer les suivantes
+        to_drop = list(colonnes["doublons"])
+        self.ventes = self.ventes.drop(columns=constantes + to_drop)
 
         return self.ventes
    
     def clear_categorical(self):
         constantes = [col for col in self.ventes.columns if self.ventes[col].nunique() == 2]
-        print("Colonnes catogirie :", constantes)
+        journal.info("Colonnes catogirie : %s", constantes)
         
         # Standardiser en 0/1
         for col in constantes:
@@ -56,22 +84,92 @@ class Cleaning:
         
         return self.ventes
     
-    def clear_date(self):
+    def inferer_types(self, echantillon=1000, seuil=0.8, ratio_categorie=0.5):
+        """
+        Devine le type de chaque colonne à partir d'un petit échantillon.
+
+        Renvoie {colonne: 'date' | 'heure' | 'numerique' | 'categorie' | 'texte'}.
+        Seul l'échantillon est converti : les colonnes entières ne le sont que
+        par clear_date / optimiser_types. Comme dans clear_date d'origine, les
+        valeurs manquantes comptent dans les proportions comparées à seuil : une
+        colonne à moitié vide n'est pas convertie.
+        """
+        types = {}
+        for col in self.ventes.columns:
+            serie = self.ventes[col]
+            if not _est_texte(serie):
+                types[col] = "numerique" if pd.api.types.is_numeric_dtype(serie) else str(serie.dtype)
+                continue
+
+            if len(serie) > echantillon:
+                serie = serie.sample(echantillon, random_state=0)
+            valeurs = serie.dropna()
+            if valeurs.empty:
+                types[col] = "texte"
+                continue
+
+            dates = pd.to_datetime(serie, format="%Y-%m-%d", errors='coerce')
+            heures = pd.to_datetime(serie, format="%H:%M:%S.%f", errors='coerce')
+            nombres = pd.to_numeric(serie, errors='coerce')
+            # Même règle que clear_date : majorité de dates avec l'heure à 00:00:00
+            if dates.notna().mean() > seuil and (dates.dt.hour == 0).mean() > seuil:
+                types[col] = "date"
+            elif heures.notna().mean() > seuil:
+                types[col] = "heure"
+            elif nombres.notna().mean() > seuil:
+                types[col] = "numerique"
+            elif valeurs.nunique() / len(valeurs) < ratio_categorie:
+                types[col] = "categorie"
+            else:
+                types[col] = "texte"
+        return types
+
+    def clear_date(self, echantillon=1000):
         # Convertir uniquement les colonnes qui ressemblent à des dates (pas des heures)
-        date_cols = []
-        for col in self.ventes.select_dtypes(include=['object']).columns:
-            converted = pd.to_datetime(self.ventes[col], format="%Y-%m-%d", errors='coerce')
-            # Vérifie que la majorité des valeurs ont l'heure à 00:00:00
-            is_date = (converted.notna().mean() > 0.8) and ((converted.dt.hour == 0).mean() > 0.8)
-            if is_date:
-                date_cols.append(col)
-                self.ventes[col] = converted
-        print("Colonnes converties en date :", date_cols)
+        # La détection se fait sur un échantillon, seule la conversion parcourt la colonne
+        types = self.inferer_types(echantillon=echantillon)
+        date_cols = [col for col, type_col in types.items() if type_col == "date"]
+        for col in date_cols:
+            self.ventes[col] = pd.to_datetime(self.ventes[col], format="%Y-%m-%d", errors='coerce')
+        journal.info("Colonnes converties en date : %s", date_cols)
+        return self.ventes
+
+    def optimiser_types(self, echantillon=1000, ratio_categorie=0.5, float32=True, rtol=None, decimales=6):
+        """
+        Réduit la mémoire du DataFrame :
+        - dates détectées -> datetime64, nombres stockés en texte -> numériques
+        - texte répété -> category (codes int8 / int16)
+        - entiers -> plus petit type entier signé (les soustractions ne bouclent pas)
+        - flottants -> float32 si les valeurs se retrouvent exactement en arrondissant
+          le float32 à leur nombre de décimales (au plus decimales), ou, si rtol est
+          donné (valeur ou {colonne: valeur}), si l'écart relatif reste sous rtol
+        Les colonnes d'heures et le texte libre sont laissés tels quels.
+        La mémoire avant / après est gardée dans self.memoire.
+        """
+        avant = self.ventes.memory_usage(index=False, deep=True)
+        types = self.inferer_types(echantillon=echantillon, ratio_categorie=ratio_categorie)
+
+        for col, type_col in types.items():
+            serie = self.ventes[col]
+            if type_col == "date":
+                self.ventes[col] = pd.to_datetime(serie, format="%Y-%m-%d", errors='coerce')
+            elif type_col == "categorie":
+                self.ventes[col] = serie.astype("category")
+            elif type_col == "numerique":
+                if _est_texte(serie):
+                    serie = pd.to_numeric(serie, errors='coerce')
+                tolerance = rtol.get(col) if isinstance(rtol, dict) else rtol
+                self.ventes[col] = _reduire_numerique(serie, float32, tolerance, decimales)
+
+        apres = self.ventes.memory_usage(index=False, deep=True)
+        self.memoire = pd.DataFrame({"avant": avant, "apres": apres})
+        journal.info("Mémoire : %.1f Mo -> %.1f Mo", avant.sum() / 1e6, apres.sum() / 1e6)
         return self.ventes
     
    
     
     
+    @staticmethod
     def remove_outliers_by_cluster(df, cluster_col, value_col):
         """
         Supprime les outliers pour une colonne numérique dans chaque cluster
@@ -89,4 +187,89 @@ class Cleaning:
             upper = Q3 + 1.5 * IQR
             return group[(group[value_col] >= lower) & (group[value_col] <= upper)]
         
-        return df.groupby(cluster_col).apply(remove_outliers).reset_index(drop=True)
\ No newline at end of file
+        return df.groupby(cluster_col).apply(remove_outliers).reset_index(drop=True)
+
+    @staticmethod
+    def remove_outliers_by_clusters(df, cluster_col, value_cols, factor=1.5):
+        """
+        Supprime les outliers de plusieurs colonnes numériques dans chaque cluster
+        (méthode IQR) en un seul filtrage.
+
+        Les bornes Q1 - factor * IQR et Q3 + factor * IQR de toutes les colonnes
+        et de tous les clusters sont calculées en un seul passage groupé ; une
+        ligne est gardée si toutes ses valeurs sont dans les bornes de son cluster.
+        Contrairement à des appels successifs à remove_outliers_by_cluster, les
+        bornes sont calculées sur les données d'origine.
+
+        Renvoie (DataFrame filtré, bornes) ; les bornes (une ligne par cluster,
+        colonnes ('lower' | 'upper', colonne)) se réutilisent avec appliquer_bornes.
+        """
+        value_cols = list(value_cols)
+        quantiles = df.groupby(cluster_col)[value_cols].quantile([0.25, 0.75])
+        q1 = quantiles.xs(0.25, level=-1)
+        q3 = quantiles.xs(0.75, level=-1)
+        iqr = q3 - q1
+        bornes = pd.concat({"lower": q1 - factor * iqr, "upper": q3 + factor * iqr}, axis=1)
+
+        return Cleaning.appliquer_bornes(df, cluster_col, bornes), bornes
+
+    @staticmethod
+    def appliquer_bornes(df, cluster_col, bornes):
+        """
+        Garde les lignes dont les valeurs sont dans les bornes de leur cluster
+        (bornes renvoyées par remove_outliers_by_clusters, éventuellement
+        calculées sur d'autres données). Les clusters inconnus sont écartés.
+        """
+        value_cols = list(bornes["lower"].columns)
+        positions = bornes.index.get_indexer(df[cluster_col])
+        connu = positions >= 0
+        positions = np.where(connu, positions, 0)
+
+        valeurs = df[value_cols].to_numpy(dtype=np.float64)
+        lower = bornes["lower"].to_numpy(dtype=np.float64)[positions]
+        upper = bornes["upper"].to_numpy(dtype=np.float64)[positions]
+        masque = connu & ((valeurs >= lower) & (valeurs <= upper)).all(axis=1)
+        return df[masque].reset_index(drop=True)
+
+
+def hacher_valeurs(serie):
+    """
+    Hachage (uint64) de chaque valeur ; les nombres (et booléens) sont hachés en
+    float64 pour qu'un entier et un réel égaux aient la même empreinte.
+    """
+    if pd.api.types.is_numeric_dtype(serie.dtype) or pd.api.types.is_bool_dtype(serie.dtype):
+        serie = pd.Series(serie.to_numpy(dtype=np.float64, na_value=np.nan))
+    return pd.util.hash_pandas_object(serie, index=False).to_numpy()
+
+
+def _est_texte(serie):
+    return serie.dtype == object or pd.api.types.is_string_dtype(serie.dtype)
+
+
+def _reduire_numerique(serie, float32=True, rtol=None, decimales=6):
+    if pd.api.types.is_bool_dtype(serie):
+        return serie
+    if pd.api.types.is_integer_dtype(serie):
+        return pd.to_numeric(serie, downcast="integer")
+    if pd.api.types.is_float_dtype(serie) and float32:
+        valeurs = serie.to_numpy(dtype=np.float64)
+        reduit = valeurs.astype(np.float32)
+        finies = np.isfinite(valeurs)
+        if rtol is not None:
+            with np.errstate(invalid="ignore", divide="ignore"):
+                ecart = np.abs(reduit[finies].astype(np.float64) - valeurs[finies]) / np.abs(valeurs[finies])
+            garder = np.nanmax(np.where(valeurs[finies] == 0, 0, ecart), initial=0) <= rtol
+        else:
+            garder = _aller_retour_decimal(valeurs[finies], reduit[finies], decimales)
+        if garder:
+            return pd.Series(reduit, index=serie.index, name=serie.name)
+    return serie
+
+
+def _aller_retour_decimal(valeurs, reduit, decimales):
+    # Nombre de décimales de la colonne (ex. prix au dixième : 1), puis vérification
+    # que round(float32, d) redonne exactement chaque valeur d'origine
+    for d in range(decimales + 1):
+        if np.array_equal(np.round(valeurs, d), valeurs):
+            return np.array_equal(np.round(reduit.astype(np.float64), d), valeurs)
+    return False
@@ -0,0 +1,211 @@
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from cache import ecrire_colonnes, lire_colonnes, lire_schema
+
+
+# Cube d'agrégats pré-calculés pour les rapports
+# Une cellule = une combinaison des dimensions (Date x ItemCode x ... x QuantityCluster).
+# Pour chaque mesure et chaque cellule on garde somme, effectif, min et max,
+# plus un sketch de quantiles : histogramme à classes logarithmiques (erreur
+# relative alpha), qui s'additionne d'une cellule à l'autre.
+# Les rapports interrogent le cube (quelques milliers de cellules) au lieu
+# des lignes de ventes.
+
+DIMENSIONS = ["Date", "ItemCode", "ItemName", "CategoryCode", "QuantityCluster"]
+MESURES = ["QuantityKg", "UnitPrice", "WholesalePrice", "LossRate", "Margin", "NetMargin",
+           "Margin_Loss_Ratio_pct", "RelativeLossRate"]
+STATS = ("sum", "count", "min", "max")
+
+
+class CubeAgregats:
+    """
+    dossier : dossier de sauvegarde (le cube existant y est relu) ; None = en mémoire
+    dimensions / mesures : colonnes de regroupement et colonnes agrégées
+    alpha : précision relative des quantiles
+    """
+
+    def __init__(self, dossier=None, dimensions=None, mesures=None, alpha=0.01):
+        self.dossier = Path(dossier) if dossier is not None else None
+        self.dimensions = list(dimensions or DIMENSIONS)
+        self.mesures = list(mesures or MESURES)
+        self.alpha = alpha
+        self.gamma = (1 + alpha) / (1 - alpha)
+        self.cellules = None
+        self.sketch = None
+        if self.dossier is not None and lire_schema(self.dossier / "cellules") is not None:
+            self.cellules = lire_colonnes(self.dossier / "cellules", mmap=False)
+            self.sketch = lire_colonnes(self.dossier / "sketch", mmap=False)
+            meta = lire_schema(self.dossier / "cellules")["meta"]
+            self.dimensions, self.mesures, self.alpha = meta["dimensions"], meta["mesures"], meta["alpha"]
+            self.gamma = (1 + self.alpha) / (1 - self.alpha)
+
+    # Construction
+
+    def _preparer(self, ventes):
+        dims = {}
+        for dim in self.dimensions:
+            serie = ventes[dim]
+            if dim == "Date":
+                serie = pd.to_datetime(serie).dt.normalize()
+            dims[dim] = serie.to_numpy()
+        return pd.DataFrame(dims)
+
+    def _agreger(self, ventes):
+        cles = self._preparer(ventes)
+        mesures = [m for m in self.mesures if m in ventes]
+        valeurs = pd.DataFrame({m: ventes[m].to_numpy(dtype=np.float64) for m in mesures})
+        donnees = pd.concat([cles, valeurs], axis=1)
+
+        groupes = donnees.groupby(self.dimensions, sort=False, dropna=False)[mesures]
+        cellules = groupes.agg(list(STATS))
+        cellules.columns = [f"{m}__{stat}" for m, stat in cellules.columns]
+        cellules = cellules.reset_index()
+
+        # Sketch : une ligne par (cellule, mesure, classe logarithmique)
+        longues = donnees.melt(id_vars=self.dimensions, value_vars=mesures,
+                               var_name="mesure", value_name="valeur").dropna(subset=["valeur"])
+        v = longues["valeur"].to_numpy()
+        longues["signe"] = np.sign(v).astype(np.int8)
+        with np.errstate(divide="ignore"):
+            classe = np.ceil(np.log(np.abs(v)) / np.log(self.gamma))
+        longues["classe"] = np.where(v == 0, 0, classe).astype(np.int32)
+        sketch = (longues.groupby(self.dimensions + ["mesure", "signe", "classe"], sort=False, dropna=False)
+                  .size().rename("n").reset_index())
+        return cellules, sketch
+
+    def _fusionner(self, a, b, cles, sommes, minimums=(), maximums=()):
+        fusion = pd.concat([a, b], ignore_index=True)
+        regles = {c: "sum" for c in sommes}
+        regles.update({c: "min" for c in minimums})
+        regles.update({c: "max" for c in maximums})
+        return fusion.groupby(cles, sort=False, dropna=False).agg(regles).reset_index()
+
+    def ajouter(self, ventes):
+        """
+        Ajoute des ventes (ex: les nouveaux jours) au cube.
+        Seules les cellules des dates présentes dans ventes sont recombinées.
+        """
+        cellules, sketch = self._agreger(ventes)
+        if self.cellules is None or self.cellules.empty:
+            self.cellules, self.sketch = cellules, sketch
+        else:
+            dates = pd.Index(cellules["Date"].unique()) if "Date" in self.dimensions else None
+            touche_c = self.cellules["Date"].isin(dates) if dates is not None else pd.Series(True, index=self.cellules.index)
+            touche_s = self.sketch["Date"].isin(dates) if dates is not None else pd.Series(True, index=self.sketch.index)
+
+            colonnes = [c for c in cellules.columns if c not in self.dimensions]
+            nouvelles = self._fusionner(
+                self.cellules[touche_c], cellules, self.dimensions,
+                sommes=[c for c in colonnes if c.endswith(("__sum", "__count"))],
+                minimums=[c for c in colonnes if c.endswith("__min")],
+                maximums=[c for c in colonnes if c.endswith("__max")],
+            )
+            cles_sketch = self.dimensions + ["mesure", "signe", "classe"]
+            nouveau_sketch = self._fusionner(self.sketch[touche_s], sketch, cles_sketch, sommes=["n"])
+            self.cellules = pd.concat([self.cellules[~touche_c], nouvelles], ignore_index=True)
+            self.sketch = pd.concat([self.sketch[~touche_s], nouveau_sketch], ignore_index=True)
+
+        if self.dossier is not None:
+            self.sauvegarder()
+        return self
+
+    def sauvegarder(self, dossier=None):
+        dossier = Path(dossier) if dossier is not None else self.dossier
+        meta = {"dimensions": self.dimensions, "mesures": self.mesures, "alpha": self.alpha}
+        ecrire_colonnes(dossier / "cellules", self.cellules, meta=meta)
+        ecrire_colonnes(dossier / "sketch", self.sketch, meta=meta)
+
+    # Requêtes
+
+    def _filtrer(self, table, filtre):
+        if not filtre:
+            return table
+        masque = np.ones(len(table), dtype=bool)
+        for dim, valeurs in filtre.items():
+            valeurs = valeurs if isinstance(valeurs, (list, tuple, set)) else [valeurs]
+            masque &= table[dim].isin(list(valeurs)).to_numpy()
+        return table[masque]
+
+    def requete(self, par, mesure, stats=("mean",), filtre=None):
+        """
+        Agrège le cube selon les dimensions par.
+
+        stats : 'sum', 'count', 'mean', 'min', 'max' ou 'qXX' (quantile, ex: 'q25', 'q50')
+        filtre : {dimension: valeur ou liste de valeurs}
+        Renvoie un DataFrame indexé par par, une colonne par statistique.
+        """
+        par = [par] if isinstance(par, str) else list(par)
+        stats = [stats] if isinstance(stats, str) else list(stats)
+        cellules = self._filtrer(self.cellules, filtre)
+        groupes = cellules.groupby(par, dropna=False)
+        resultat = pd.DataFrame({
+            "sum": groupes[f"{mesure}__sum"].sum(),
+            "count": groupes[f"{mesure}__count"].sum(),
+            "min": groupes[f"{mesure}__min"].min(),
+            "max": groupes[f"{mesure}__max"].max(),
+        })
+        resultat["mean"] = resultat["sum"] / resultat["count"].where(resultat["count"] > 0)
+
+        quantiles = [s for s in stats if s.startswith("q")]
+        if quantiles:
+            sketch = self._filtrer(self.sketch, filtre)
+            sketch = sketch[sketch["mesure"] == mesure]
+            for s in quantiles:
+                resultat[s] = self._quantile(sketch, par, float(s[1:]) / 100).reindex(resultat.index)
+                # Les quantiles restent dans [min, max]
+                resultat[s] = resultat[s].clip(resultat["min"], resultat["max"])
+        return resultat[stats]
+
+    def _representant(self, classes):
+        # Valeur représentative de chaque classe (milieu relatif, à alpha près des valeurs de la classe)
+        gamma = self.gamma
+        return classes["signe"] * 2 * gamma ** classes["classe"].astype(np.float64) / (gamma + 1)
+
+    def _quantile(self, sketch, par, q):
+        classes = sketch.groupby(par + ["signe", "classe"], dropna=False)["n"].sum().reset_index()
+        classes["valeur"] = self._representant(classes)
+        classes = classes.sort_values(par + ["valeur"])
+        cumul = classes.groupby(par, dropna=False)["n"].cumsum()
+        total = classes.groupby(par, dropna=False)["n"].transform("sum")
+        atteint = classes[cumul >= q * (total - 1) + 1]
+        return atteint.groupby(par, dropna=False)["valeur"].first()
+
+    def boxplot_stats(self, par, mesure, filtre=None):
+        """
+        Statistiques de boîte à moustaches (format matplotlib Axes.bxp) par groupe.
+
+        Comme matplotlib, les moustaches s'arrêtent à la valeur la plus extrême
+        comprise dans [Q1 - 1.5 IQR, Q3 + 1.5 IQR] : min/max des cellules
+        (valeurs observées) et classes du sketch (à alpha près) dans ces bornes.
+        """
+        par = [par] if isinstance(par, str) else list(par)
+        table = self.requete(par, mesure, ["q25", "q50", "q75"], filtre=filtre)
+        iqr = table["q75"] - table["q25"]
+        bornes = pd.DataFrame({"bas": table["q25"] - 1.5 * iqr, "haut": table["q75"] + 1.5 * iqr})
+
+        cellules = self._filtrer(self.cellules, filtre)
+        sketch = self._filtrer(self.sketch, filtre)
+        sketch = sketch[sketch["mesure"] == mesure]
+        candidats = pd.concat(
+            [cellules[par].assign(valeur=cellules[f"{mesure}__{stat}"]) for stat in ("min", "max")]
+            + [sketch[par].assign(valeur=self._representant(sketch))],
+            ignore_index=True,
+        ).join(bornes, on=par)
+        dedans = candidats[(candidats["valeur"] >= candidats["bas"]) & (candidats["valeur"] <= candidats["haut"])]
+        extremes = dedans.groupby(par, dropna=False)["valeur"].agg(["min", "max"]).reindex(table.index)
+
+        stats = []
+        for groupe, ligne in table.iterrows():
+            bas, haut = extremes.loc[groupe, "min"], extremes.loc[groupe, "max"]
+            stats.append({
+                "label": groupe,
+                "q1": ligne["q25"], "med": ligne["q50"], "q3": ligne["q75"],
+                # La moustache ne rentre jamais dans la boîte
+                "whislo": ligne["q25"] if not bas <= ligne["q25"] else bas,
+                "whishi": ligne["q75"] if not haut >= ligne["q75"] else haut,
+                "fliers": [],
+            })
+        return stats
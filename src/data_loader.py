@@ -1,52 +1,79 @@
+import numpy as np
 import pandas as pd
-import requests
-import sqlite3
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from functools import reduce
 
+from api_source import SourceAPI
+from cache import CacheColonnes
+from instrumentation import annoter, instrumenter_classe, obtenir_journal
+from profiling import Profil
+from sql_source import SourceSQL
+
+journal = obtenir_journal(__name__)
+
+@instrumenter_classe
 class LoadData: 
     """
     Classe pour charger des données depuis différentes sources.
     """
     
-    def __init__(self, source, source_type="csv", validate=False, size=None):
+    def __init__(self, source, source_type="csv", validate=False, size=None,
+                 cache_dir=None, columns=None, dtypes=None, table="table_name", chunksize=None,
+                 api_options=None, ignorer_erreurs=False):
         self.source = source
         self.source_type = source_type
         self.validate = validate
         self.size = size  # Définir size avant load_data
-        self.data = self.load_data()  # Charge automatiquement les données
+        self.cache_dir = cache_dir  # Dossier du cache colonnaire (None = pas de cache)
+        self.columns = columns  # Colonnes à charger (None = toutes)
+        self.dtypes = dtypes  # Types imposés dans le cache, ex: {'Date': 'datetime', 'Prix': 'float32'}
+        self.table = table  # Table lue pour les sources SQL
+        self.chunksize = chunksize
+        self.api_options = api_options  # Arguments de SourceAPI (pagination, cache, tentatives...)
+        self.ignorer_erreurs = ignorer_erreurs  # True = data vaut None en cas d'échec (ancien comportement)
+        # En mode streaming (chunksize défini) rien n'est chargé : on lit avec iter_chunks()
+        self.data = self.load_data() if chunksize is None else None
             
     def load_data(self):
         """
         Charge les données depuis différentes sources (CSV, Excel, API, SQL)
         en utilisant les attributs self.source et self.source_type.
         
+        Si cache_dir est défini, les fichiers CSV/Excel sont lus depuis leur
+        copie colonnaire (reconstruite automatiquement quand la source change).
+
+        Une erreur de chargement est journalisée puis relancée ; avec
+        ignorer_erreurs=True elle est seulement journalisée et None est renvoyé.
         """
         try:
-            if self.source_type == "csv":
+            if self.source_type in ("csv", "excel") and self.cache_dir is not None:
                 if not Path(self.source).is_file():
                     raise FileNotFoundError(f"Le fichier {self.source} n'existe pas.")
-                df = pd.read_csv(self.source)
-                print(f"Données CSV chargées depuis {self.source}")
+                cache = CacheColonnes(self.cache_dir)
+                df = cache.charger(self.source, self._lire_fichier, columns=self.columns,
+                                   dtypes=self.dtypes, nrows=self.size)
+                journal.info("Données chargées depuis le cache colonnaire de %s", self.source)
+
+            elif self.source_type == "csv":
+                if not Path(self.source).is_file():
+                    raise FileNotFoundError(f"Le fichier {self.source} n'existe pas.")
+                df = pd.read_csv(self.source, usecols=self.columns, nrows=self.size)
+                journal.info("Données CSV chargées depuis %s", self.source)
 
             elif self.source_type == "excel":
                 if not Path(self.source).is_file():
                     raise FileNotFoundError(f"Le fichier {self.source} n'existe pas.")
-                df = pd.read_excel(self.source)
-                print(f"Données Excel chargées depuis {self.source}")
+                df = pd.read_excel(self.source, usecols=self.columns, nrows=self.size)
+                journal.info("Données Excel chargées depuis %s", self.source)
 
             elif self.source_type == "api":
-                response = requests.get(self.source)
-                response.raise_for_status()
-                df = pd.DataFrame(response.json())
-                print(f"Données chargées depuis l'API {self.source}")
+                df = self._source_api().charger()
+                journal.info("Données chargées depuis l'API %s", self.source)
 
             elif self.source_type == "sql":
-                conn = sqlite3.connect(self.source)
-                query = "SELECT * FROM table_name"  # Remplace par ta table
-                df = pd.read_sql_query(query, conn)
-                conn.close()
-                print(f"Données SQL chargées depuis {self.source}")
+                df = SourceSQL(self.source, self.table, self.columns).charger(limit=self.size)
+                journal.info("Données SQL chargées depuis %s", self.source)
 
             else:
                 raise ValueError(f"Type de source non supporté : {self.source_type}")
@@ -57,26 +84,133 @@ class LoadData:
             
             return df
         except Exception as e:
-            print(f"Erreur lors du chargement des données : {e}")
+            journal.exception("Erreur lors du chargement des données : %s", e,
+                              extra={"source": str(self.source), "source_type": self.source_type})
+            annoter(erreur=f"{type(e).__name__}: {e}")
+            if self.ignorer_erreurs:
+                return None
+            raise
+
+    def iter_chunks(self, chunksize=None, date_col=None, start=None, end=None):
+        """
+        Lit la source par morceaux de taille bornée (générateur de DataFrames).
+
+        La sélection de colonnes (self.columns), la limite de lignes (self.size)
+        et le filtre de dates [start, end] sur date_col sont appliqués pendant
+        la lecture : la mémoire utilisée dépend de chunksize, pas de la taille
+        du fichier.
+        """
+        chunksize = chunksize or self.chunksize or 100_000
+        restant = self.size
+        lecteurs = {
+            "csv": self._chunks_csv,
+            "excel": self._chunks_excel,
+            "sql": self._chunks_sql,
+            "api": self._chunks_api,
+        }
+        if self.source_type not in lecteurs:
+            raise ValueError(f"Type de source non supporté : {self.source_type}")
+        if self.source_type in ("csv", "excel") and not Path(self.source).is_file():
+            raise FileNotFoundError(f"Le fichier {self.source} n'existe pas.")
+
+        for chunk in lecteurs[self.source_type](chunksize, date_col, start, end):
+            if self.source_type != "sql":
+                chunk = _filtrer_dates(chunk, date_col, start, end)
+                if self.columns is not None:
+                    chunk = chunk[self.columns]
+            if restant is not None:
+                chunk = chunk.head(restant)
+                restant -= len(chunk)
+            if len(chunk):
+                yield chunk
+            if restant is not None and restant <= 0:
+                return
+
+    def _colonnes_lues(self, date_col):
+        # La colonne de date doit être lue pour filtrer, même si elle n'est pas demandée
+        if self.columns is None:
             return None
+        colonnes = list(self.columns)
+        if date_col is not None and date_col not in colonnes:
+            colonnes.append(date_col)
+        return colonnes
+
+    def _chunks_csv(self, chunksize, date_col, start, end):
+        # Sans filtre de date, la limite de lignes est passée directement au parseur
+        nrows = self.size if date_col is None else None
+        yield from pd.read_csv(self.source, usecols=self._colonnes_lues(date_col),
+                               chunksize=chunksize, nrows=nrows)
+
+    def _chunks_excel(self, chunksize, date_col, start, end):
+        if Path(self.source).suffix.lower() not in (".xlsx", ".xlsm"):
+            # Les anciens formats (.xls) ne se lisent pas en streaming
+            df = pd.read_excel(self.source, usecols=self._colonnes_lues(date_col))
+            for debut in range(0, len(df), chunksize):
+                yield df.iloc[debut:debut + chunksize]
+            return
+
+        from openpyxl import load_workbook
+
+        classeur = load_workbook(self.source, read_only=True, data_only=True)
+        try:
+            lignes = classeur.active.iter_rows(values_only=True)
+            entetes = [str(c).strip() if c is not None else c for c in next(lignes, [])]
+            voulues = self._colonnes_lues(date_col)
+            indices = [i for i, c in enumerate(entetes) if voulues is None or c in voulues]
+            noms = [entetes[i] for i in indices]
+            bloc = []
+            for ligne in lignes:
+                bloc.append([ligne[i] for i in indices])
+                if len(bloc) == chunksize:
+                    yield pd.DataFrame(bloc, columns=noms)
+                    bloc = []
+            if bloc:
+                yield pd.DataFrame(bloc, columns=noms)
+        finally:
+            classeur.close()
+
+    def _chunks_sql(self, chunksize, date_col, start, end):
+        # Colonnes, dates et limite sont poussées dans la requête SQL
+        source = SourceSQL(self.source, self.table, self.columns, date_col=date_col)
+        yield from source.iter_chunks(start, end, limit=self.size, chunksize=chunksize)
+
+    def _chunks_api(self, chunksize, date_col, start, end):
+        for page in self._source_api().iter_pages():
+            for debut in range(0, len(page), chunksize):
+                yield page.iloc[debut:debut + chunksize]
+
+    def _source_api(self):
+        options = dict(self.api_options or {})
+        if self.cache_dir is not None:
+            options.setdefault("cache_dir", Path(self.cache_dir) / "api")
+        return SourceAPI(self.source, **options)
+
+    def _lire_fichier(self):
+        """
+        Parse le fichier source complet (toutes les colonnes) pour construire le cache.
+        """
+        if self.source_type == "excel":
+            return pd.read_excel(self.source)
+        return pd.read_csv(self.source)
 
     def afficher_info(self):
         """
-        Affiche les informations de base du DataFrame.
+        Affiche les informations de base du DataFrame (voir profil()).
         """
         if self.data is not None:
-            print("Informations sur le DataFrame :")
-            print(self.data.info())
-            print("\n")
-            print("Premières lignes :")
-            print(self.data.head().to_string(index=False))
-            print("\n")
-            print("nombre de valeurs uniques par colonne")
-            print(self.data.nunique().to_string())
-         
+            print(self.profil())
         else:
             print("Aucune donnée à afficher.")
 
+    def profil(self):
+        """
+        Renvoie le profil du DataFrame chargé, ou de la source lue par morceaux
+        en mode streaming (chunksize défini).
+        """
+        if self.data is not None:
+            return Profil.construire(self.data)
+        return Profil.construire(self.iter_chunks())
+
     def fusionner(self, other_df, on, how='inner'):
         """
         Fusionne le DataFrame actuel avec un autre DataFrame.
@@ -84,8 +218,120 @@ class LoadData:
         """
         if  other_df is not None:
             merged_df =  reduce(lambda left, right: left.merge(right, on=on, how=how), other_df)
-            print(f"Fusion des DataFrames sur {on} avec une jointure {how}.")
+            journal.info("Fusion des DataFrames sur %s avec une jointure %s.", on, how)
             return merged_df
         else:
-            print("Erreur : Un ou plusieurs DataFrames sont vides.")
-            return None
\ No newline at end of file
+            journal.warning("Un ou plusieurs DataFrames sont vides.")
+            return None
+
+    @staticmethod
+    def charger_sources(sources, max_workers=4):
+        """
+        Charge plusieurs sources en parallèle (pool de threads).
+
+        sources : liste de dictionnaires d'arguments de LoadData,
+                  ex: [{"source": "annex1.csv", "source_type": "csv"}, ...]
+        Renvoie la liste des DataFrames dans l'ordre des sources.
+        """
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            chargements = list(pool.map(lambda params: LoadData(**params), sources))
+        return [chargement.data for chargement in chargements]
+
+    def fusionner_planifie(self, other_df, on, how='inner', suffixes=('_x', '_y')):
+        """
+        Fusionne une liste de DataFrames en planifiant les jointures.
+
+        La plus grande table sert de table de faits. Les tables dont la clé est
+        unique (dimensions : articles, taux de perte...) sont jointes par
+        recherche dans un index sur la clé, sans recopier la table de faits à
+        chaque étape ; les autres sont fusionnées ensuite, de la plus petite à
+        la plus grande. Les colonnes sont assemblées dans l'ordre de la liste,
+        avec les mêmes suffixes que fusionner en cas de conflit de noms.
+        """
+        if not other_df or any(df is None for df in other_df):
+            journal.warning("Un ou plusieurs DataFrames sont vides.")
+            return None
+
+        dfs = list(other_df)
+        ordre = sorted(range(len(dfs)), key=lambda i: len(dfs[i]))
+        i_faits = ordre[-1]
+        if how not in ('inner', 'left') or (how == 'left' and i_faits != 0):
+            # Jointure non planifiable sans changer le sens de la jointure
+            return self.fusionner(other_df, on, how)
+
+        cles = [on] if isinstance(on, str) else list(on)
+        faits = dfs[i_faits]
+        index_faits = _index_cles(faits, cles)
+
+        dimensions, autres = [], []
+        for i in ordre[:-1]:
+            if dfs[i].duplicated(subset=cles).any():
+                autres.append(dfs[i])
+            else:
+                positions = _index_cles(dfs[i], cles).get_indexer(index_faits)
+                dimensions.append((i, dfs[i], positions))
+
+        # Un seul filtre des lignes de la table de faits pour toutes les dimensions
+        if how == 'inner' and dimensions:
+            garder = np.logical_and.reduce([positions >= 0 for _, _, positions in dimensions])
+        else:
+            garder = np.ones(len(faits), dtype=bool)
+        lignes = np.flatnonzero(garder)
+
+        resultat = {}
+        for _, dim, positions in sorted(dimensions + [(i_faits, faits, None)], key=lambda bloc: bloc[0]):
+            if positions is None:
+                for col in faits.columns:
+                    resultat[_nom_libre(resultat, col, suffixes)] = faits[col].iloc[lignes].reset_index(drop=True)
+                continue
+            pos = positions[lignes]
+            manquant = pos < 0
+            for col in dim.columns:
+                if col in cles:
+                    continue
+                valeurs = dim[col].iloc[np.maximum(pos, 0)].reset_index(drop=True)
+                if manquant.any():
+                    valeurs = valeurs.where(~manquant)
+                resultat[_nom_libre(resultat, col, suffixes)] = valeurs
+        merged_df = pd.DataFrame(resultat)
+
+        for df in autres:
+            merged_df = merged_df.merge(df, on=on, how=how, suffixes=suffixes)
+
+        journal.info("Fusion planifiée sur %s : %d recherche(s) par index, %d fusion(s) classique(s).",
+                     on, len(dimensions), len(autres))
+        return merged_df
+
+
+def _index_cles(df, cles):
+    if len(cles) == 1:
+        return pd.Index(df[cles[0]])
+    return pd.MultiIndex.from_frame(df[cles])
+
+
+def _nom_libre(colonnes, col, suffixes):
+    """
+    Renomme les colonnes en conflit comme pandas.merge (suffixes _x / _y).
+    """
+    if col not in colonnes:
+        return col
+    colonnes[col + suffixes[0]] = colonnes.pop(col)
+    nom, n = col + suffixes[1], 1
+    while nom in colonnes:
+        nom, n = f"{col}{suffixes[1]}_{n}", n + 1
+    return nom
+
+
+def _filtrer_dates(df, date_col, start=None, end=None):
+    """
+    Garde les lignes dont date_col est dans l'intervalle [start, end].
+    """
+    if date_col is None or (start is None and end is None):
+        return df
+    dates = pd.to_datetime(df[date_col], errors="coerce")
+    masque = pd.Series(True, index=df.index)
+    if start is not None:
+        masque &= dates >= pd.Timestamp(start)
+    if end is not None:
+        masque &= dates <= pd.Timestamp(end)
+    return df[masque]
@@ -0,0 +1,133 @@
+import numpy as np
+import pandas as pd
+from sklearn.preprocessing import StandardScaler
+
+
+# DBSCAN exact pour une seule colonne
+# En 1-D, le voisinage [x - eps, x + eps] d'un point se lit directement dans le
+# tableau trié (deux recherches binaires) : plus besoin d'arbre de voisinage,
+# le coût est celui du tri, O(n log n), avec une mémoire O(n).
+# Les labels sont les mêmes que ceux de sklearn.cluster.DBSCAN :
+# - un point est "coeur" s'il a au moins min_samples voisins (lui compris)
+# - deux coeurs consécutifs à moins de eps appartiennent au même cluster
+# - un point non coeur à moins de eps d'un coeur prend le cluster de ce coeur
+#   (le premier numéroté s'il touche deux clusters), sinon c'est du bruit (-1)
+# - les clusters sont numérotés dans l'ordre de leur premier coeur dans les données
+
+
+def dbscan_1d(valeurs, eps=0.5, min_samples=5, groupes=None, standardiser=True):
+    """
+    Labels DBSCAN d'une colonne (tableau d'entiers, -1 = bruit).
+
+    groupes : clés de groupe (ex: ItemCode) ; DBSCAN est alors appliqué
+              séparément dans chaque groupe, en un seul tri. Les numéros de
+              cluster sont propres à chaque groupe.
+    standardiser : centre-réduit les valeurs (par groupe) comme StandardScaler.
+    Les valeurs manquantes sont classées comme bruit.
+    """
+    x = np.asarray(valeurs, dtype=np.float64).ravel()
+    n = len(x)
+    labels = np.full(n, -1, dtype=np.int64)
+    if groupes is None:
+        g = np.zeros(n, dtype=np.int64)
+    else:
+        g = pd.factorize(np.asarray(groupes), use_na_sentinel=False)[0].astype(np.int64)
+
+    if standardiser:
+        x = _standardiser(x, g if groupes is not None else None)
+
+    valides = np.flatnonzero(~np.isnan(x))
+    if len(valides) == 0:
+        return labels
+
+    # Tri par (groupe, valeur) ; les groupes sont séparés par un décalage
+    # supérieur à l'étendue des valeurs pour ne jamais être voisins
+    ordre = valides[np.lexsort((x[valides], g[valides]))]
+    xs, gs = x[ordre], g[ordre]
+    if groupes is not None:
+        decalage = (xs.max() - xs.min()) + 2 * eps + 1
+        cle = xs + gs * decalage
+    else:
+        cle = xs
+
+    gauche = np.searchsorted(cle, cle - eps, side="left")
+    droite = np.searchsorted(cle, cle + eps, side="right")
+    gauche, droite = _ajuster_voisinages(xs, gs, gauche, droite, eps)
+    coeur = (droite - gauche) >= min_samples
+    if not coeur.any():
+        return labels
+
+    # Composantes : suites de coeurs (dans l'ordre trié) espacés d'au plus eps
+    pos_coeurs = np.flatnonzero(coeur)
+    nouveau = np.r_[True, (np.diff(xs[pos_coeurs]) > eps) | (np.diff(gs[pos_coeurs]) != 0)]
+    composante = np.cumsum(nouveau) - 1
+
+    # Numérotation de sklearn : ordre du premier coeur (indice d'origine) de chaque composante
+    premier = np.full(composante[-1] + 1, n, dtype=np.int64)
+    np.minimum.at(premier, composante, ordre[pos_coeurs])
+    if groupes is None:
+        rang = np.argsort(np.argsort(premier, kind="stable"), kind="stable")
+    else:
+        groupe_comp = gs[pos_coeurs][nouveau]
+        rang = pd.Series(premier).groupby(groupe_comp).rank(method="first").to_numpy().astype(np.int64) - 1
+    label_coeur = rang[composante]
+
+    trie = np.full(len(xs), -1, dtype=np.int64)
+    trie[pos_coeurs] = label_coeur
+
+    # Points de bordure : coeur le plus proche à gauche et à droite
+    idx = np.arange(len(xs))
+    prec = np.maximum.accumulate(np.where(coeur, idx, -1))
+    suiv = np.minimum.accumulate(np.where(coeur, idx, len(xs))[::-1])[::-1]
+    bord = np.flatnonzero(~coeur)
+    p, s = prec[bord], suiv[bord]
+
+    ok_p = (p >= 0)
+    p_sur = np.where(ok_p, p, 0)
+    ok_p &= (gs[p_sur] == gs[bord]) & (xs[bord] - xs[p_sur] <= eps)
+    ok_s = (s < len(xs))
+    s_sur = np.where(ok_s, s, 0)
+    ok_s &= (gs[s_sur] == gs[bord]) & (xs[s_sur] - xs[bord] <= eps)
+
+    lab_p = np.where(ok_p, trie[p_sur], np.iinfo(np.int64).max)
+    lab_s = np.where(ok_s, trie[s_sur], np.iinfo(np.int64).max)
+    lab_bord = np.minimum(lab_p, lab_s)
+    trie[bord] = np.where(ok_p | ok_s, lab_bord, -1)
+
+    labels[ordre] = trie
+    return labels
+
+
+def _ajuster_voisinages(xs, gs, gauche, droite, eps):
+    # cle - eps n'est pas arrondi comme |x_i - x_j| (le test de sklearn) : les bornes
+    # trouvées par searchsorted peuvent être décalées d'un point à exactement eps
+    n = len(xs)
+    idx = np.arange(n)
+
+    def voisin(j):
+        j = np.clip(j, 0, n - 1)
+        return (gs[j] == gs) & (np.abs(xs - xs[j]) <= eps)
+
+    while True:
+        retirer_g = (gauche < idx) & ~voisin(gauche)
+        ajouter_g = (gauche > 0) & voisin(gauche - 1)
+        retirer_d = (droite - 1 > idx) & ~voisin(droite - 1)
+        ajouter_d = (droite < n) & voisin(droite)
+        if not (retirer_g.any() or ajouter_g.any() or retirer_d.any() or ajouter_d.any()):
+            return gauche, droite
+        gauche = gauche + retirer_g - ajouter_g
+        droite = droite - retirer_d + ajouter_d
+
+
+def _standardiser(x, groupes=None):
+    if groupes is None:
+        masque = ~np.isnan(x)
+        resultat = np.full(len(x), np.nan)
+        if masque.any():
+            resultat[masque] = StandardScaler().fit_transform(x[masque].reshape(-1, 1)).ravel()
+        return resultat
+    serie = pd.Series(x)
+    par_groupe = serie.groupby(groupes)
+    moyenne = par_groupe.transform("mean")
+    ecart = par_groupe.transform("std", ddof=0).replace(0, 1)
+    return ((serie - moyenne) / ecart).to_numpy()
@@ -0,0 +1,108 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from sklearn.ensemble import IsolationForest
+
+from densite import dbscan_1d
+
+
+# Détection d'anomalies par lot
+# Chaque méthode est une fonction pure : tableau 1-D -> masque booléen des outliers.
+# Aucune copie du DataFrame et aucune colonne ajoutée à ventes, ce qui permet
+# de lancer toutes les combinaisons (colonne, méthode) en parallèle.
+
+
+def masque_iqr(valeurs, factor=1.5):
+    q1, q3 = np.nanquantile(valeurs, [0.25, 0.75])
+    iqr = q3 - q1
+    return (valeurs < q1 - factor * iqr) | (valeurs > q3 + factor * iqr)
+
+
+def masque_z_score(valeurs, seuil=3):
+    # Écart-type corrigé (ddof=1), comme pandas
+    z_scores = (valeurs - np.nanmean(valeurs)) / np.nanstd(valeurs, ddof=1)
+    return np.abs(z_scores) > seuil
+
+
+def masque_isolation_forest(valeurs, contamination=0.05, random_state=None):
+    model = IsolationForest(contamination=contamination, random_state=random_state)
+    return model.fit_predict(valeurs.reshape(-1, 1)) == -1
+
+
+def masque_dbscan(valeurs, eps=0.5, min_samples=5):
+    return dbscan_1d(valeurs, eps=eps, min_samples=min_samples) == -1
+
+
+METHODES = {
+    "iqr": masque_iqr,
+    "z_score": masque_z_score,
+    "isolation_forest": masque_isolation_forest,
+    "dbscan": masque_dbscan,
+}
+
+
+class MasqueAnomalies:
+    """
+    Résultat d'une détection par lot : une matrice booléenne
+    lignes x (colonne, méthode), éventuellement compactée en bits (8 lignes par octet).
+    """
+
+    def __init__(self, matrice, paires, index, compacte=False):
+        self.paires = paires
+        self.index = index
+        self.n_lignes = len(index)
+        self.compacte = compacte
+        self.matrice = np.packbits(matrice, axis=0) if compacte else matrice
+
+    def masques(self):
+        """
+        Matrice booléenne (décompactée si besoin).
+        """
+        if self.compacte:
+            return np.unpackbits(self.matrice, axis=0, count=self.n_lignes).astype(bool)
+        return self.matrice
+
+    def masque(self, colonne, methode):
+        return self.masques()[:, self.paires.index((colonne, methode))]
+
+    def nombre(self):
+        """
+        Nombre d'outliers par (colonne, méthode).
+        """
+        return dict(zip(self.paires, self.masques().sum(axis=0).tolist()))
+
+    def to_frame(self):
+        import pandas as pd
+
+        return pd.DataFrame(self.masques(), index=self.index,
+                            columns=pd.MultiIndex.from_tuples(self.paires, names=["colonne", "methode"]))
+
+
+def detecter_anomalies(ventes, colonnes, methodes=("iqr", "z_score"), n_jobs=None,
+                       compacte=False, options=None):
+    """
+    Applique chaque méthode à chaque colonne en parallèle (pool de threads :
+    numpy et scikit-learn libèrent le GIL pendant les calculs).
+
+    options : paramètres par méthode, ex: {"dbscan": {"eps": 0.3}}
+    Renvoie un MasqueAnomalies ; ventes n'est pas modifié.
+    """
+    options = options or {}
+    inconnues = [m for m in methodes if m not in METHODES]
+    if inconnues:
+        raise ValueError(f"Méthodes inconnues : {inconnues}")
+
+    # Une seule extraction numpy par colonne, partagée par les méthodes
+    valeurs = {col: ventes[col].to_numpy(dtype=np.float64) for col in colonnes}
+    paires = [(col, methode) for col in colonnes for methode in methodes]
+    matrice = np.zeros((len(ventes), len(paires)), dtype=bool)
+
+    def executer(j):
+        col, methode = paires[j]
+        matrice[:, j] = METHODES[methode](valeurs[col], **options.get(methode, {}))
+
+    with ThreadPoolExecutor(max_workers=n_jobs or os.cpu_count()) as pool:
+        list(pool.map(executer, range(len(paires))))
+
+    return MasqueAnomalies(matrice, paires, ventes.index, compacte=compacte)
@@ -2,9 +2,12 @@ from matplotlib import pyplot as plt
 import seaborn as sns
 import sys
 from sklearn.ensemble import IsolationForest   
-from sklearn.cluster import DBSCAN
-from sklearn.preprocessing import StandardScaler
+
+from densite import dbscan_1d
+from detection import detecter_anomalies
+from instrumentation import instrumenter_classe
              
+@instrumenter_classe
 class Exploratory: 
     def __init__(self, ventes):
         self.ventes = ventes
@@ -17,7 +20,11 @@ class Exploratory:
     # L'IQR est calculé comme la différence entre le troisième quartile (Q3) et le premier quartile (Q1)
     # Les valeurs en dehors de l'intervalle [Q1 - 1.5 * IQR, Q3 + 1.5 * IQR] sont considérées comme des outliers
     # Cette méthode est efficace pour les données qui ne suivent pas une distribution normale   
-    def iqr(self, col):
+    # bornes : estimateur déjà ajusté (voir bornes.py) pour éviter de recalculer les quantiles
+    def iqr(self, col, bornes=None):
+        if bornes is not None:
+            return self.ventes[bornes.detecter(self.ventes[col])]
+
         q1 = self.ventes[col].quantile(0.25)
         q3 = self.ventes[col].quantile(0.75)
         iqr = q3 - q1
@@ -32,12 +39,15 @@ class Exploratory:
     # Elle est utilisée pour réduire l'influence des valeurs extrêmes sur les statistiques descriptives
     # l'intervalle interquartile (IQR) multiplié par un facteur (généralement 1.5)
     # Cela permet de réduire l'influence des valeurs extrêmes sur les statistiques descriptives
-    def winsorize_column(self, column):
-        Q1 = self.ventes[column].quantile(0.25)
-        Q3 = self.ventes[column].quantile(0.75)
-        IQR = Q3 - Q1
-        lower_bound = Q1 - 1.5 * IQR
-        upper_bound = Q3 + 1.5 * IQR
+    def winsorize_column(self, column, bornes=None):
+        if bornes is not None:
+            lower_bound, upper_bound = bornes.bornes
+        else:
+            Q1 = self.ventes[column].quantile(0.25)
+            Q3 = self.ventes[column].quantile(0.75)
+            IQR = Q3 - Q1
+            lower_bound = Q1 - 1.5 * IQR
+            upper_bound = Q3 + 1.5 * IQR
         
         self.ventes[column] = self.ventes[column].clip(lower=lower_bound, upper=upper_bound)
         return self.ventes
@@ -50,7 +60,11 @@ class Exploratory:
     # Cette méthode est efficace pour les données qui suivent une distribution normale
     # Cependant, elle peut être sensible aux valeurs extrêmes et ne fonctionne pas bien pour les données non normales
     # Il est donc recommandé de vérifier la distribution des données avant d'appliquer cette méthode    
-    def z_score(self, col):
+    # bornes : BornesZScore déjà ajusté (moyenne / écart-type mis à jour par lots)
+    def z_score(self, col, bornes=None):
+        if bornes is not None:
+            return self.ventes[bornes.detecter(self.ventes[col])]
+
         mean = self.ventes[col].mean()
         std_dev = self.ventes[col].std()
         
@@ -79,22 +93,32 @@ class Exploratory:
     # Elle est basée sur la densité des points de données et peut identifier des clusters de points denses tout en considérant les points isolés comme des outliers
     # Elle est particulièrement utile pour les données avec des formes de clusters non sphériques et pour les données avec du bruit
     # DBSCAN nécessite de normaliser les données avant de l'appliquer   
-    def dbscan(self, col):
+    # Sur une seule colonne, dbscan_1d donne les mêmes labels que sklearn DBSCAN
+    # en O(n log n) (tableau trié au lieu de requêtes de voisinage)
+    # group_col : applique DBSCAN séparément dans chaque groupe (ex: 'ItemCode')
+    def dbscan(self, col, eps=0.5, min_samples=5, group_col=None):
      
-        # Normalisation des données
-        data_scaled = StandardScaler().fit_transform(self.ventes[[col]])
+        groupes = self.ventes[group_col] if group_col is not None else None
         
-        # Application de DBSCAN
-        db = DBSCAN(eps=0.5, min_samples=5).fit(data_scaled)
+        # Normalisation des données et application de DBSCAN
+        labels = dbscan_1d(self.ventes[col], eps=eps, min_samples=min_samples, groupes=groupes)
         
         # Ajout des labels de cluster à la DataFrame
-        self.ventes['cluster'] = db.labels_
+        self.ventes['cluster'] = labels
         
         # Détection des outliers (label -1)
         outliers_dbscan = self.ventes[self.ventes['cluster'] == -1]
         
         return outliers_dbscan
     
+    # Détection par lot : plusieurs colonnes et plusieurs méthodes en parallèle
+    # Renvoie un masque lignes x (colonne, méthode) sans copier ni modifier self.ventes
+    # methodes : 'iqr', 'z_score', 'isolation_forest', 'dbscan'
+    def detecter_lot(self, colonnes, methodes=("iqr", "z_score", "isolation_forest", "dbscan"),
+                     n_jobs=None, compacte=False, options=None):
+        return detecter_anomalies(self.ventes, colonnes, methodes, n_jobs=n_jobs,
+                                  compacte=compacte, options=options)
+
     # Méthode pour visualiser les outliers détectés
     # Cette méthode utilise seaborn pour créer un graphique de dispersion des données
     # Les points normaux sont affichés en bleu et les outliers en rouge
@@ -0,0 +1,214 @@
+import json
+import shutil
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from cache import ecrire_colonnes, lire_colonnes
+from instrumentation import obtenir_journal
+
+journal = obtenir_journal(__name__)
+
+
+# Variables dérivées (voir README, "Variables créées")
+# Toutes les colonnes sont calculées en un seul passage sur des tableaux numpy
+# contigus. Les divisions par zéro (LossRate, WholesalePrice ou QuantityKg nuls)
+# donnent NaN au lieu de inf.
+
+INDICATEURS = [
+    "Margin",
+    "NetMargin",
+    "MarginRate",
+    "Margin_Loss_Ratio_pct",
+    "AvgPriceKg",
+    "UnitMargin",
+    "RelativeLossRate",
+]
+
+
+def _diviser(numerateur, denominateur):
+    resultat = np.full(len(numerateur), np.nan)
+    np.divide(numerateur, denominateur, out=resultat, where=denominateur != 0)
+    return resultat
+
+
+def calculer_indicateurs(ventes, colonnes=None):
+    """
+    Renvoie un DataFrame (même index que ventes) avec les indicateurs :
+    - Margin = UnitPrice - WholesalePrice
+    - NetMargin = Margin * (1 - LossRate / 100)
+    - MarginRate = Margin / WholesalePrice * 1000
+    - Margin_Loss_Ratio_pct = MarginRate / LossRate * 100
+    - AvgPriceKg = WholesalePrice / QuantityKg
+    - UnitMargin = UnitPrice - AvgPriceKg
+    - RelativeLossRate = LossRate / QuantityKg * 100
+    colonnes : sous-ensemble des indicateurs à renvoyer (None = tous)
+    """
+    prix = ventes["UnitPrice"].to_numpy(dtype=np.float64)
+    gros = ventes["WholesalePrice"].to_numpy(dtype=np.float64)
+    perte = ventes["LossRate"].to_numpy(dtype=np.float64)
+    quantite = ventes["QuantityKg"].to_numpy(dtype=np.float64)
+
+    marge = prix - gros
+    taux_marge = _diviser(marge, gros) * 1000
+    prix_kg = _diviser(gros, quantite)
+    resultat = {
+        "Margin": marge,
+        "NetMargin": marge * (1 - perte / 100),
+        "MarginRate": taux_marge,
+        "Margin_Loss_Ratio_pct": _diviser(taux_marge, perte) * 100,
+        "AvgPriceKg": prix_kg,
+        "UnitMargin": prix - prix_kg,
+        "RelativeLossRate": taux_perte_relatif(perte, quantite),
+    }
+    colonnes = INDICATEURS if colonnes is None else list(colonnes)
+    return pd.DataFrame({col: resultat[col] for col in colonnes}, index=ventes.index)
+
+
+def ratio_marge_perte(marge_rate, loss_rate):
+    """
+    Margin_Loss_Ratio_pct à partir de MarginRate et LossRate (NaN si LossRate = 0).
+    """
+    return _diviser(np.asarray(marge_rate, dtype=np.float64), np.asarray(loss_rate, dtype=np.float64)) * 100
+
+
+def taux_perte_relatif(loss_rate, quantite):
+    """
+    RelativeLossRate à partir de LossRate et QuantityKg (NaN si QuantityKg = 0).
+    """
+    return _diviser(np.asarray(loss_rate, dtype=np.float64), np.asarray(quantite, dtype=np.float64)) * 100
+
+
+class MagasinIndicateurs:
+    """
+    Stock des ventes enrichies des indicateurs, sur disque.
+
+    Le stock est en ajout seul : chaque appel à ajouter() écrit une nouvelle
+    partition colonnaire avec uniquement les jours postérieurs au dernier jour
+    déjà stocké, et les indicateurs de l'historique ne sont jamais recalculés.
+    Relire le même fichier complet n'ajoute donc rien.
+
+    Les lignes datées au plus tard du dernier jour stocké (retards,
+    corrections) sont écartées avec un avertissement dans le journal, sauf
+    avec ajouter(..., remplacer=True) : les jours concernés sont alors
+    retirés des partitions qui les contiennent (réécrites) et remplacés par
+    les lignes fournies.
+    """
+
+    def __init__(self, dossier, date_col="Date"):
+        self.dossier = Path(dossier)
+        self.date_col = date_col
+        self.fichier_index = self.dossier / "partitions.json"
+
+    def partitions(self):
+        if not self.fichier_index.is_file():
+            return []
+        with open(self.fichier_index, encoding="utf-8") as f:
+            return json.load(f)
+
+    @property
+    def derniere_date(self):
+        partitions = self.partitions()
+        return max(pd.Timestamp(p["fin"]) for p in partitions) if partitions else None
+
+    def ajouter(self, ventes, remplacer=False):
+        """
+        Calcule les indicateurs des nouveaux jours et les ajoute au stock.
+        Renvoie le nombre de lignes ajoutées.
+
+        remplacer : si True, les jours déjà stockés présents dans ventes sont
+        remplacés par les lignes fournies au lieu d'être ignorés.
+        """
+        dates = pd.to_datetime(ventes[self.date_col])
+        derniere = self.derniere_date
+        if derniere is not None:
+            anciennes = (dates <= derniere).to_numpy()
+            if anciennes.any() and remplacer:
+                self._retirer_jours(dates[anciennes].dt.normalize().unique())
+            elif anciennes.any():
+                journal.warning(
+                    "%d ligne(s) ignorée(s) : jours déjà stockés (%s -> %s, stock jusqu'au %s) ; "
+                    "utiliser remplacer=True pour les réécrire",
+                    anciennes.sum(), dates[anciennes].min().date(), dates[anciennes].max().date(),
+                    derniere.date())
+                ventes, dates = ventes[~anciennes], dates[~anciennes]
+        if ventes.empty:
+            return 0
+
+        # Indicateurs déjà présents (ex. ventes_not_seasonal.csv) : recalculés, pas dupliqués
+        enrichi = pd.concat([ventes.drop(columns=INDICATEURS, errors="ignore"),
+                             calculer_indicateurs(ventes)], axis=1)
+        enrichi[self.date_col] = dates
+        debut, fin = dates.min(), dates.max()
+
+        partitions = self.partitions()
+        numero = max((int(p["nom"].split("_")[1]) + 1 for p in partitions), default=0)
+        nom = f"part_{numero:05d}"
+        ecrire_colonnes(self.dossier / nom, enrichi.reset_index(drop=True))
+        partitions.append({"nom": nom, "debut": str(debut), "fin": str(fin), "lignes": len(enrichi)})
+        self._ecrire_index(partitions)
+        journal.info("%d ligne(s) ajoutée(s) au stock (%s -> %s)", len(enrichi), debut.date(), fin.date())
+        return len(enrichi)
+
+    def _ecrire_index(self, partitions):
+        self.dossier.mkdir(parents=True, exist_ok=True)
+        with open(self.fichier_index, "w", encoding="utf-8") as f:
+            json.dump(partitions, f)
+
+    def _retirer_jours(self, jours):
+        """
+        Réécrit les partitions qui contiennent l'un des jours donnés, sans ces jours.
+        Une partition vidée est supprimée.
+        """
+        jours = pd.DatetimeIndex(jours)
+        premier, dernier = jours.min(), jours.max() + pd.Timedelta(days=1)
+        restantes = []
+        for partition in self.partitions():
+            if pd.Timestamp(partition["fin"]) < premier or pd.Timestamp(partition["debut"]) >= dernier:
+                restantes.append(partition)
+                continue
+            dossier = self.dossier / partition["nom"]
+            df = lire_colonnes(dossier, mmap=False)
+            dates = pd.to_datetime(df[self.date_col])
+            garder = ~dates.dt.normalize().isin(jours).to_numpy()
+            if garder.all():
+                restantes.append(partition)
+                continue
+            retirees = int((~garder).sum())
+            if not garder.any():
+                shutil.rmtree(dossier)
+            else:
+                df, dates = df[garder].reset_index(drop=True), dates[garder]
+                ecrire_colonnes(dossier, df)
+                restantes.append({"nom": partition["nom"], "debut": str(dates.min()),
+                                  "fin": str(dates.max()), "lignes": len(df)})
+            journal.info("%d ligne(s) remplacée(s) dans %s", retirees, partition["nom"])
+        self._ecrire_index(restantes)
+
+    def charger(self, columns=None, start=None, end=None):
+        """
+        Relit le stock ; seules les partitions qui recoupent [start, end] sont ouvertes.
+        """
+        morceaux = []
+        for partition in self.partitions():
+            if start is not None and pd.Timestamp(partition["fin"]) < pd.Timestamp(start):
+                continue
+            if end is not None and pd.Timestamp(partition["debut"]) > pd.Timestamp(end):
+                continue
+            colonnes = columns
+            if columns is not None and (start is not None or end is not None) and self.date_col not in columns:
+                colonnes = list(columns) + [self.date_col]
+            df = lire_colonnes(self.dossier / partition["nom"], columns=colonnes)
+            if start is not None or end is not None:
+                dates = df[self.date_col]
+                masque = np.ones(len(df), dtype=bool)
+                if start is not None:
+                    masque &= (dates >= pd.Timestamp(start)).to_numpy()
+                if end is not None:
+                    masque &= (dates <= pd.Timestamp(end)).to_numpy()
+                df = df[masque]
+            morceaux.append(df if columns is None else df[list(columns)])
+        if not morceaux:
+            return pd.DataFrame(columns=columns)
+        return pd.concat(morceaux, ignore_index=True)
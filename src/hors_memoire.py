@@ -0,0 +1,422 @@
+import hashlib
+import json
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from cache import ecrire_colonnes, lire_colonnes, lire_schema, remplacer_colonne
+from cleaning import Cleaning, hacher_valeurs
+from instrumentation import obtenir_journal
+from scaling import Echelle
+
+journal = obtenir_journal(__name__)
+
+
+# Exécution hors mémoire des opérations de Cleaning et Analisis
+# La table des ventes est stockée sur disque en fragments colonnaires (cache.py,
+# un .npy par colonne, lu en memory-map), regroupés par période de date_col.
+# Chaque opération parcourt les fragments un par un : la mémoire utilisée est
+# bornée par la taille d'un fragment, et les résultats sont identiques à ceux
+# de Cleaning / Analisis sur la table entière.
+# Les quantiles sont exacts : plusieurs passages qui resserrent, par histogramme,
+# l'intervalle contenant chaque rang cherché, puis sélection dans cet intervalle.
+
+
+class TableDisque:
+    """
+    dossier : dossier de la table (un sous-dossier par fragment + partitions.json)
+    date_col : colonne utilisée pour répartir les lignes
+    frequence : période d'une partition ('M' = mois, 'D' = jour, 'Y' = année)
+    """
+
+    def __init__(self, dossier, date_col="Date", frequence="M"):
+        self.dossier = Path(dossier)
+        self.date_col = date_col
+        self.frequence = frequence
+        self.fichier_index = self.dossier / "partitions.json"
+
+    # Stockage
+
+    def partitions(self):
+        if not self.fichier_index.is_file():
+            return []
+        with open(self.fichier_index, encoding="utf-8") as f:
+            return json.load(f)
+
+    def _ecrire_index(self, partitions):
+        self.dossier.mkdir(parents=True, exist_ok=True)
+        with open(self.fichier_index, "w", encoding="utf-8") as f:
+            json.dump(partitions, f)
+
+    @property
+    def lignes(self):
+        return sum(p["lignes"] for p in self.partitions())
+
+    @property
+    def colonnes(self):
+        partitions = self.partitions()
+        if not partitions:
+            return []
+        return [c["nom"] for c in lire_schema(self.dossier / partitions[0]["nom"])["colonnes"]]
+
+    def ajouter(self, ventes):
+        """
+        Ajoute des ventes (DataFrame ou itérable de morceaux, ex: LoadData.iter_chunks()).
+        Chaque morceau est découpé par période et écrit en nouveaux fragments.
+        """
+        morceaux = [ventes] if isinstance(ventes, pd.DataFrame) else ventes
+        partitions = self.partitions()
+        for morceau in morceaux:
+            dates = pd.to_datetime(morceau[self.date_col], errors="coerce")
+            periodes = dates.dt.to_period(self.frequence).astype(str).to_numpy()
+            for periode in pd.unique(periodes):
+                masque = periodes == periode
+                fragment = morceau[masque].reset_index(drop=True)
+                nom = f"part_{len(partitions):05d}"
+                ecrire_colonnes(self.dossier / nom, fragment)
+                dates_fragment = dates[masque]
+                partitions.append({"nom": nom, "periode": periode, "lignes": len(fragment),
+                                   "debut": str(dates_fragment.min()), "fin": str(dates_fragment.max())})
+        self._ecrire_index(partitions)
+        return self
+
+    def iter_partitions(self, columns=None, start=None, end=None):
+        """
+        Fragments (DataFrames en memory-map) dont les dates recoupent [start, end].
+        """
+        for partition in self.partitions():
+            if start is not None and partition["fin"] != "NaT" and pd.Timestamp(partition["fin"]) < pd.Timestamp(start):
+                continue
+            if end is not None and partition["debut"] != "NaT" and pd.Timestamp(partition["debut"]) > pd.Timestamp(end):
+                continue
+            yield lire_colonnes(self.dossier / partition["nom"], columns=columns)
+
+    def charger(self, columns=None):
+        """
+        Table entière en mémoire (petits volumes, contrôles).
+        """
+        morceaux = list(self.iter_partitions(columns))
+        if not morceaux:
+            return pd.DataFrame(columns=columns)
+        return pd.concat(morceaux, ignore_index=True)
+
+    # Cleaning
+
+    def detecter_colonnes(self):
+        """
+        Même résultat que Cleaning.detecter_colonnes, en un passage par fragment.
+        Renvoie {'constantes': [...], 'doublons': {colonne: colonne_gardée}}.
+        """
+        colonnes = self.colonnes
+        premier = {}
+        constante = {col: True for col in colonnes}
+        hachages = {col: hashlib.sha1() for col in colonnes}
+        for fragment in self.iter_partitions():
+            for col in colonnes:
+                serie = fragment[col]
+                h = hacher_valeurs(_valeurs_texte(serie))
+                hachages[col].update(h.tobytes())
+                if constante[col]:
+                    non_nuls = h[serie.notna().to_numpy()]
+                    if len(non_nuls):
+                        premier.setdefault(col, non_nuls[0])
+                        constante[col] = bool((non_nuls == premier[col]).all())
+
+        # Candidates (une seule empreinte) confirmées sur les valeurs
+        candidates = [col for col in colonnes if constante[col] and col in premier]
+        valeurs = {}
+        for fragment in self.iter_partitions(candidates) if candidates else []:
+            for col in candidates:
+                distinctes = pd.unique(_valeurs_texte(fragment[col]).dropna())
+                valeurs.setdefault(col, set()).update(distinctes)
+        constantes = [col for col in candidates if len(valeurs[col]) == 1]
+        groupes = {}
+        for col in colonnes:
+            if col not in constantes:
+                groupes.setdefault(hachages[col].hexdigest(), []).append(col)
+
+        doublons = {}
+        for cols in groupes.values():
+            if len(cols) == 1:
+                continue
+            # Vérification complète seulement en cas de collision d'empreinte
+            egales = {(a, b): True for i, a in enumerate(cols) for b in cols[i + 1:]}
+            for fragment in self.iter_partitions(cols):
+                for a, b in egales:
+                    if egales[(a, b)]:
+                        egales[(a, b)] = bool((_valeurs_texte(fragment[a]) == _valeurs_texte(fragment[b])).all())
+            gardees = []
+            for col in cols:
+                origine = next((g for g in gardees if egales[(g, col)]), None)
+                if origine is None:
+                    gardees.append(col)
+                else:
+                    doublons[col] = origine
+        return {"constantes": constantes, "doublons": doublons}
+
+    def clear_date(self, echantillon=1000):
+        """
+        Convertit en dates les colonnes texte qui ressemblent à des dates (règle de
+        Cleaning.inferer_types, sur un échantillon du premier fragment). Seules les
+        valeurs distinctes de chaque fragment sont analysées ; les fragments sont
+        modifiés sur place.
+        """
+        partitions = self.partitions()
+        if not partitions:
+            return []
+        schema = lire_schema(self.dossier / partitions[0]["nom"])
+        textes = [c["nom"] for c in schema["colonnes"] if c["type"] == "category"]
+        premier = lire_colonnes(self.dossier / partitions[0]["nom"], columns=textes)
+        premier = pd.DataFrame({col: _valeurs_texte(premier[col]) for col in textes})
+        types = Cleaning(premier).inferer_types(echantillon=echantillon)
+        date_cols = [col for col, type_col in types.items() if type_col == "date"]
+
+        for partition in partitions:
+            dossier = self.dossier / partition["nom"]
+            fragment = lire_colonnes(dossier, columns=date_cols)
+            for col in date_cols:
+                categories = fragment[col].cat.categories
+                dates = pd.to_datetime(pd.Series(categories, dtype=object), format="%Y-%m-%d", errors="coerce")
+                codes = fragment[col].cat.codes.to_numpy()
+                valeurs = np.where(codes >= 0, dates.to_numpy(dtype="datetime64[ns]")[np.maximum(codes, 0)],
+                                   np.datetime64("NaT"))
+                remplacer_colonne(dossier, col, pd.Series(valeurs), "datetime")
+        journal.info("Colonnes converties en date : %s", date_cols)
+        return date_cols
+
+    def quantiles(self, colonnes, qs, groupe=None, interpolation="groupby", compartiments=1024, limite=100_000):
+        """
+        Quantiles exacts de colonnes, par groupe si groupe est donné.
+
+        interpolation : 'groupby' (df.groupby(...).quantile), 'numpy' (Series.quantile)
+                        ou 'interp' (TDigest sans compression)
+        limite : nombre de valeurs candidates à partir duquel on resserre encore
+                 l'intervalle au lieu de les garder en mémoire
+        Renvoie un DataFrame indexé par (groupe, q) — ou par q sans groupe.
+        """
+        return _quantiles_exacts(self, list(colonnes), list(qs), groupe, interpolation, compartiments, limite)
+
+    def remove_outliers_by_clusters(self, cluster_col, value_cols, dossier, factor=1.5):
+        """
+        Équivalent de Cleaning.remove_outliers_by_clusters : bornes IQR exactes par
+        cluster, puis filtrage fragment par fragment dans une nouvelle table.
+        Renvoie (TableDisque filtrée, bornes).
+        """
+        value_cols = list(value_cols)
+        quantiles = self.quantiles(value_cols, [0.25, 0.75], groupe=cluster_col)
+        q1 = quantiles.xs(0.25, level=-1)
+        q3 = quantiles.xs(0.75, level=-1)
+        iqr = q3 - q1
+        bornes = pd.concat({"lower": q1 - factor * iqr, "upper": q3 + factor * iqr}, axis=1)
+
+        sortie = TableDisque(dossier, self.date_col, self.frequence)
+        partitions = []
+        for partition, fragment in zip(self.partitions(), self.iter_partitions()):
+            filtre = Cleaning.appliquer_bornes(fragment, cluster_col, bornes)
+            ecrire_colonnes(sortie.dossier / partition["nom"], filtre)
+            partitions.append(dict(partition, lignes=len(filtre)))
+        sortie._ecrire_index(partitions)
+        return sortie, bornes
+
+    # Analisis
+
+    def winsorize_column(self, column, method='iqr', factor=1.5, lower_percentile=0.05, upper_percentile=0.95,
+                         bornes=None):
+        """
+        Équivalent de Analisis.winsorize_column ; les fragments sont modifiés sur place.
+        Renvoie (lower_bound, upper_bound).
+        """
+        if bornes is not None:
+            lower_bound, upper_bound = bornes.bornes
+        elif method == 'iqr':
+            Q1, Q3 = self.quantiles([column], [0.25, 0.75], interpolation="numpy")[column]
+            IQR = Q3 - Q1
+            lower_bound = Q1 - factor * IQR
+            upper_bound = Q3 + factor * IQR
+        elif method == 'percentile':
+            lower_bound, upper_bound = self.quantiles([column], [lower_percentile, upper_percentile],
+                                                      interpolation="numpy")[column]
+        else:
+            raise ValueError("Method must be 'iqr' or 'percentile'")
+
+        for partition in self.partitions():
+            dossier = self.dossier / partition["nom"]
+            serie = lire_colonnes(dossier, columns=[column])[column]
+            remplacer_colonne(dossier, column, serie.clip(lower=lower_bound, upper=upper_bound))
+        return lower_bound, upper_bound
+
+    def mise_a_echelle(self, colonnes_numeriques, methode='standard', echelle=None, dossier=None):
+        """
+        Équivalent de Analisis.mise_a_echelle. L'échelle est ajustée en un passage
+        (quantiles exacts en mode 'robust'), puis appliquée fragment par fragment :
+        dans une nouvelle table si dossier est donné, sinon sur place.
+        Renvoie (TableDisque, echelle).
+        """
+        colonnes_numeriques = list(colonnes_numeriques)
+        if echelle is None:
+            echelle = Echelle(methode)
+            if methode == 'robust':
+                echelle.colonnes = colonnes_numeriques
+                quantiles = self.quantiles(colonnes_numeriques, [0.25, 0.5, 0.75], interpolation="interp")
+                echelle.centre = quantiles.loc[0.5].to_numpy(dtype=np.float64)
+                ecart = (quantiles.loc[0.75] - quantiles.loc[0.25]).to_numpy(dtype=np.float64)
+                # Comme scikit-learn : une échelle nulle est remplacée par 1
+                echelle.echelle = np.where((ecart != 0) & np.isfinite(ecart), ecart, 1.0)
+            else:
+                for fragment in self.iter_partitions(colonnes_numeriques):
+                    echelle.partial_fit(fragment, colonnes_numeriques)
+
+        sortie = self if dossier is None else TableDisque(dossier, self.date_col, self.frequence)
+        for partition in self.partitions():
+            fragment = lire_colonnes(self.dossier / partition["nom"], columns=colonnes_numeriques, mmap=False)
+            echelle.transform(fragment, inplace=True)
+            if dossier is None:
+                for col in colonnes_numeriques:
+                    remplacer_colonne(self.dossier / partition["nom"], col, fragment[col])
+            else:
+                ecrire_colonnes(sortie.dossier / partition["nom"], fragment)
+        if dossier is not None:
+            sortie._ecrire_index(self.partitions())
+        return sortie, echelle
+
+
+def _valeurs_texte(serie):
+    # Les colonnes texte sont stockées en catégories (jeux de catégories différents
+    # d'un fragment à l'autre) : on compare et on hache leurs valeurs
+    if isinstance(serie.dtype, pd.CategoricalDtype):
+        return serie.astype(object)
+    return serie
+
+
+def _interpoler(bas, haut, q, n, interpolation):
+    # Interpolation linéaire entre les rangs floor(q * (n - 1)) et le suivant
+    # (méthode 'linear' de numpy / pandas) ; les modes ne diffèrent que par la
+    # formule d'arrondi, pour retrouver exactement chaque implémentation
+    position = q * (n - 1)
+    if interpolation == "groupby":
+        # pandas : groupby(...).quantile
+        return bas + (haut - bas) * (position % 1)
+    if interpolation == "numpy":
+        # numpy.quantile : Series.quantile, interpolation depuis la borne la plus proche
+        t = position - np.floor(position)
+        ecart = haut - bas
+        return haut - ecart * (1 - t) if t >= 0.5 else bas + ecart * t
+    if interpolation == "interp":
+        # TDigest sans compression : np.interp sur les rangs centrés (0.5, 1.5, ...)
+        rang = min(int(np.floor(position)), n - 1)
+        if rang == n - 1:
+            return bas
+        return float(np.interp(position + 0.5, [rang + 0.5, rang + 1.5], [bas, haut]))
+    raise ValueError(f"Interpolation inconnue : {interpolation}")
+
+
+def _rangs(q, n, interpolation):
+    # Rangs (0 = plus petite valeur) encadrant le quantile q : la position
+    # q * (n - 1) de l'interpolation linéaire, identique pour les trois modes
+    if interpolation not in ("groupby", "numpy", "interp"):
+        raise ValueError(f"Interpolation inconnue : {interpolation}")
+    bas = min(max(int(np.floor(q * (n - 1))), 0), n - 1)
+    return bas, min(bas + 1, n - 1)
+
+
+def _quantiles_exacts(table, colonnes, qs, groupe, interpolation, compartiments, limite):
+    # Premier passage : effectif, min et max par (groupe, colonne)
+    lues = colonnes + ([groupe] if groupe is not None else [])
+    groupes = set()
+    for fragment in table.iter_partitions([groupe] if groupe is not None else colonnes[:1]):
+        if groupe is not None:
+            groupes.update(pd.unique(pd.Series(np.asarray(fragment[groupe])).dropna()))
+    index_groupes = pd.Index(sorted(groupes) if groupe is not None else [None])
+
+    n = np.zeros((len(index_groupes), len(colonnes)), dtype=np.int64)
+    mins = np.full(n.shape, np.inf)
+    maxs = np.full(n.shape, -np.inf)
+    for fragment in table.iter_partitions(lues):
+        codes = _codes(fragment, groupe, index_groupes)
+        for j, col in enumerate(colonnes):
+            v = np.asarray(fragment[col], dtype=np.float64)
+            garder = ~np.isnan(v) & (codes >= 0)
+            if not garder.any():
+                continue
+            vg, cg = v[garder], codes[garder]
+            n[:, j] += np.bincount(cg, minlength=len(index_groupes))
+            np.minimum.at(mins[:, j], cg, vg)
+            np.maximum.at(maxs[:, j], cg, vg)
+
+    # Cibles : un rang cherché par (groupe, colonne) ; intervalle [a, b] qui le contient
+    cibles = {}
+    for g in range(len(index_groupes)):
+        for j in range(len(colonnes)):
+            if n[g, j] == 0:
+                continue
+            for q in qs:
+                for rang in _rangs(q, n[g, j], interpolation):
+                    cibles.setdefault((g, j, rang), {"a": mins[g, j], "b": maxs[g, j], "dessous": 0,
+                                                     "effectif": int(n[g, j]), "valeur": None})
+    for cible in cibles.values():
+        if cible["a"] == cible["b"]:
+            cible["valeur"] = cible["a"]
+
+    while any(c["valeur"] is None for c in cibles.values()):
+        actives = {k: c for k, c in cibles.items() if c["valeur"] is None}
+        collectes = {k: [] for k, c in actives.items() if c["effectif"] <= limite}
+        histogrammes = {k: (np.zeros(compartiments, dtype=np.int64), np.full(compartiments, np.inf),
+                            np.full(compartiments, -np.inf)) for k in actives if k not in collectes}
+        for fragment in table.iter_partitions(lues):
+            codes = _codes(fragment, groupe, index_groupes)
+            sous = {}
+            for (g, j, rang), cible in actives.items():
+                if (g, j) not in sous:
+                    v = np.asarray(fragment[colonnes[j]], dtype=np.float64)
+                    sous[(g, j)] = v[codes == g]
+                v = sous[(g, j)]
+                v = v[(v >= cible["a"]) & (v <= cible["b"])]
+                if (g, j, rang) in collectes:
+                    collectes[(g, j, rang)].append(v)
+                    continue
+                # Compartiment de chaque valeur : fonction croissante de la valeur,
+                # donc chaque compartiment est un intervalle de valeurs
+                comptes, bas, hauts = histogrammes[(g, j, rang)]
+                k = np.minimum(((v - cible["a"]) / (cible["b"] - cible["a"]) * compartiments).astype(np.int64),
+                               compartiments - 1)
+                comptes += np.bincount(k, minlength=compartiments)
+                np.minimum.at(bas, k, v)
+                np.maximum.at(hauts, k, v)
+
+        for cle, valeurs in collectes.items():
+            cible = cibles[cle]
+            valeurs = np.sort(np.concatenate(valeurs))
+            cible["valeur"] = valeurs[cle[2] - cible["dessous"]]
+        for cle, (comptes, bas, hauts) in histogrammes.items():
+            cible = cibles[cle]
+            cumul = cible["dessous"] + np.cumsum(comptes)
+            k = int(np.searchsorted(cumul, cle[2], side="right"))
+            cible["dessous"] = int(cumul[k - 1]) if k > 0 else cible["dessous"]
+            cible["a"], cible["b"], cible["effectif"] = bas[k], hauts[k], int(comptes[k])
+            if cible["a"] == cible["b"]:
+                cible["valeur"] = cible["a"]
+
+    lignes = []
+    for g, groupe_valeur in enumerate(index_groupes):
+        for q in qs:
+            ligne = []
+            for j in range(len(colonnes)):
+                if n[g, j] == 0:
+                    ligne.append(np.nan)
+                    continue
+                bas, haut = (cibles[(g, j, rang)]["valeur"] for rang in _rangs(q, n[g, j], interpolation))
+                ligne.append(_interpoler(bas, haut, q, n[g, j], interpolation))
+            lignes.append(((groupe_valeur, q) if groupe is not None else q, ligne))
+
+    if groupe is not None:
+        index = pd.MultiIndex.from_tuples([i for i, _ in lignes], names=[groupe, None])
+    else:
+        index = pd.Index([i for i, _ in lignes])
+    return pd.DataFrame([ligne for _, ligne in lignes], index=index, columns=colonnes)
+
+
+def _codes(fragment, groupe, index_groupes):
+    if groupe is None:
+        return np.zeros(len(fragment), dtype=np.int64)
+    return index_groupes.get_indexer(np.asarray(fragment[groupe]))
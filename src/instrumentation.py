@@ -0,0 +1,380 @@
+import atexit
+import functools
+import inspect
+import json
+import logging
+import multiprocessing
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from pathlib import Path
+
+import pandas as pd
+
+
+# Instrumentation des étapes (méthodes publiques de LoadData, Cleaning,
+# Exploratory, Analisis et fonctions de reports)
+# Chaque appel instrumenté devient un intervalle : temps réel et CPU du thread,
+# pic mémoire (tracemalloc), lignes / colonnes en entrée et en sortie, octets lus
+# (/proc/self/io, Linux). Pic mémoire et octets lus sont des compteurs du
+# processus (suffixe _processus) : ils ne sont pas relevés pour un intervalle qui
+# a chevauché un intervalle d'un autre thread, ou pendant lequel d'autres threads
+# ont consommé du CPU (concurrent = True).
+# Les intervalles sont exportés au format Chrome Trace (chrome://tracing,
+# ui.perfetto.dev, speedscope) : une frise par thread, les appels imbriqués
+# empilés comme un flame graph.
+# Désactivée (par défaut), l'instrumentation se réduit à un test de booléen.
+# VENTES_TRACE=trace.json active la trace au démarrage et l'écrit à la sortie.
+
+_PROC_IO = Path("/proc/self/io")
+
+
+class _Etat:
+    def __init__(self):
+        self.actif = False
+        self.memoire = False
+        self.tracemalloc_lance = False
+        self.origine = time.perf_counter()
+        self.evenements = []
+        self.verrou = threading.Lock()
+        self.local = threading.local()
+        self.ouverts = set()  # intervalles en cours, tous threads confondus
+
+    def pile(self):
+        pile = getattr(self.local, "pile", None)
+        if pile is None:
+            pile = self.local.pile = []
+        return pile
+
+
+_etat = _Etat()
+
+
+def activer(memoire=True):
+    """
+    Active l'enregistrement des intervalles.
+    memoire : suit le pic mémoire avec tracemalloc (ralentit les allocations Python).
+    """
+    _etat.memoire = memoire
+    if memoire and not tracemalloc.is_tracing():
+        tracemalloc.start()
+        _etat.tracemalloc_lance = True
+    _etat.actif = True
+
+
+def desactiver():
+    _etat.actif = False
+    if _etat.tracemalloc_lance:
+        tracemalloc.stop()
+        _etat.tracemalloc_lance = False
+    _etat.memoire = False
+
+
+def est_actif():
+    return _etat.actif
+
+
+def reinitialiser():
+    """
+    Vide les intervalles enregistrés ; les temps repartent de zéro.
+    """
+    with _etat.verrou:
+        _etat.evenements = []
+        _etat.origine = time.perf_counter()
+
+
+def evenements():
+    with _etat.verrou:
+        return list(_etat.evenements)
+
+
+def _octets_lus():
+    # rchar : octets lus par le processus (fichiers, sockets), cache disque compris
+    try:
+        for ligne in _PROC_IO.read_text().splitlines():
+            if ligne.startswith("rchar:"):
+                return int(ligne.split()[1])
+    except OSError:
+        pass
+    return None
+
+
+def _forme(objet):
+    """
+    (lignes, colonnes) d'un DataFrame / Series, du premier élément d'un tuple,
+    ou de l'attribut ventes / data d'un objet (Cleaning, LoadData...) ; None sinon.
+    """
+    if isinstance(objet, pd.DataFrame):
+        return objet.shape
+    if isinstance(objet, pd.Series):
+        return len(objet), 1
+    if isinstance(objet, (tuple, list)) and objet:
+        return _forme(objet[0]) if isinstance(objet[0], (pd.DataFrame, pd.Series)) else None
+    for attribut in ("ventes", "data"):
+        valeur = getattr(objet, attribut, None) if not isinstance(objet, type) else None
+        if isinstance(valeur, (pd.DataFrame, pd.Series)):
+            return _forme(valeur)
+    return None
+
+
+def _forme_arguments(args, kwargs):
+    for valeur in list(args) + list(kwargs.values()):
+        forme = _forme(valeur)
+        if forme is not None:
+            return forme
+    return None
+
+
+class _Mesure:
+    """
+    Un intervalle en cours. Les pics mémoire des intervalles imbriqués
+    remontent au parent (tracemalloc n'a qu'un pic global, remis à zéro à chaque entrée).
+    Le pic n'est pas remis à zéro quand un autre thread a un intervalle ouvert :
+    les deux intervalles sont alors marqués concurrents.
+    """
+
+    def __init__(self, nom, infos=None, args=(), kwargs=None):
+        self.nom = nom
+        self.infos = dict(infos or {})
+        self.args = args
+        self.kwargs = kwargs or {}
+        self.sortie = None
+        self.pic_vu = 0
+        self.concurrent = False
+
+    def __enter__(self):
+        self.entree = _forme_arguments(self.args, self.kwargs)
+        pile = _etat.pile()
+        self.parent = pile[-1] if pile else None
+        pile.append(self)
+        self.tid = threading.get_ident()
+        with _etat.verrou:
+            for autre in _etat.ouverts:
+                if autre.tid != self.tid:
+                    autre.concurrent = self.concurrent = True
+            _etat.ouverts.add(self)
+        self.memoire = _etat.memoire and tracemalloc.is_tracing() and not self.concurrent
+        if self.memoire:
+            courant, pic = tracemalloc.get_traced_memory()
+            if self.parent is not None:
+                self.parent.pic_vu = max(self.parent.pic_vu, pic)
+            tracemalloc.reset_peak()
+            self.base = courant
+        self.octets = _octets_lus()
+        self.cpu = time.thread_time()
+        self.cpu_processus = time.process_time()
+        self.debut = time.perf_counter()
+        return self
+
+    def __exit__(self, type_erreur, erreur, trace):
+        fin = time.perf_counter()
+        cpu = time.thread_time() - self.cpu
+        cpu_autres = time.process_time() - self.cpu_processus - cpu
+        octets = _octets_lus()
+        with _etat.verrou:
+            _etat.ouverts.discard(self)
+        args = {"cpu_ms": round(cpu * 1e3, 3)}
+        if cpu_autres > 1e-3:
+            # D'autres threads (instrumentés ou non) ont travaillé pendant l'intervalle
+            args["cpu_autres_threads_ms"] = round(cpu_autres * 1e3, 3)
+            self.concurrent = True
+        if self.concurrent:
+            # Compteurs du processus partagés avec un autre thread : non attribuables
+            args["concurrent"] = True
+        else:
+            if self.memoire:
+                _, pic = tracemalloc.get_traced_memory()
+                pic = max(pic, self.pic_vu)
+                args["memoire_pic_processus_mo"] = round((pic - self.base) / 1e6, 3)
+                if self.parent is not None:
+                    self.parent.pic_vu = max(self.parent.pic_vu, pic)
+            if self.octets is not None and octets is not None:
+                args["octets_lus_processus"] = octets - self.octets
+        sortie = _forme(self.sortie)
+        if sortie is None and self.args and not isinstance(self.args[0], (pd.DataFrame, pd.Series)):
+            # Méthodes qui modifient l'objet sans rien renvoyer
+            sortie = _forme(self.args[0])
+        for sens, forme in (("entree", self.entree), ("sortie", sortie)):
+            if forme is not None:
+                args[f"lignes_{sens}"], args[f"colonnes_{sens}"] = int(forme[0]), int(forme[1])
+        if erreur is not None:
+            args["erreur"] = f"{type_erreur.__name__}: {erreur}"
+        args.update(self.infos)
+
+        pile = _etat.pile()
+        if pile and pile[-1] is self:
+            pile.pop()
+        evenement = {
+            "name": self.nom,
+            "ph": "X",
+            "ts": round((self.debut - _etat.origine) * 1e6, 1),
+            "dur": round((fin - self.debut) * 1e6, 1),
+            "pid": os.getpid(),
+            "tid": self.tid,
+            "args": args,
+        }
+        with _etat.verrou:
+            _etat.evenements.append(evenement)
+        if _journal.isEnabledFor(logging.DEBUG):
+            _journal.debug("%s : %.1f ms", self.nom, evenement["dur"] / 1e3,
+                           extra={"etape": self.nom, "duree_ms": round(evenement["dur"] / 1e3, 3), **args})
+        return False
+
+
+class _Inactive:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *erreur):
+        return False
+
+
+_INACTIVE = _Inactive()
+
+
+def etape(nom, **infos):
+    """
+    Gestionnaire de contexte pour instrumenter un bloc :
+        with etape("fusion annexes", source="annex2"):
+            ...
+    """
+    if not _etat.actif:
+        return _INACTIVE
+    return _Mesure(nom, infos)
+
+
+def annoter(**infos):
+    """
+    Ajoute des informations à l'intervalle en cours (ex. une erreur rattrapée).
+    """
+    if _etat.actif:
+        pile = _etat.pile()
+        if pile:
+            pile[-1].infos.update(infos)
+
+
+def instrumenter(fonction=None, *, nom=None):
+    """
+    Décorateur : chaque appel de la fonction devient un intervalle.
+    Les lignes / colonnes d'entrée sont celles du premier argument qui a une forme
+    (DataFrame, Series, objet avec .ventes / .data), celles de sortie celles du résultat.
+    """
+    if fonction is None:
+        return lambda f: instrumenter(f, nom=nom)
+    nom = nom or fonction.__qualname__
+
+    @functools.wraps(fonction)
+    def enveloppe(*args, **kwargs):
+        if not _etat.actif:
+            return fonction(*args, **kwargs)
+        with _Mesure(nom, args=args, kwargs=kwargs) as mesure:
+            mesure.sortie = fonction(*args, **kwargs)
+        return mesure.sortie
+
+    return enveloppe
+
+
+def instrumenter_classe(cls):
+    """
+    Instrumente les méthodes publiques d'une classe (y compris statiques et de classe).
+    """
+    for nom, attribut in list(vars(cls).items()):
+        if nom.startswith("_"):
+            continue
+        qualifie = f"{cls.__name__}.{nom}"
+        if isinstance(attribut, staticmethod):
+            setattr(cls, nom, staticmethod(instrumenter(attribut.__func__, nom=qualifie)))
+        elif isinstance(attribut, classmethod):
+            setattr(cls, nom, classmethod(instrumenter(attribut.__func__, nom=qualifie)))
+        elif inspect.isfunction(attribut):
+            setattr(cls, nom, instrumenter(attribut, nom=qualifie))
+    return cls
+
+
+def exporter_trace(fichier):
+    """
+    Écrit les intervalles au format Chrome Trace (JSON) ; renvoie le chemin.
+    """
+    fichier = Path(fichier)
+    fichier.parent.mkdir(parents=True, exist_ok=True)
+    trace = {"traceEvents": evenements(), "displayTimeUnit": "ms"}
+    fichier.write_text(json.dumps(trace, ensure_ascii=False, default=str), encoding="utf-8")
+    return fichier
+
+
+def resume():
+    """
+    Une ligne par étape : appels, durées, CPU du thread, pic mémoire et octets lus
+    du processus (appels sans chevauchement seulement), lignes traitées.
+    """
+    lignes = [{"etape": e["name"], "duree_ms": e["dur"] / 1e3, **e["args"]} for e in evenements()]
+    if not lignes:
+        return pd.DataFrame()
+    df = pd.DataFrame(lignes)
+    if "concurrent" in df:
+        df["concurrent"] = df["concurrent"].fillna(False).astype(bool)
+    agregats = {"appels": ("duree_ms", "size"), "duree_totale_ms": ("duree_ms", "sum"),
+                "duree_max_ms": ("duree_ms", "max"), "cpu_ms": ("cpu_ms", "sum")}
+    for nom, col, fonction in (("appels_concurrents", "concurrent", "sum"),
+                               ("memoire_pic_processus_mo", "memoire_pic_processus_mo", "max"),
+                               ("octets_lus_processus", "octets_lus_processus", "sum"),
+                               ("lignes_entree", "lignes_entree", "sum"), ("lignes_sortie", "lignes_sortie", "sum")):
+        if col in df:
+            agregats[nom] = (col, fonction)
+    return df.groupby("etape").agg(**agregats).sort_values("duree_totale_ms", ascending=False)
+
+
+# Journal structuré : les modules de src/ écrivent dans le logger "ventes.<module>"
+
+_ATTRIBUTS_STANDARD = set(vars(logging.makeLogRecord({}))) | {"message", "asctime"}
+
+
+def obtenir_journal(nom):
+    return logging.getLogger(f"ventes.{nom}")
+
+
+class FormatJSON(logging.Formatter):
+    """
+    Une ligne JSON par message, avec les champs passés dans extra=.
+    """
+
+    def format(self, record):
+        ligne = {
+            "horodatage": self.formatTime(record, "%Y-%m-%dT%H:%M:%S"),
+            "niveau": record.levelname,
+            "journal": record.name,
+            "message": record.getMessage(),
+        }
+        ligne.update({k: v for k, v in vars(record).items() if k not in _ATTRIBUTS_STANDARD})
+        if record.exc_info:
+            ligne["exception"] = self.formatException(record.exc_info)
+        return json.dumps(ligne, ensure_ascii=False, default=str)
+
+
+def configurer_journal(niveau=logging.INFO, json_format=False, fichier=None):
+    """
+    Affiche les messages des modules (remplace les print()) sur la sortie standard,
+    ou les écrit dans fichier ; json_format=True pour une ligne JSON par message.
+    """
+    racine = logging.getLogger("ventes")
+    for handler in [h for h in racine.handlers if getattr(h, "_ventes", False)]:
+        racine.removeHandler(handler)
+        handler.close()
+    handler = logging.FileHandler(fichier, encoding="utf-8") if fichier else logging.StreamHandler(sys.stdout)
+    handler.setFormatter(FormatJSON() if json_format else logging.Formatter("%(message)s"))
+    handler._ventes = True
+    racine.addHandler(handler)
+    racine.setLevel(niveau)
+    racine.propagate = False
+    return racine
+
+
+_journal = obtenir_journal("instrumentation")
+
+# Processus principal seulement : les workers (ProcessPoolExecutor) héritent de
+# l'environnement mais ne doivent pas écraser la trace
+if os.environ.get("VENTES_TRACE") and multiprocessing.parent_process() is None:
+    activer(memoire=os.environ.get("VENTES_TRACE_MEMOIRE", "1") != "0")
+    atexit.register(exporter_trace, os.environ["VENTES_TRACE"])
@@ -0,0 +1,364 @@
+import hashlib
+import inspect
+import json
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from cache import CacheColonnes, ecrire_colonnes, lire_colonnes, lire_schema
+from instrumentation import etape as intervalle, obtenir_journal
+
+journal = obtenir_journal(__name__)
+
+
+# Exécution des notebooks 01 -> 06 sans notebook
+# Chaque étape est une fonction (DataFrames d'entrée -> DataFrame) placée dans un
+# graphe. Sa clé est le hachage de son code, de ses paramètres, des fichiers
+# sources et de l'empreinte du contenu de ses entrées : une étape n'est relancée
+# que si l'une de ces informations change. Les résultats intermédiaires sont
+# gardés au format colonnaire de cache.py (pas de CSV relu à chaque étape) et
+# les étapes indépendantes tournent en parallèle.
+
+
+class Etape:
+    def __init__(self, nom, fonction, entrees=(), params=None, fichiers=(), code=(), sorties=None):
+        self.nom = nom
+        self.fonction = fonction
+        self.entrees = list(entrees)
+        self.params = dict(params or {})
+        self.fichiers = list(fichiers)
+        self.code = list(code)
+        self.sorties = sorties  # colonne du résultat listant les fichiers produits (ex: figures)
+
+    def cle(self, empreintes):
+        """
+        Hachage du code (fonction + objets listés dans code), des paramètres,
+        des fichiers sources (chemin, date, taille) et des empreintes des entrées.
+        """
+        sources = [_source(self.fonction)] + [_source(objet) for objet in self.code]
+        contenu = {
+            "code": hashlib.sha1("\n".join(sources).encode("utf-8")).hexdigest(),
+            "params": json.dumps(self.params, sort_keys=True, default=str),
+            "fichiers": [CacheColonnes.signature(f) for f in self.fichiers],
+            "entrees": [empreintes[e] for e in self.entrees],
+        }
+        return hashlib.sha1(json.dumps(contenu, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+class Pipeline:
+    """
+    cache_dir : dossier des résultats intermédiaires (un sous-dossier par étape)
+    max_workers : nombre d'étapes exécutées en même temps
+    """
+
+    def __init__(self, cache_dir, max_workers=4):
+        self.cache_dir = Path(cache_dir)
+        self.max_workers = max_workers
+        self.etapes = {}
+        self.resultats = {}
+
+    def ajouter(self, nom, fonction, entrees=(), params=None, fichiers=(), code=(), sorties=None):
+        """
+        Ajoute une étape ; ses entrées doivent être des étapes déjà ajoutées
+        (l'ordre d'ajout est donc un ordre topologique du graphe).
+
+        sorties : colonne du résultat qui liste les fichiers écrits par l'étape ;
+        l'étape est relancée si l'un d'eux a disparu, même si sa clé n'a pas changé.
+        """
+        if nom in self.etapes:
+            raise ValueError(f"Étape déjà définie : {nom}")
+        inconnues = [e for e in entrees if e not in self.etapes]
+        if inconnues:
+            raise ValueError(f"Entrées inconnues pour l'étape {nom} : {inconnues}")
+        self.etapes[nom] = Etape(nom, fonction, entrees, params, fichiers, code, sorties)
+        return self
+
+    def _ancetres(self, cibles):
+        a_visiter, requis = list(cibles), set()
+        while a_visiter:
+            nom = a_visiter.pop()
+            if nom not in self.etapes:
+                raise ValueError(f"Étape inconnue : {nom}")
+            if nom not in requis:
+                requis.add(nom)
+                a_visiter.extend(self.etapes[nom].entrees)
+        return [nom for nom in self.etapes if nom in requis]
+
+    def _resultat(self, nom):
+        # Résultat en mémoire, sinon relu depuis le cache colonnaire
+        if nom not in self.resultats:
+            self.resultats[nom] = _lire(self.cache_dir / nom)
+        return self.resultats[nom]
+
+    def _sorties_presentes(self, nom):
+        colonne = self.etapes[nom].sorties
+        if colonne is None:
+            return True
+        return all(Path(fichier).is_file() for fichier in self._resultat(nom)[colonne])
+
+    def _traiter(self, nom, empreintes, forcer):
+        etape = self.etapes[nom]
+        cle = etape.cle(empreintes)
+        dossier = self.cache_dir / nom
+        schema = lire_schema(dossier)
+        if not forcer and schema is not None and schema["meta"].get("cle") == cle:
+            if self._sorties_presentes(nom):
+                journal.info("Étape %s : à jour", nom, extra={"etape": nom, "a_jour": True})
+                return schema["meta"]["empreinte"]
+            journal.info("Étape %s : fichiers de sortie manquants, relancée", nom)
+
+        debut = time.perf_counter()
+        with intervalle(f"Pipeline.{nom}", cle=cle):
+            entrees = [self._resultat(e) for e in etape.entrees]
+            df = etape.fonction(*entrees, **etape.params)
+            empreinte = _empreinte(df)
+            _ecrire(dossier, df, {"cle": cle, "empreinte": empreinte})
+        self.resultats[nom] = df
+        duree = time.perf_counter() - debut
+        journal.info("Étape %s exécutée en %.2f s (%d lignes)", nom, duree, len(df),
+                     extra={"etape": nom, "duree_s": duree, "lignes": len(df)})
+        return empreinte
+
+    def executer(self, cibles=None, forcer=False):
+        """
+        Exécute les étapes nécessaires aux cibles (toutes par défaut).
+        Une étape démarre dès que ses entrées sont prêtes.
+        Renvoie {cible: DataFrame}.
+        """
+        cibles = list(self.etapes) if cibles is None else ([cibles] if isinstance(cibles, str) else list(cibles))
+        restantes = self._ancetres(cibles)
+        empreintes = {}
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            en_cours = {}
+            while restantes or en_cours:
+                prets = [nom for nom in restantes if all(e in empreintes for e in self.etapes[nom].entrees)]
+                for nom in prets:
+                    restantes.remove(nom)
+                    en_cours[executor.submit(self._traiter, nom, dict(empreintes), forcer)] = nom
+                termines, _ = wait(en_cours, return_when=FIRST_COMPLETED)
+                for future in termines:
+                    empreintes[en_cours.pop(future)] = future.result()
+        return {nom: self._resultat(nom) for nom in cibles}
+
+    def invalider(self, nom=None):
+        """
+        Oublie le résultat d'une étape (de toutes si nom est None).
+        """
+        noms = list(self.etapes) if nom is None else [nom]
+        for n in noms:
+            self.resultats.pop(n, None)
+            schema = self.cache_dir / n / "schema.json"
+            if schema.is_file():
+                schema.unlink()
+
+
+def _source(objet):
+    try:
+        return inspect.getsource(objet)
+    except (OSError, TypeError):
+        return repr(getattr(objet, "__code__", objet))
+
+
+def _empreinte(df):
+    # Contenu (valeurs et index), noms et types des colonnes
+    hachage = hashlib.sha1()
+    hachage.update(json.dumps([[str(c), str(t)] for c, t in df.dtypes.items()]).encode("utf-8"))
+    hachage.update(json.dumps([str(n) for n in df.index.names]).encode("utf-8"))
+    hachage.update(pd.util.hash_pandas_object(df, index=True).to_numpy().tobytes())
+    return hachage.hexdigest()
+
+
+def _ecrire(dossier, df, meta):
+    # L'index nommé est stocké comme une colonne ; les types d'origine sont notés
+    # pour les retrouver à la lecture (texte stocké en catégories, dates en ns)
+    index = [n for n in df.index.names if n is not None]
+    table = df.reset_index() if index else df.reset_index(drop=True)
+    meta = dict(meta, index=index, types={c: str(t) for c, t in table.dtypes.items()})
+    ecrire_colonnes(dossier, table, meta=meta)
+
+
+def _lire(dossier):
+    schema = lire_schema(dossier)
+    if schema is None:
+        raise FileNotFoundError(f"Aucun résultat en cache dans {dossier}")
+    df = lire_colonnes(dossier, mmap=False)
+    for col, type_col in schema["meta"].get("types", {}).items():
+        if str(df[col].dtype) != type_col:
+            df[col] = df[col].astype(type_col)
+    index = schema["meta"].get("index", [])
+    return df.set_index(index) if index else df
+
+
+# Étapes des notebooks
+
+RENOMMAGE = {
+    'Item Code': 'ItemCode',
+    'Item Name_x': 'ItemName',
+    'Category Code': 'CategoryCode',
+    'Category Name': 'CategoryName',
+    'Time': 'SaleTime',
+    'Quantity Sold (kilo)': 'QuantityKg',
+    'Unit Selling Price (RMB/kg)': 'UnitPrice',
+    'Sale or Return': 'SaleType',
+    'Discount (Yes/No)': 'Discount',
+    'Date_x': 'SaleDate',
+    'Wholesale Price (RMB/kg)': 'WholesalePrice',
+    'Loss Rate (%)': 'LossRate'
+}
+
+
+def etape_chargement(annexes, annee=2020, size=1000):
+    """
+    01-data_loader : annex2 (ventes) limité à une année, annex1 / annex3 / annex4
+    limités à size lignes, fusionnés sur Item Code.
+    """
+    from data_loader import LoadData
+
+    manager = LoadData(annexes[0], "csv", size=size)
+    sources = [{"source": chemin, "source_type": "csv", "size": None if i == 1 else size}
+               for i, chemin in enumerate(annexes) if i > 0]
+    dfs = [manager.data] + LoadData.charger_sources(sources)
+    dates = pd.to_datetime(dfs[1]['Date'], errors='coerce')
+    dfs[1] = dfs[1][(dates.dt.year == annee).to_numpy()]
+    return manager.fusionner_planifie(dfs, on="Item Code", how="inner")
+
+
+def etape_nettoyage(ventes):
+    """
+    02_cleaning : noms de colonnes, colonnes constantes / identiques, colonnes
+    binaires, dates, renommage, codes, doublons et valeurs négatives.
+    """
+    from cleaning import Cleaning
+
+    nettoyage = Cleaning(ventes)
+    nettoyage.clean_data()
+    nettoyage.clear_nunique()
+    nettoyage.clear_categorical()
+    ventes = nettoyage.clear_date()
+    ventes = ventes.drop(columns=['Date_y'], errors='ignore').rename(columns=RENOMMAGE)
+
+    ventes['CategoryCode'] = ventes['CategoryCode'].astype('category').cat.codes
+    ventes['ItemCode'] = ventes['ItemCode'].astype('category').cat.codes
+    ventes = ventes.drop_duplicates(subset=['ItemCode', 'ItemName', 'CategoryCode', 'CategoryName',
+                                            'QuantityKg', 'UnitPrice'])
+    colonnes_numeriques = ['QuantityKg', 'UnitPrice', 'WholesalePrice']
+    return ventes[(ventes[colonnes_numeriques] >= 0).all(axis=1)].reset_index(drop=True)
+
+
+def etape_segmentation(ventes, k=3, colonnes=('QuantityKg', 'UnitPrice', 'Discount', 'WholesalePrice', 'LossRate')):
+    """
+    02_cleaning (fin) : QuantityCluster, outliers par cluster, DateTime.
+    """
+    from cleaning import Cleaning
+    from segmentation import SegmentationQuantite
+
+    ventes = ventes.copy()
+    # Segments numérotés par taille : 0 = faibles quantités (ETIQUETTES)
+    ventes['QuantityCluster'] = SegmentationQuantite(k=k).fit_predict(ventes['QuantityKg'])
+    colonnes = [col for col in colonnes if col in ventes]
+    ventes, _ = Cleaning.remove_outliers_by_clusters(ventes, 'QuantityCluster', colonnes)
+
+    ventes['DateTime'] = pd.to_datetime(
+        ventes['SaleDate'].astype(str) + ' ' + ventes['SaleTime'].astype(str),
+        format='%Y-%m-%d %H:%M:%S.%f'
+    )
+    return ventes.drop(columns=['SaleDate', 'SaleTime'])
+
+
+def etape_non_saisonnier(ventes):
+    """
+    03-exploratory : ventes par transaction indexées par DateTime.
+    """
+    return ventes.drop(columns=['SaleType', 'Discount'], errors='ignore').set_index('DateTime')
+
+
+def etape_saisonnier(ventes, colonnes=('QuantityKg', 'UnitPrice', 'WholesalePrice', 'LossRate', 'QuantityCluster')):
+    """
+    03-exploratory : agrégation journalière (LossRate en moyenne, le reste en somme).
+    """
+    from series import SerieTemporelle
+
+    serie = SerieTemporelle([col for col in colonnes if col in ventes], date_col='DateTime')
+    return serie.ajouter(ventes.reset_index()).quotidien()
+
+
+def etape_rapport_saisonnier(ventes, k=3, random_state=42):
+    """
+    04_analysis : indicateurs journaliers, transformation log1p et segmentation des jours.
+    """
+    from sklearn.cluster import KMeans
+
+    from features import calculer_indicateurs
+
+    indicateurs = calculer_indicateurs(ventes, ['AvgPriceKg', 'RelativeLossRate', 'MarginRate'])
+    ventes = pd.concat([ventes, indicateurs], axis=1)
+    colonnes_numeriques = ventes.select_dtypes(include=['int64', 'float64']).columns
+
+    shift = abs(ventes[colonnes_numeriques].min().min()) + 1
+    ventes_log = np.log1p(ventes[colonnes_numeriques] + shift)
+    ventes_log['segmentation'] = KMeans(n_clusters=k, random_state=random_state).fit_predict(
+        ventes_log[colonnes_numeriques].fillna(0))
+    return ventes_log
+
+
+def etape_rapport_non_saisonnier(ventes):
+    """
+    04_analysis : marges et ratio marge / perte par transaction.
+    """
+    from features import calculer_indicateurs
+    from segmentation import ETIQUETTES
+
+    indicateurs = calculer_indicateurs(ventes, ['Margin', 'NetMargin', 'MarginRate', 'Margin_Loss_Ratio_pct'])
+    ventes = pd.concat([ventes, indicateurs], axis=1).reset_index()
+    # QuantityCluster vient de etape_segmentation : segments déjà numérotés par taille
+    ventes['ClusterLabel'] = ventes['QuantityCluster'].map(ETIQUETTES)
+    ventes['Date'] = pd.to_datetime(ventes['DateTime']).dt.normalize()
+    return ventes
+
+
+def etape_figures(ventes, ventes_journalieres, dossier, formats=("png", "svg")):
+    """
+    06_report : enregistre les figures ; renvoie la liste des fichiers.
+    """
+    from reports import generer_rapport
+
+    fichiers = generer_rapport(ventes, dossier, ventes_journalieres=ventes_journalieres, formats=list(formats))
+    return pd.DataFrame({'fichier': [str(f) for f in fichiers]})
+
+
+def pipeline_ventes(raw_dir="../data/raw", cache_dir="../data/cache/pipeline", reports_dir=None, max_workers=4):
+    """
+    Graphe des notebooks 01 -> 06 :
+
+        chargement -> nettoyage -> segmentation -> non_saisonnier -> rapport_non_saisonnier -> figures
+                                                                 -> saisonnier -> rapport_saisonnier ----^
+
+    Les deux branches (saisonnier / non saisonnier) s'exécutent en parallèle.
+    L'étape figures n'est ajoutée que si reports_dir est donné.
+    """
+    import cleaning
+    import data_loader
+    import features
+    import reports
+    import segmentation
+    import series
+
+    raw_dir = Path(raw_dir)
+    annexes = [str(raw_dir / f"annex{i}.csv") for i in range(1, 5)]
+
+    pipeline = Pipeline(cache_dir, max_workers=max_workers)
+    pipeline.ajouter("chargement", etape_chargement, params={"annexes": annexes},
+                     fichiers=annexes, code=[data_loader])
+    pipeline.ajouter("nettoyage", etape_nettoyage, ["chargement"], code=[cleaning])
+    pipeline.ajouter("segmentation", etape_segmentation, ["nettoyage"], code=[cleaning, segmentation])
+    pipeline.ajouter("non_saisonnier", etape_non_saisonnier, ["segmentation"])
+    pipeline.ajouter("saisonnier", etape_saisonnier, ["non_saisonnier"], code=[series])
+    pipeline.ajouter("rapport_saisonnier", etape_rapport_saisonnier, ["saisonnier"], code=[features])
+    pipeline.ajouter("rapport_non_saisonnier", etape_rapport_non_saisonnier, ["non_saisonnier"], code=[features])
+    if reports_dir is not None:
+        pipeline.ajouter("figures", etape_figures, ["rapport_non_saisonnier", "rapport_saisonnier"],
+                         params={"dossier": str(reports_dir)}, code=[reports], sorties="fichier")
+    return pipeline
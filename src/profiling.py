@@ -0,0 +1,211 @@
+import numpy as np
+import pandas as pd
+
+
+class CompteurDistincts:
+    """
+    Compte les valeurs distinctes à partir de leurs hachages (uint64).
+
+    Le comptage est exact tant que le nombre de hachages distincts reste sous
+    seuil_exact, puis bascule sur un sketch HyperLogLog (2**p registres,
+    erreur relative ~ 1.04 / sqrt(2**p)). Deux compteurs se fusionnent, ce qui
+    permet de profiler un fichier par morceaux.
+    """
+
+    def __init__(self, p=12, seuil_exact=1_000_000):
+        self.p = p
+        self.seuil_exact = seuil_exact
+        self.exacts = np.empty(0, dtype=np.uint64)
+        self.registres = None
+
+    def ajouter(self, hachages):
+        hachages = np.asarray(hachages, dtype=np.uint64)
+        if self.registres is None:
+            self.exacts = np.union1d(self.exacts, hachages)
+            if len(self.exacts) > self.seuil_exact:
+                self._vers_hll(self.exacts)
+                self.exacts = np.empty(0, dtype=np.uint64)
+        else:
+            self._ajouter_hll(hachages)
+        return self
+
+    def _vers_hll(self, hachages):
+        self.registres = np.zeros(2 ** self.p, dtype=np.uint8)
+        self._ajouter_hll(hachages)
+
+    def _ajouter_hll(self, hachages):
+        # Les p bits de poids faible choisissent le registre, le rang est la
+        # position du premier bit à 1 dans les bits restants
+        indices = (hachages & np.uint64(2 ** self.p - 1)).astype(np.intp)
+        reste = hachages >> np.uint64(self.p)
+        _, exposants = np.frexp(reste.astype(np.float64))
+        rangs = (64 - self.p) - exposants + 1
+        np.maximum.at(self.registres, indices, rangs.astype(np.uint8))
+
+    def fusionner(self, autre):
+        if self.registres is None and autre.registres is None:
+            return self.ajouter(autre.exacts)
+        if self.registres is None:
+            self._vers_hll(self.exacts)
+            self.exacts = np.empty(0, dtype=np.uint64)
+        if autre.registres is None:
+            self._ajouter_hll(autre.exacts)
+        else:
+            np.maximum(self.registres, autre.registres, out=self.registres)
+        return self
+
+    def estimation(self):
+        if self.registres is None:
+            return len(self.exacts)
+        m = len(self.registres)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        brute = alpha * m * m / np.sum(2.0 ** -self.registres.astype(np.float64))
+        vides = np.count_nonzero(self.registres == 0)
+        if brute <= 2.5 * m and vides:
+            # Correction pour les petites cardinalités (comptage linéaire)
+            return int(round(m * np.log(m / vides)))
+        return int(round(brute))
+
+
+class Profil:
+    """
+    Profil d'un DataFrame calculé en un seul passage par morceau :
+    types, valeurs manquantes, min / max, nombre approximatif de valeurs
+    distinctes, estimation des lignes dupliquées, mémoire par colonne,
+    premières et dernières lignes.
+
+    Utilisation :
+        profil = Profil.construire(df)                      # en mémoire
+        profil = Profil.construire(loader.iter_chunks())    # par morceaux
+    """
+
+    def __init__(self, taille_echantillon=5, p=12, seuil_exact=1_000_000):
+        self.taille_echantillon = taille_echantillon
+        self.p = p
+        self.seuil_exact = seuil_exact
+        self.lignes = 0
+        self.colonnes = {}
+        self.distincts_lignes = CompteurDistincts(p, seuil_exact)
+        self.tete = None
+        self.queue = None
+
+    @classmethod
+    def construire(cls, donnees, **options):
+        profil = cls(**options)
+        morceaux = [donnees] if isinstance(donnees, pd.DataFrame) else donnees
+        for chunk in morceaux:
+            profil.mettre_a_jour(chunk)
+        return profil
+
+    def _colonne(self, col, dtype):
+        if col not in self.colonnes:
+            self.colonnes[col] = {
+                "type": str(dtype),
+                "nuls": 0,
+                "min": None,
+                "max": None,
+                "memoire": 0,
+                "distincts": CompteurDistincts(self.p, self.seuil_exact),
+            }
+        return self.colonnes[col]
+
+    def mettre_a_jour(self, df):
+        """
+        Ajoute un morceau au profil (chaque colonne n'est hachée qu'une fois).
+        """
+        lignes = np.zeros(len(df), dtype=np.uint64)
+        memoire = df.memory_usage(index=False, deep=True)
+        with np.errstate(over="ignore"):
+            for col in df.columns:
+                serie = df[col]
+                stats = self._colonne(col, serie.dtype)
+                hachages = pd.util.hash_pandas_object(serie, index=False).to_numpy()
+                nuls = serie.isna().to_numpy()
+
+                # Le hachage de ligne combine les hachages de colonne déjà calculés
+                lignes = lignes * np.uint64(1000003) ^ hachages
+
+                stats["nuls"] += int(nuls.sum())
+                stats["memoire"] += int(memoire[col])
+                stats["distincts"].ajouter(hachages[~nuls])
+                if not nuls.all():
+                    try:
+                        mini, maxi = serie.min(), serie.max()
+                    except TypeError:
+                        continue
+                    stats["min"] = mini if stats["min"] is None else min(stats["min"], mini)
+                    stats["max"] = maxi if stats["max"] is None else max(stats["max"], maxi)
+
+        self.distincts_lignes.ajouter(lignes)
+        self.lignes += len(df)
+        if self.tete is None or len(self.tete) < self.taille_echantillon:
+            self.tete = pd.concat([self.tete, df.head(self.taille_echantillon)]).head(self.taille_echantillon)
+        self.queue = pd.concat([self.queue, df.tail(self.taille_echantillon)]).tail(self.taille_echantillon)
+        return self
+
+    def fusionner(self, autre):
+        """
+        Combine le profil d'un autre morceau (les lignes de autre suivent celles de self).
+        """
+        for col, stats_autre in autre.colonnes.items():
+            stats = self._colonne(col, stats_autre["type"])
+            stats["nuls"] += stats_autre["nuls"]
+            stats["memoire"] += stats_autre["memoire"]
+            stats["distincts"].fusionner(stats_autre["distincts"])
+            for cle, choix in (("min", min), ("max", max)):
+                if stats_autre[cle] is not None:
+                    stats[cle] = stats_autre[cle] if stats[cle] is None else choix(stats[cle], stats_autre[cle])
+        self.distincts_lignes.fusionner(autre.distincts_lignes)
+        self.lignes += autre.lignes
+        self.tete = pd.concat([self.tete, autre.tete]).head(self.taille_echantillon)
+        self.queue = pd.concat([self.queue, autre.queue]).tail(self.taille_echantillon)
+        return self
+
+    @property
+    def doublons(self):
+        """
+        Nombre (estimé au-delà de seuil_exact) de lignes dupliquées.
+        """
+        return max(self.lignes - self.distincts_lignes.estimation(), 0)
+
+    @property
+    def shape(self):
+        return (self.lignes, len(self.colonnes))
+
+    def resume(self):
+        """
+        Tableau récapitulatif : une ligne par colonne.
+        """
+        return pd.DataFrame(
+            {
+                col: {
+                    "type": stats["type"],
+                    "nuls": stats["nuls"],
+                    "distincts": stats["distincts"].estimation(),
+                    "min": stats["min"],
+                    "max": stats["max"],
+                    "memoire": stats["memoire"],
+                }
+                for col, stats in self.colonnes.items()
+            }
+        ).T
+
+    def comparer(self, autre):
+        """
+        Compare deux profils (ex: deux chargements journaliers) colonne par colonne.
+        """
+        avant, apres = autre.resume(), self.resume()
+        comparaison = pd.concat({"avant": avant, "apres": apres}, axis=1)
+        comparaison[("ecart", "nuls")] = apres["nuls"].sub(avant["nuls"], fill_value=0)
+        comparaison[("ecart", "distincts")] = apres["distincts"].sub(avant["distincts"], fill_value=0)
+        comparaison[("ecart", "type_change")] = apres["type"].ne(avant["type"].reindex(apres.index))
+        return comparaison
+
+    def __repr__(self):
+        return (
+            f"Profil : {self.lignes} lignes x {len(self.colonnes)} colonnes, "
+            f"{self.doublons} ligne(s) dupliquée(s)\n\n"
+            f"{self.resume().to_string()}\n\n"
+            f"Premières lignes :\n{self.tete.to_string() if self.tete is not None else ''}\n\n"
+            f"Dernières lignes :\n{self.queue.to_string() if self.queue is not None else ''}"
+        )
@@ -1,73 +1,177 @@
 
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import matplotlib
 import matplotlib.pyplot as plt 
+import numpy as np
 import seaborn as sns 
 import pandas as pd 
 
-def sale_quantity(ventes , groupeby, col) : 
+from cube import CubeAgregats
+from features import ratio_marge_perte, taux_perte_relatif
+from instrumentation import instrumenter, obtenir_journal
+from segmentation import ETIQUETTES
+
+journal = obtenir_journal(__name__)
+
+# Chaque fonction accepte soit le DataFrame des ventes, soit un CubeAgregats
+# (agrégats pré-calculés, voir cube.py) pour ne pas repasser sur toutes les lignes ;
+# ratio_marge (segmentation des jours, absente du cube) attend la table journalière
+#
+# chemin : None = plt.show() ; sinon fichier (ou liste de fichiers .png/.svg) où
+#          la figure est enregistrée puis fermée
+# rapide : données agrégées par valeur de x, séries longues réduites (LTTB),
+#          pas d'intervalle de confiance, hexbin pour les grands nuages de points
+
+MAX_POINTS = 1000
+SEUIL_MARQUEURS = 200
+SEUIL_HEXBIN = 20_000
+
+
+def lttb(x, y, n_points):
+    """
+    Largest-Triangle-Three-Buckets : indices des n_points points qui gardent
+    la forme de la courbe (x trié). Premier et dernier points conservés.
+    """
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    n = len(x)
+    if n_points >= n or n_points < 3:
+        return np.arange(n)
+
+    bords = np.linspace(1, n - 1, n_points - 1).astype(np.int64)
+    indices = np.empty(n_points, dtype=np.int64)
+    indices[0], indices[-1] = 0, n - 1
+    a = 0
+    for i in range(n_points - 2):
+        debut, fin = bords[i], bords[i + 1]
+        # Point moyen du seau suivant
+        suivant = slice(fin, bords[i + 2] if i + 2 < len(bords) else n)
+        cx, cy = x[suivant].mean(), y[suivant].mean()
+        # Aire du triangle (point retenu précédent, candidat, point moyen suivant)
+        aires = np.abs((x[a] - cx) * (y[debut:fin] - y[a]) - (x[a] - x[debut:fin]) * (cy - y[a]))
+        a = debut + int(np.nanargmax(aires)) if np.isfinite(aires).any() else debut
+        indices[i + 1] = a
+    return indices
+
+
+def _reduire_series(donnees, x, y, hue, max_points=MAX_POINTS):
+    # LTTB appliqué séparément à chaque courbe
+    morceaux = []
+    for _, serie in donnees.groupby(hue, sort=False):
+        serie = serie.sort_values(x)
+        abscisses = serie[x].to_numpy()
+        if np.issubdtype(abscisses.dtype, np.datetime64):
+            abscisses = abscisses.astype("datetime64[ns]").astype(np.int64)
+        morceaux.append(serie.iloc[lttb(abscisses, serie[y].to_numpy(), max_points)])
+    return pd.concat(morceaux, ignore_index=True) if morceaux else donnees
+
+
+def _stats_boites(ventes, groupeby, col):
+    # Statistiques de boîtes (format Axes.bxp) calculées par groupe, sans les points extrêmes.
+    # Comme matplotlib.cbook.boxplot_stats : les moustaches s'arrêtent à la valeur observée
+    # la plus extrême comprise dans [Q1 - 1.5 IQR, Q3 + 1.5 IQR].
+    quantiles = ventes.groupby(groupeby)[col].quantile([0.25, 0.5, 0.75]).unstack()
+    iqr = quantiles[0.75] - quantiles[0.25]
+    bornes = pd.DataFrame({"bas": quantiles[0.25] - 1.5 * iqr, "haut": quantiles[0.75] + 1.5 * iqr})
+    valeurs = ventes[[groupeby, col]].join(bornes, on=groupeby)
+    dedans = valeurs[(valeurs[col] >= valeurs["bas"]) & (valeurs[col] <= valeurs["haut"])]
+    extremes = dedans.groupby(groupeby)[col].agg(["min", "max"]).reindex(quantiles.index)
+    stats = []
+    for groupe, ligne in quantiles.iterrows():
+        bas, haut = extremes.loc[groupe, "min"], extremes.loc[groupe, "max"]
+        stats.append({
+            "label": groupe,
+            "q1": ligne[0.25], "med": ligne[0.5], "q3": ligne[0.75],
+            "whislo": ligne[0.25] if not bas <= ligne[0.25] else bas,
+            "whishi": ligne[0.75] if not haut >= ligne[0.75] else haut,
+            "fliers": [],
+        })
+    return stats
+
+
+def ordre_segments(ventes, groupeby='QuantityCluster', col='QuantityKg'):
+    """
+    Clusters triés par moyenne de col : le premier est "Faible quantité" (ETIQUETTES),
+    quelle que soit leur numérotation (KMeans du notebook 02 ou SegmentationQuantite).
+    """
+    if isinstance(ventes, CubeAgregats):
+        return ventes.requete(groupeby, col, "mean")["mean"].sort_values().index
+    return ventes.groupby(groupeby)[col].mean().sort_values().index
+
+
+def _terminer(chemin):
+    if chemin is None:
+        plt.show()
+        return
+    chemins = [chemin] if isinstance(chemin, (str, Path)) else chemin
+    figure = plt.gcf()
+    for fichier in chemins:
+        figure.savefig(fichier)
+    plt.close(figure)
+
+@instrumenter
+def sale_quantity(ventes , groupeby, col, chemin=None, rapide=False) : 
    
-    cluster_order = (
-        ventes.groupby(groupeby)[col]
-        .mean()
-        .sort_values()  
-        .index
-    )
-
-    plt.figure(figsize=(8,6))
-    sns.boxplot(
-        data=ventes,
-        x=groupeby,
-        y=col,
-        hue=groupeby,
-        order=cluster_order, 
-        palette="pastel"
-    )
+    if isinstance(ventes, CubeAgregats) or rapide:
+        # Boîtes construites à partir des quantiles (du cube ou calculés par groupe)
+        if isinstance(ventes, CubeAgregats):
+            cluster_order = ventes.requete(groupeby, col, "mean")["mean"].sort_values().index
+            stats = {stat["label"]: stat for stat in ventes.boxplot_stats(groupeby, col)}
+        else:
+            cluster_order = ventes.groupby(groupeby)[col].mean().sort_values().index
+            stats = {stat["label"]: stat for stat in _stats_boites(ventes, groupeby, col)}
+
+        plt.figure(figsize=(8,6))
+        plt.gca().bxp(
+            [stats[groupe] for groupe in cluster_order],
+            positions=range(len(cluster_order)),
+            showfliers=False
+        )
+    else:
+        cluster_order = (
+            ventes.groupby(groupeby)[col]
+            .mean()
+            .sort_values()  
+            .index
+        )
+
+        plt.figure(figsize=(8,6))
+        sns.boxplot(
+            data=ventes,
+            x=groupeby,
+            y=col,
+            hue=groupeby,
+            order=cluster_order, 
+            palette="pastel"
+        )
 
     plt.title(f"Distribution des Quantités par segmetation", fontsize=14, fontweight="bold")
     plt.xlabel("segmentation de Quantité", fontsize=12)
     plt.ylabel("Quantité vendue (Kg)", fontsize=12)
     plt.grid(axis="y", linestyle="--", alpha=0.7)
-    plt.xticks([0,1,2], ["Faible", "Moyenne", "Grande"]) 
+    if len(cluster_order) == len(ETIQUETTES):
+        plt.xticks(range(len(cluster_order)), [ETIQUETTES[rang] for rang in range(len(cluster_order))])
 
-    plt.show()
+    _terminer(chemin)
     
   
   
-def ratio_marge(ventes): 
-    ventes['Date'] = pd.to_datetime(ventes['Date'])
+@instrumenter
+def marge_par_produit(ventes, chemin=None, rapide=False, segment=0): 
+    # segment : rang du segment de quantité (0 = faibles quantités, voir ordre_segments)
+    cluster = ordre_segments(ventes)[segment]
+    if isinstance(ventes, CubeAgregats):
+        marge_par_produit = pd.DataFrame({
+            col: ventes.requete('ItemName', col, 'mean', filtre={'QuantityCluster': cluster})['mean']
+            for col in ['Margin', 'NetMargin']
+        }).sort_values('NetMargin', ascending=False)
+    else:
+        cluster2 = ventes[ventes['QuantityCluster'] == cluster]
 
-  
-    cluster_labels = {0: "Quantité moyenne", 1: "Grande quantité", 2: "Faible quantité"}
-    ventes['Cluster_Label'] = ventes['QuantityCluster'].map(cluster_labels)
-
-
-    plt.figure(figsize=(12,6))
-    sns.lineplot(
-        data=ventes, 
-        x='Date', 
-        y='Margin_Loss_Ratio_pct', 
-        hue='Cluster_Label', 
-        marker='o', 
-        palette="Set2"
-    )
-
-    plt.title("Ratio Marge / Perte par segment (%)", fontsize=14, fontweight="bold")
-    plt.xlabel("Mois", fontsize=12)
-    plt.ylabel("Ratio Marge / Perte (%)", fontsize=12)
-    plt.grid(axis='y', linestyle='--', alpha=0.7)
-    plt.xticks(rotation=45)
-    plt.axhline(100, color='red', linestyle='--', label='Marge = Perte')
-    plt.legend(title="Segment de vente vendu pa quantité")
-    plt.tight_layout()
-    plt.show()
 
-
-
-def marge_par_produit(ventes): 
- 
-    cluster2 = ventes[ventes['QuantityCluster'] == 2]
-
-
-    marge_par_produit = cluster2.groupby('ItemName')[['Margin', 'NetMargin']].mean().sort_values('NetMargin', ascending=False)
+        marge_par_produit = cluster2.groupby('ItemName')[['Margin', 'NetMargin']].mean().sort_values('NetMargin', ascending=False)
 
     plt.figure(figsize=(10,6))
 
@@ -78,53 +182,107 @@ def marge_par_produit(ventes):
         color='steelblue'
     )
 
-    plt.title("Top produits par marge nette (Vente 3)")
+    plt.title(f"Top produits par marge nette ({ETIQUETTES.get(segment, segment)})")
     plt.xlabel("Marge nette moyenne")
     plt.ylabel("Produit")
     plt.tight_layout()
-    plt.show()
+    _terminer(chemin)
 
 
-def relation_prix(ventes): 
+@instrumenter
+def relation_prix(ventes, chemin=None, rapide=False): 
+
+    # RelativeLossRate absent (ex. cube construit depuis ventes_not_seasonal) : recalculé
+    # à partir de LossRate et QuantityKg ; ventes n'est pas modifié
+    perte = ['RelativeLossRate'] if 'RelativeLossRate' in _colonnes_disponibles(ventes) else ['LossRate']
+    _verifier_colonnes(ventes, ['QuantityKg', 'UnitPrice'] + perte, "relation_prix", "ventes")
+
+    if isinstance(ventes, CubeAgregats):
+        # Un point par article et par jour (moyennes des cellules du cube)
+        ventes = pd.DataFrame({
+            col: ventes.requete(['Date', 'ItemCode'], col, 'mean')['mean']
+            for col in ['QuantityKg', 'UnitPrice'] + perte
+        }).reset_index()
+    if 'RelativeLossRate' not in ventes:
+        ventes = ventes.assign(RelativeLossRate=taux_perte_relatif(ventes['LossRate'], ventes['QuantityKg']))
 
     plt.figure(figsize=(10,6))
 
-   
-    sns.scatterplot(
-        data=ventes, 
-        x='QuantityKg', 
-        y='UnitPrice', 
-        hue='RelativeLossRate', 
-        palette='coolwarm', 
-        size='QuantityKg',   
-        sizes=(20, 200),
-        alpha=0.7
-    )
+    if rapide and len(ventes) > SEUIL_HEXBIN:
+        # Trop de points : densité hexagonale, couleur = taux de perte relatif moyen
+        hexagones = plt.hexbin(
+            ventes['QuantityKg'], 
+            ventes['UnitPrice'], 
+            C=ventes['RelativeLossRate'], 
+            reduce_C_function=np.nanmean, 
+            gridsize=60, 
+            cmap='coolwarm', 
+            mincnt=1
+        )
+        plt.colorbar(hexagones, label='RelativeLossRate')
+    else:
+        sns.scatterplot(
+            data=ventes, 
+            x='QuantityKg', 
+            y='UnitPrice', 
+            hue='RelativeLossRate', 
+            palette='coolwarm', 
+            size='QuantityKg',   
+            sizes=(20, 200),
+            alpha=0.7
+        )
 
     plt.title("Relation entre Quantité vendue, Prix unitaire et Taux de perte relatif")
     plt.xlabel("Quantité vendue (Kg)")
     plt.ylabel("Prix unitaire")
 
-    plt.show()
+    _terminer(chemin)
 
 
-def ratio_marge(ventes): 
+@instrumenter
+def ratio_marge(ventes, chemin=None, rapide=False): 
    
-    ventes['Margin_Loss_Ratio_pct'] = (ventes['MarginRate'] / ventes['LossRate']) * 100
-
-
     segment_labels = {0: 'Vente 1', 1: 'Vente 2', 2: 'Vente 3'}
-    ventes['segmentation_label'] = ventes['segmentation'].map(segment_labels)
 
-    
+    if isinstance(ventes, CubeAgregats):
+        # La segmentation des jours (colonne segmentation de ventes_seasonal) n'est
+        # pas une dimension du cube : QuantityCluster est une autre segmentation
+        raise ValueError("ratio_marge attend la table journalière (SaleDate, segmentation), pas un CubeAgregats")
+    if 'SaleDate' in ventes.index.names:
+        ventes = ventes.reset_index()
+
+    # Le ratio est repris s'il est déjà calculé ; ventes n'est pas modifié
+    if 'Margin_Loss_Ratio_pct' in ventes:
+        ratio = ventes['Margin_Loss_Ratio_pct']
+    else:
+        ratio = ratio_marge_perte(ventes['MarginRate'], ventes['LossRate'])
+
+
+    donnees = pd.DataFrame({
+        'SaleDate': ventes['SaleDate'],
+        'Margin_Loss_Ratio_pct': ratio,
+        'segmentation_label': ventes['segmentation'].map(segment_labels),
+    })
+
+    marker = 'o'
+    if rapide:
+        # Une valeur moyenne par date et par segment, courbes longues réduites
+        donnees['SaleDate'] = pd.to_datetime(donnees['SaleDate'])
+        donnees = (donnees.groupby(['segmentation_label', 'SaleDate'])['Margin_Loss_Ratio_pct']
+                   .mean().reset_index())
+        donnees = _reduire_series(donnees, 'SaleDate', 'Margin_Loss_Ratio_pct', 'segmentation_label')
+        if donnees.groupby('segmentation_label').size().max() > SEUIL_MARQUEURS:
+            marker = None
+
     plt.figure(figsize=(10,6))
     sns.lineplot(
-        data=ventes,
+        data=donnees,
         x='SaleDate',
         y='Margin_Loss_Ratio_pct',
         hue='segmentation_label', 
-        marker='o',
-        palette="Set2"
+        marker=marker,
+        palette="Set2",
+        errorbar=None if rapide else ('ci', 95)
     )
 
     plt.title("Ratio Marge / Perte par segment (%)", fontsize=14, fontweight="bold")
@@ -137,6 +295,92 @@ def ratio_marge(ventes):
     plt.axhline(100, color='red', linestyle='--', label='Marge = Perte')
 
     plt.legend(title='Segmentation')
-    plt.show()
-
-
+    _terminer(chemin)
+
+
+# Génération du rapport complet (sans affichage)
+
+def _initialiser_worker():
+    matplotlib.use("Agg")
+
+
+def _rendre(nom, args, chemins):
+    globals()[nom](*args, chemin=chemins, rapide=True)
+    return chemins
+
+
+def _colonnes_disponibles(df):
+    if isinstance(df, CubeAgregats):
+        return set(df.dimensions) | {m for m in df.mesures if f"{m}__sum" in df.cellules}
+    return set(df.columns) | {nom for nom in df.index.names if nom is not None}
+
+
+def _verifier_colonnes(df, noms, figure, table):
+    if df is None:
+        raise ValueError(f"Figure {figure} : {table} est requis")
+    disponibles = _colonnes_disponibles(df)
+    manquantes = [nom for nom in noms if nom not in disponibles]
+    if manquantes:
+        raise ValueError(f"Figure {figure} : colonnes absentes de {table} : {manquantes}")
+
+
+@instrumenter
+def generer_rapport(ventes, dossier, ventes_journalieres, formats=("png", "svg"), max_workers=None):
+    """
+    Enregistre toutes les figures du rapport dans dossier (une par format),
+    rendues en parallèle dans des processus séparés.
+
+    ventes : ventes par transaction (ventes_not_seasonal) ou CubeAgregats
+    ventes_journalieres : table journalière (ventes_seasonal) pour ratio_marge
+                          et relation_prix (SaleDate, segmentation, RelativeLossRate...)
+    Renvoie la liste des fichiers créés.
+    """
+    journalieres = ventes_journalieres
+    ratio = ['Margin_Loss_Ratio_pct']
+    if isinstance(journalieres, pd.DataFrame) and 'Margin_Loss_Ratio_pct' not in journalieres:
+        ratio = ['MarginRate', 'LossRate']
+    perte = ['RelativeLossRate']
+    if journalieres is not None and 'RelativeLossRate' not in _colonnes_disponibles(journalieres):
+        perte = ['LossRate']
+    besoins = {
+        "sale_quantity": (ventes, "ventes", ['QuantityCluster', 'QuantityKg']),
+        "marge_par_produit": (ventes, "ventes", ['QuantityCluster', 'QuantityKg', 'ItemName', 'Margin', 'NetMargin']),
+        "ratio_marge": (journalieres, "ventes_journalieres", ['SaleDate', 'segmentation'] + ratio),
+        "relation_prix": (journalieres, "ventes_journalieres", ['QuantityKg', 'UnitPrice'] + perte),
+    }
+    # Vérifié avant de lancer les processus : une erreur claire plutôt qu'un KeyError dans un worker
+    for figure, (df, table, noms) in besoins.items():
+        _verifier_colonnes(df, noms, figure, table)
+
+    dossier = Path(dossier)
+    dossier.mkdir(parents=True, exist_ok=True)
+
+    def colonnes(df, noms):
+        # Seules les colonnes utiles sont envoyées aux processus
+        if isinstance(df, CubeAgregats):
+            return df
+        if any(nom in df.index.names for nom in noms):
+            df = df.reset_index()
+        return df[[nom for nom in noms if nom in df]]
+
+    taches = {
+        "sale_quantity": ("sale_quantity", (colonnes(ventes, ['QuantityCluster', 'QuantityKg']),
+                                            'QuantityCluster', 'QuantityKg')),
+        "ratio_marge": ("ratio_marge", (colonnes(journalieres, ['SaleDate', 'segmentation', 'Margin_Loss_Ratio_pct',
+                                                                'MarginRate', 'LossRate']),)),
+        "marge_par_produit": ("marge_par_produit", (colonnes(ventes, ['QuantityCluster', 'QuantityKg', 'ItemName',
+                                                                      'Margin', 'NetMargin']),)),
+        "relation_prix": ("relation_prix", (colonnes(journalieres, ['QuantityKg', 'UnitPrice',
+                                                                    'RelativeLossRate', 'LossRate']),)),
+    }
+
+    fichiers = []
+    with ProcessPoolExecutor(max_workers=max_workers, initializer=_initialiser_worker) as executor:
+        futures = {
+            executor.submit(_rendre, nom, args, [dossier / f"{figure}.{fmt}" for fmt in formats]): figure
+            for figure, (nom, args) in taches.items()
+        }
+        for future, figure in futures.items():
+            fichiers.extend(future.result())
+            journal.info("Figure %s enregistrée", figure)
+    return fichiers
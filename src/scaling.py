@@ -0,0 +1,129 @@
+import json
+
+import numpy as np
+
+from bornes import Moments, TDigest
+
+
+# Mise à l'échelle réutilisable (mêmes formules que MinMaxScaler, StandardScaler, RobustScaler)
+# Les paramètres sont ajustés une fois (fit) ou par lots (partial_fit), puis
+# réappliqués à de nouvelles données sans recalcul. Seules les colonnes
+# sélectionnées sont lues : pas de copie du DataFrame entier.
+
+METHODES = ("minmax", "standard", "robust")
+
+
+class Echelle:
+    """
+    methode : 'minmax' | 'standard' | 'robust'
+    dtype : type du bloc renvoyé par transform (float32 par défaut)
+    compression : précision du t-digest utilisé par partial_fit en mode 'robust'
+    """
+
+    def __init__(self, methode="standard", dtype=np.float32, compression=200):
+        if methode not in METHODES:
+            raise ValueError(f"Méthode inconnue : {methode} (attendu : {METHODES})")
+        self.methode = methode
+        self.dtype = np.dtype(dtype)
+        self.compression = compression
+        self.colonnes = None
+        self.resumes = None
+        self.centre = None
+        self.echelle = None
+
+    def _nouveau_resume(self):
+        return TDigest(self.compression) if self.methode == "robust" else Moments()
+
+    def fit(self, ventes, colonnes):
+        """
+        Ajuste sur toutes les lignes ; en mode 'robust' les quantiles sont exacts.
+        """
+        self.colonnes = list(colonnes)
+        # Quantiles exacts (t-digest sans compression) quand toutes les données sont disponibles
+        self.resumes = {
+            col: TDigest(compression=None) if self.methode == "robust" else Moments()
+            for col in self.colonnes
+        }
+        return self.partial_fit(ventes)
+
+    def partial_fit(self, ventes, colonnes=None):
+        """
+        Met à jour les paramètres avec un nouveau lot (aucune relecture des lots précédents).
+
+        colonnes : utilisé au premier lot seulement ; si absent (et sans
+        échelle chargée), les colonnes numériques du premier lot.
+        """
+        if self.resumes is None:
+            if colonnes is None:
+                colonnes = self.colonnes
+            if colonnes is None:
+                colonnes = ventes.select_dtypes(include="number").columns
+                if len(colonnes) == 0:
+                    raise ValueError("partial_fit : aucune colonne numérique dans le premier lot, "
+                                     "préciser colonnes")
+            self.colonnes = list(colonnes)
+            self.resumes = {col: self._nouveau_resume() for col in self.colonnes}
+        for col in self.colonnes:
+            self.resumes[col].ajouter(ventes[col].to_numpy(dtype=np.float64))
+        self._parametres()
+        return self
+
+    def _parametres(self):
+        centre, echelle = [], []
+        for col in self.colonnes:
+            resume = self.resumes[col]
+            if self.methode == "minmax":
+                c, e = resume.min, resume.max - resume.min
+            elif self.methode == "standard":
+                c, e = resume.moyenne, resume.ecart_type(ddof=0)
+            else:
+                q1, mediane, q3 = resume.quantile([0.25, 0.5, 0.75])
+                c, e = mediane, q3 - q1
+            centre.append(float(c))
+            # Comme scikit-learn : une échelle nulle est remplacée par 1
+            echelle.append(float(e) if e and np.isfinite(e) else 1.0)
+        self.centre = np.asarray(centre)
+        self.echelle = np.asarray(echelle)
+
+    def transform(self, ventes, inplace=False):
+        """
+        inplace=False : renvoie un bloc numpy (lignes x colonnes) de type self.dtype.
+        inplace=True : remplace les colonnes dans ventes et renvoie ventes.
+        """
+        if self.centre is None:
+            raise ValueError("L'échelle doit être ajustée (fit) ou chargée avant transform")
+        if inplace:
+            for j, col in enumerate(self.colonnes):
+                valeurs = ventes[col].to_numpy(dtype=np.float64)
+                ventes[col] = ((valeurs - self.centre[j]) / self.echelle[j]).astype(self.dtype)
+            return ventes
+
+        bloc = np.empty((len(ventes), len(self.colonnes)), dtype=self.dtype)
+        for j, col in enumerate(self.colonnes):
+            valeurs = ventes[col].to_numpy(dtype=np.float64)
+            np.divide(valeurs - self.centre[j], self.echelle[j], out=bloc[:, j], casting="same_kind")
+        return bloc
+
+    def fit_transform(self, ventes, colonnes, inplace=False):
+        return self.fit(ventes, colonnes).transform(ventes, inplace=inplace)
+
+    def inverse_transform(self, bloc):
+        return np.asarray(bloc, dtype=np.float64) * self.echelle + self.centre
+
+    def sauvegarder(self, chemin):
+        with open(chemin, "w", encoding="utf-8") as f:
+            json.dump({"methode": self.methode, "dtype": self.dtype.name, "colonnes": self.colonnes,
+                       "centre": self.centre.tolist(), "echelle": self.echelle.tolist()}, f)
+
+    @classmethod
+    def charger(cls, chemin):
+        """
+        Recharge les paramètres (transform possible ; partial_fit recommence à zéro).
+        """
+        with open(chemin, encoding="utf-8") as f:
+            params = json.load(f)
+        echelle = cls(params["methode"], dtype=params["dtype"])
+        echelle.colonnes = params["colonnes"]
+        echelle.centre = np.asarray(params["centre"])
+        echelle.echelle = np.asarray(params["echelle"])
+        return echelle
@@ -0,0 +1,154 @@
+import json
+
+import numpy as np
+import pandas as pd
+
+
+# Segmentation des quantités vendues (QuantityCluster)
+# K-means optimal en 1-D (programmation dynamique sur les valeurs triées, type Ckmeans) :
+# - les clusters d'un k-means 1-D sont des intervalles consécutifs des valeurs triées
+# - le coût d'un intervalle se calcule en O(1) avec des sommes cumulées
+# - la programmation dynamique donne la solution exacte pour tous les k de 1 à k_max en un passage
+# Les labels sont triés par taille : 0 = faibles quantités, k-1 = grandes quantités.
+
+ETIQUETTES = {0: "Faible quantité", 1: "Quantité moyenne", 2: "Grande quantité"}
+
+
+class SegmentationQuantite:
+    """
+    k : nombre de segments (None = choisi par la méthode du coude entre 1 et k_max)
+    echantillon : nombre maximal de valeurs utilisées pour l'ajustement
+                  (None = toutes les valeurs)
+    """
+
+    def __init__(self, k=None, k_max=10, echantillon=None, random_state=42):
+        self.k = k
+        self.k_max = k_max
+        self.echantillon = echantillon
+        self.random_state = random_state
+        self.centres = None
+        self.coupures = None
+        self.inerties = None
+
+    def fit(self, valeurs):
+        x = np.asarray(valeurs, dtype=np.float64).ravel()
+        x = x[~np.isnan(x)]
+        if self.echantillon is not None and len(x) > self.echantillon:
+            rng = np.random.default_rng(self.random_state)
+            x = rng.choice(x, self.echantillon, replace=False)
+
+        # Valeurs distinctes pondérées par leur effectif
+        uniques, poids = np.unique(x, return_counts=True)
+        k_max = min(self.k if self.k is not None else self.k_max, len(uniques))
+        couts, choix = _programmation_dynamique(uniques, poids.astype(np.float64), k_max)
+        self.inerties = couts[:, -1].tolist()
+
+        k = self.k if self.k is not None else coude(self.inerties)
+        k = min(k, len(uniques))
+        debuts = _segments(choix, k, len(uniques))
+        fins = np.r_[debuts[1:], len(uniques)]
+        self.centres = [
+            float(np.average(uniques[d:f], weights=poids[d:f])) for d, f in zip(debuts, fins)
+        ]
+        # Un point nouveau va au centre le plus proche : coupures au milieu des centres
+        self.coupures = [(a + b) / 2 for a, b in zip(self.centres[:-1], self.centres[1:])]
+        self.k = k
+        return self
+
+    def predict(self, valeurs):
+        """
+        Segment de chaque valeur par recherche binaire dans les coupures (sans réajustement).
+        Les valeurs manquantes ou infinies sont classées -1.
+        """
+        if self.coupures is None:
+            raise ValueError("Le modèle doit être ajusté (fit) ou chargé avant predict")
+        x = np.asarray(valeurs, dtype=np.float64)
+        labels = np.searchsorted(np.asarray(self.coupures), x, side="left")
+        return np.where(np.isfinite(x), labels, -1)
+
+    def fit_predict(self, valeurs):
+        return self.fit(valeurs).predict(valeurs)
+
+    def etiqueter(self, labels):
+        """
+        Noms des segments (uniquement pour k = 3, voir ETIQUETTES).
+        """
+        return pd.Series(labels).map(ETIQUETTES)
+
+    def sauvegarder(self, chemin):
+        with open(chemin, "w", encoding="utf-8") as f:
+            json.dump({"k": self.k, "centres": self.centres, "coupures": self.coupures,
+                       "inerties": self.inerties}, f)
+
+    @classmethod
+    def charger(cls, chemin):
+        with open(chemin, encoding="utf-8") as f:
+            params = json.load(f)
+        modele = cls(k=params["k"])
+        modele.centres = params["centres"]
+        modele.coupures = params["coupures"]
+        modele.inerties = params["inerties"]
+        return modele
+
+
+def coude(inerties):
+    """
+    Méthode du coude : k dont le point (k, inertie) est le plus éloigné de la
+    droite reliant le premier et le dernier point (axes normalisés).
+    """
+    y = np.asarray(inerties, dtype=np.float64)
+    if len(y) < 3 or y[0] == y[-1]:
+        return 1
+    x = np.linspace(0, 1, len(y))
+    y = (y - y[-1]) / (y[0] - y[-1])
+    return int(np.argmax((1 - x) - y)) + 1
+
+
+def _programmation_dynamique(x, w, k_max):
+    """
+    couts[m, i] : inertie minimale des valeurs x[0..i] en m + 1 segments
+    choix[m, i] : début du dernier segment de cette solution
+    Chaque couche est calculée par "diviser pour régner" : le début optimal
+    du dernier segment est croissant avec i.
+    """
+    n = len(x)
+    s1 = np.r_[0, np.cumsum(w * x)]
+    s2 = np.r_[0, np.cumsum(w * x * x)]
+    sw = np.r_[0, np.cumsum(w)]
+
+    def cout(j, i):
+        # Inertie du segment x[j..i] (j peut être un tableau)
+        poids = sw[i + 1] - sw[j]
+        somme = s1[i + 1] - s1[j]
+        return np.maximum(s2[i + 1] - s2[j] - somme * somme / poids, 0)
+
+    couts = np.full((k_max, n), np.inf)
+    choix = np.zeros((k_max, n), dtype=np.int64)
+    couts[0] = cout(np.zeros(n, dtype=np.int64), np.arange(n))
+
+    for m in range(1, k_max):
+        precedent = couts[m - 1]
+        pile = [(m, n - 1, m, n - 1)]
+        while pile:
+            i_min, i_max, j_min, j_max = pile.pop()
+            if i_min > i_max:
+                continue
+            i = (i_min + i_max) // 2
+            j = np.arange(max(j_min, m), min(i, j_max) + 1)
+            valeurs = precedent[j - 1] + cout(j, i)
+            meilleur = int(np.argmin(valeurs))
+            couts[m, i] = valeurs[meilleur]
+            choix[m, i] = j[meilleur]
+            pile.append((i_min, i - 1, j_min, choix[m, i]))
+            pile.append((i + 1, i_max, choix[m, i], j_max))
+    return couts, choix
+
+
+def _segments(choix, k, n):
+    debuts = []
+    fin = n - 1
+    for m in range(k - 1, -1, -1):
+        debut = int(choix[m, fin]) if m > 0 else 0
+        debuts.append(debut)
+        fin = debut - 1
+    return np.asarray(debuts[::-1])
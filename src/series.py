@@ -0,0 +1,202 @@
+import bisect
+
+import numpy as np
+import pandas as pd
+
+
+# Agrégation temporelle incrémentale (table journalière "ventes_seasonal")
+# Chaque jour est résumé par la somme et l'effectif de chaque colonne ;
+# les tables hebdomadaires / mensuelles, la fenêtre glissante et les moments
+# des valeurs journalières (brutes et log1p) sont mis à jour pour les seuls
+# jours touchés, sans relire l'historique. Les jours peuvent arriver dans le désordre.
+
+
+class MomentsMultivaries:
+    """
+    Effectif, moyenne et matrice des co-moments de vecteurs (une ligne = un jour).
+    Ajout, retrait et fusion sont exacts ; cov() et corr() en découlent.
+    Les lignes incomplètes (NaN, infini) sont ignorées, à l'ajout comme au retrait.
+    """
+
+    def __init__(self, p):
+        self.n = 0
+        self.moyenne = np.zeros(p)
+        self.comoments = np.zeros((p, p))
+
+    def ajouter(self, x):
+        x = np.asarray(x, dtype=np.float64)
+        if not np.isfinite(x).all():
+            return self
+        self.n += 1
+        delta = x - self.moyenne
+        self.moyenne += delta / self.n
+        self.comoments += np.outer(delta, x - self.moyenne)
+        return self
+
+    def retirer(self, x):
+        x = np.asarray(x, dtype=np.float64)
+        if not np.isfinite(x).all():
+            return self
+        if self.n <= 1:
+            self.__init__(len(x))
+            return self
+        delta = x - self.moyenne
+        self.n -= 1
+        self.moyenne -= delta / self.n
+        self.comoments -= np.outer(delta, x - self.moyenne)
+        return self
+
+    def fusionner(self, autre):
+        if autre.n == 0:
+            return self
+        n = self.n + autre.n
+        delta = autre.moyenne - self.moyenne
+        self.comoments += autre.comoments + np.outer(delta, delta) * self.n * autre.n / n
+        self.moyenne += delta * autre.n / n
+        self.n = n
+        return self
+
+    def cov(self, ddof=1):
+        return self.comoments / (self.n - ddof) if self.n > ddof else np.full_like(self.comoments, np.nan)
+
+    def corr(self):
+        cov = self.cov()
+        ecart = np.sqrt(np.diag(cov))
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return cov / np.outer(ecart, ecart)
+
+
+class SerieTemporelle:
+    """
+    colonnes : colonnes numériques agrégées par jour
+    moyennes : colonnes agrégées par la moyenne (les autres par la somme),
+               comme custom_agg du notebook 03 (LossRate en moyenne)
+    fenetre : nombre de jours de la fenêtre glissante
+    decalage : décalage de la table saisonnière log1p(x + decalage) ; None = |min| + 1
+               des jours du premier ajout, puis gardé fixe pour que les moments
+               des valeurs log restent incrémentaux
+    """
+
+    def __init__(self, colonnes, date_col="DateTime", moyennes=("LossRate",), fenetre=7, decalage=None):
+        self.colonnes = list(colonnes)
+        self.date_col = date_col
+        self.est_moyenne = np.array([col in moyennes for col in self.colonnes])
+        self.fenetre = fenetre
+        p = len(self.colonnes)
+        self.jours = {}  # jour -> (sommes, effectifs)
+        self.periodes = {"W": {}, "M": {}}  # période -> (sommes, effectifs)
+        self.decalage = decalage
+        self.moments = MomentsMultivaries(p)
+        self.moments_log = MomentsMultivaries(p)
+        self.ordre = []  # jours stockés, triés
+        self.historique_glissant = {}  # jour -> moyenne des fenetre derniers jours stockés
+
+    def _valeur(self, sommes, effectifs):
+        # Valeur journalière : somme, ou moyenne pour les colonnes concernées
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return np.where(self.est_moyenne, sommes / effectifs, sommes)
+
+    def _log(self, valeurs):
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return np.log1p(valeurs + self.decalage)
+
+    def ajouter(self, ventes):
+        """
+        Ajoute des ventes (lignes de transactions). Le coût dépend du nombre de
+        lignes ajoutées et du nombre de jours touchés, pas de l'historique.
+        """
+        jours = pd.to_datetime(ventes[self.date_col]).dt.normalize()
+        valeurs = ventes[self.colonnes].astype(np.float64)
+        sommes = valeurs.groupby(jours.to_numpy()).sum()
+        effectifs = valeurs.notna().groupby(jours.to_numpy()).sum()
+        if self.decalage is None and len(sommes):
+            premiers = self._valeur(sommes.to_numpy(), effectifs.to_numpy(dtype=np.float64))
+            self.decalage = abs(np.nanmin(premiers)) + 1 if np.isfinite(premiers).any() else 1.0
+        touches = []
+        for jour in sommes.index:
+            jour = pd.Timestamp(jour)
+            self._ajouter_jour(jour, sommes.loc[jour].to_numpy(), effectifs.loc[jour].to_numpy(dtype=np.float64))
+            touches.append(jour)
+        self._recalculer_fenetre(touches)
+        return self
+
+    def _ajouter_jour(self, jour, sommes, effectifs):
+        ancien = self.jours.get(jour)
+        if ancien is not None:
+            # Jour déjà présent (ventes tardives) : on remplace sa ligne dans les moments
+            self.moments.retirer(self._valeur(*ancien))
+            self.moments_log.retirer(self._log(self._valeur(*ancien)))
+            sommes, effectifs = ancien[0] + sommes, ancien[1] + effectifs
+        else:
+            bisect.insort(self.ordre, jour)
+        self.jours[jour] = (sommes, effectifs)
+        self.moments.ajouter(self._valeur(sommes, effectifs))
+        self.moments_log.ajouter(self._log(self._valeur(sommes, effectifs)))
+
+        ajout = (sommes - ancien[0], effectifs - ancien[1]) if ancien is not None else (sommes, effectifs)
+        for frequence, periodes in self.periodes.items():
+            periode = jour.to_period(frequence).start_time
+            cumul = periodes.get(periode, (0, 0))
+            periodes[periode] = (cumul[0] + ajout[0], cumul[1] + ajout[1])
+
+    def _recalculer_fenetre(self, jours):
+        # Un jour modifié ou inséré change sa moyenne et celles des fenetre - 1
+        # jours stockés qui le suivent ; les autres moyennes restent valables
+        positions = set()
+        for jour in jours:
+            debut = bisect.bisect_left(self.ordre, jour)
+            positions.update(range(debut, min(debut + self.fenetre, len(self.ordre))))
+        for position in positions:
+            fenetre = self.ordre[max(0, position - self.fenetre + 1):position + 1]
+            valeurs = [np.nan_to_num(self._valeur(*self.jours[j])) for j in fenetre]
+            self.historique_glissant[self.ordre[position]] = np.sum(valeurs, axis=0) / len(fenetre)
+
+    def _table(self, cumuls, index_nom):
+        if not cumuls:
+            return pd.DataFrame(columns=self.colonnes)
+        dates = sorted(cumuls)
+        lignes = [self._valeur(*cumuls[d]) for d in dates]
+        return pd.DataFrame(lignes, index=pd.DatetimeIndex(dates, name=index_nom), columns=self.colonnes)
+
+    def quotidien(self):
+        """
+        Table journalière (équivalent de ventes_daily / ventes_seasonal avant log).
+        """
+        return self._table(self.jours, "SaleDate")
+
+    def hebdomadaire(self):
+        return self._table(self.periodes["W"], "Semaine")
+
+    def mensuel(self):
+        return self._table(self.periodes["M"], "Mois")
+
+    def saisonnier(self):
+        """
+        Table journalière transformée comme dans le notebook 04 :
+        log1p(x + decalage), avec le décalage fixé au premier ajout.
+        """
+        return self._log(self.quotidien())
+
+    def moyenne_glissante(self):
+        """
+        Pour chaque jour stocké, moyenne des fenetre derniers jours stockés
+        (équivalent de quotidien().fillna(0).rolling(fenetre, min_periods=1).mean()).
+        """
+        if not self.historique_glissant:
+            return pd.DataFrame(columns=self.colonnes)
+        jours = sorted(self.historique_glissant)
+        return pd.DataFrame([self.historique_glissant[j] for j in jours],
+                            index=pd.DatetimeIndex(jours, name="SaleDate"), columns=self.colonnes)
+
+    def corr(self, brut=False):
+        """
+        Matrice de corrélation de la table saisonnière (log1p, voir saisonnier()),
+        tenue à jour jour par jour comme celle des valeurs brutes (brut=True).
+        Les jours incomplets (LossRate sans vente) sont exclus.
+        """
+        moments = self.moments if brut else self.moments_log
+        return pd.DataFrame(moments.corr(), index=self.colonnes, columns=self.colonnes)
+
+    def cov(self, brut=False):
+        moments = self.moments if brut else self.moments_log
+        return pd.DataFrame(moments.cov(), index=self.colonnes, columns=self.colonnes)
@@ -0,0 +1,216 @@
+import sqlite3
+import threading
+
+import numpy as np
+import pandas as pd
+
+from instrumentation import obtenir_journal
+
+journal = obtenir_journal(__name__)
+
+
+# Connexions SQLite partagées : une connexion par base et par thread, réutilisée
+# par tous les objets du thread au lieu d'une connexion par chargement.
+# Une connexion sqlite3 ne supporte pas les accès concurrents : les threads de
+# charger_sources ont chacun la leur. check_same_thread=False sert seulement à
+# fermer_connexions, qui peut les fermer depuis un autre thread.
+_connexions = {}  # (thread, chemin) -> connexion
+_verrou = threading.Lock()
+
+
+def connexion(chemin):
+    """
+    Renvoie la connexion du thread courant vers la base SQLite chemin (créée au premier appel).
+    """
+    thread = threading.current_thread()
+    with _verrou:
+        conn = _connexions.get((thread, chemin))
+        if conn is None:
+            # Les connexions des threads terminés (pools de charger_sources) sont fermées
+            for cle in [cle for cle in _connexions if not cle[0].is_alive()]:
+                _connexions.pop(cle).close()
+            conn = sqlite3.connect(chemin, check_same_thread=False)
+            _connexions[(thread, chemin)] = conn
+        return conn
+
+
+def fermer_connexions():
+    with _verrou:
+        for conn in _connexions.values():
+            conn.close()
+        _connexions.clear()
+
+
+def _nom(identifiant):
+    # Les noms de table / colonne ne peuvent pas être passés en paramètre SQL
+    return '"' + str(identifiant).replace('"', '""') + '"'
+
+
+def _borne(valeur):
+    # Bornes lues comme dans data_loader._filtrer_dates (pd.Timestamp), écrites comme
+    # les dates texte SQLite : 'YYYY-MM-DD' pour un jour (str(Timestamp) ajouterait
+    # ' 00:00:00' et exclurait ce jour des colonnes sans heure), avec l'heure sinon
+    instant = pd.Timestamp(valeur)
+    if instant == instant.normalize():
+        return instant.strftime("%Y-%m-%d")
+    return instant.isoformat(sep=" ")
+
+
+class SourceSQL:
+    """
+    Lecture d'une table SQLite avec filtres poussés dans la clause WHERE.
+
+    table : table à lire
+    columns : colonnes à lire (None = toutes)
+    date_col / item_col : colonnes utilisées par les filtres de dates et d'articles
+    """
+
+    def __init__(self, chemin, table, columns=None, date_col=None, item_col=None):
+        self.chemin = chemin
+        self.table = table
+        self.columns = columns
+        self.date_col = date_col
+        self.item_col = item_col
+
+    @property
+    def conn(self):
+        return connexion(self.chemin)
+
+    def colonnes(self):
+        """
+        Colonnes lues et leur type déclaré dans la base.
+        """
+        infos = self.conn.execute(f"PRAGMA table_info({_nom(self.table)})").fetchall()
+        types = {info[1]: (info[2] or "").upper() for info in infos}
+        if not types:
+            raise ValueError(f"Table introuvable : {self.table}")
+        noms = self.columns if self.columns is not None else list(types)
+        return [(nom, types.get(nom, "")) for nom in noms]
+
+    def _where(self, start=None, end=None, items=None):
+        conditions, params = [], []
+        if start is not None or end is not None:
+            if self.date_col is None:
+                raise ValueError("date_col doit être défini pour filtrer par date")
+            if start is not None:
+                conditions.append(f"{_nom(self.date_col)} >= ?")
+                params.append(_borne(start))
+            if end is not None:
+                conditions.append(f"{_nom(self.date_col)} <= ?")
+                params.append(_borne(end))
+        if items is not None:
+            if self.item_col is None:
+                raise ValueError("item_col doit être défini pour filtrer par article")
+            items = list(items)
+            conditions.append(f"{_nom(self.item_col)} IN ({', '.join('?' * len(items))})")
+            params.extend(items)
+        if not conditions:
+            return "", params
+        return " WHERE " + " AND ".join(conditions), params
+
+    def requete(self, start=None, end=None, items=None, limit=None):
+        """
+        Construit la requête SELECT paramétrée (texte, paramètres).
+        """
+        colonnes = ", ".join(_nom(nom) for nom, _ in self.colonnes())
+        where, params = self._where(start, end, items)
+        sql = f"SELECT {colonnes} FROM {_nom(self.table)}{where}"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(int(limit))
+        return sql, params
+
+    def compter(self, start=None, end=None, items=None, limit=None):
+        where, params = self._where(start, end, items)
+        n = self.conn.execute(f"SELECT COUNT(*) FROM {_nom(self.table)}{where}", params).fetchone()[0]
+        return n if limit is None else min(n, int(limit))
+
+    def charger(self, start=None, end=None, items=None, limit=None, chunksize=50_000):
+        """
+        Charge le résultat dans un DataFrame, en une seule lecture de la table.
+
+        Chaque bloc (fetchmany) est converti colonne par colonne en tableau numpy,
+        typé d'après les valeurs réellement stockées (SQLite ne garantit pas le
+        type déclaré), puis les blocs sont concaténés.
+        """
+        noms = [nom for nom, _ in self.colonnes()]
+        blocs = [[] for _ in noms]
+        for colonnes in self._blocs(start, end, items, limit, chunksize):
+            for j, tableau in enumerate(colonnes):
+                blocs[j].append(tableau)
+        return pd.DataFrame({nom: _assembler(morceaux) for nom, morceaux in zip(noms, blocs)}, columns=noms)
+
+    def iter_chunks(self, start=None, end=None, items=None, limit=None, chunksize=50_000):
+        """
+        Même requête que charger, renvoyée par morceaux de chunksize lignes
+        (même conversion des valeurs, bloc par bloc).
+        """
+        noms = [nom for nom, _ in self.colonnes()]
+        for colonnes in self._blocs(start, end, items, limit, chunksize):
+            yield pd.DataFrame({nom: _assembler([tableau]) for nom, tableau in zip(noms, colonnes)}, columns=noms)
+
+    def _blocs(self, start, end, items, limit, chunksize):
+        # Blocs fetchmany convertis colonne par colonne (voir _convertir)
+        sql, params = self.requete(start, end, items, limit)
+        curseur = self.conn.execute(sql, params)
+        try:
+            while True:
+                lignes = curseur.fetchmany(chunksize)
+                if not lignes:
+                    break
+                yield [_convertir(valeurs) for valeurs in zip(*lignes)]
+        finally:
+            curseur.close()
+
+    def creer_index(self):
+        """
+        Crée les index utilisés par les filtres (date, article, article + date).
+        """
+        index = []
+        if self.date_col is not None:
+            index.append([self.date_col])
+        if self.item_col is not None:
+            index.append([self.item_col])
+        if self.date_col is not None and self.item_col is not None:
+            index.append([self.item_col, self.date_col])
+        for cols in index:
+            nom = "idx_" + "_".join([self.table] + cols).replace(" ", "_")
+            self.conn.execute(
+                f"CREATE INDEX IF NOT EXISTS {_nom(nom)} ON {_nom(self.table)} "
+                f"({', '.join(_nom(c) for c in cols)})"
+            )
+        self.conn.commit()
+        journal.info("Index créés sur %s : %s", self.table, index)
+
+
+_NUMERIQUES = {int, float, type(None)}
+
+
+def _convertir(valeurs):
+    """
+    Tableau d'un bloc de valeurs : int64 si toutes sont entières, float64 (NULL -> NaN)
+    s'il y a des réels ou des NULL parmi des nombres, object sinon (texte, mélanges,
+    bloc entièrement NULL).
+    """
+    types = set(map(type, valeurs))
+    if types <= {int}:
+        return np.array(valeurs, dtype=np.int64)
+    if types <= _NUMERIQUES and types != {type(None)}:
+        return np.array([np.nan if v is None else v for v in valeurs], dtype=np.float64)
+    return np.array(valeurs, dtype=object)
+
+
+def _assembler(blocs):
+    """
+    Concatène les blocs d'une colonne dans le type le plus général rencontré, comme pandas :
+    une colonne entière avec un réel ou un NULL devient float64.
+    """
+    if not blocs:
+        return np.empty(0, dtype=object)
+    if all(bloc.dtype != object for bloc in blocs):
+        return np.concatenate(blocs)
+    if all(bloc.dtype != object or all(v is None for v in bloc) for bloc in blocs) and \
+            any(bloc.dtype != object for bloc in blocs):
+        # Blocs entièrement NULL au milieu d'une colonne numérique
+        return np.concatenate([bloc if bloc.dtype != object else np.full(len(bloc), np.nan) for bloc in blocs])
+    return np.concatenate([bloc.astype(object) for bloc in blocs])
@@ -0,0 +1,164 @@
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from instrumentation import obtenir_journal
+
+journal = obtenir_journal(__name__)
+
+
+# Données synthétiques au format des annexes 1 à 4
+# annex1 : articles (Item Code, Item Name, Category Code, Category Name)
+# annex2 : ventes (Date, Time, Item Code, Quantity Sold (kilo),
+#          Unit Selling Price (RMB/kg), Sale or Return, Discount (Yes/No))
+# annex3 : prix de gros par jour et par article (Date, Item Code, Wholesale Price (RMB/kg))
+# annex4 : taux de perte par article (Item Code, Item Name, Loss Rate (%))
+# Les distributions reprennent celles des données du rapport : quantités en kg
+# log-normales (médiane ~0,45 kg), prix de vente ~1,6 x le prix de gros, taux de
+# perte ~11 %, environ 0,1 % de retours (quantités négatives) et 5 % de remises.
+# Les ventes sont générées par morceaux : la mémoire ne dépend pas de n_ventes.
+
+CATEGORIES = {
+    1011010101: "Flower/Leaf Vegetables",
+    1011010201: "Cabbage",
+    1011010402: "Aquatic Tuberous Vegetables",
+    1011010501: "Solanum",
+    1011010504: "Capsicum",
+    1011010801: "Edible Mushroom",
+}
+DEBUT = "2020-07-01"
+FIN = "2023-06-30"
+
+
+def generer_articles(n_articles=251, seed=0):
+    """
+    annex1 et annex4 : articles et taux de perte.
+    """
+    rng = np.random.default_rng(seed)
+    codes_categories = np.array(list(CATEGORIES))
+    categories = codes_categories[rng.integers(0, len(codes_categories), n_articles)]
+    codes = 102900005115000 + np.arange(n_articles) * 7
+    noms = [f"Article {i}" for i in range(n_articles)]
+    annex1 = pd.DataFrame({
+        "Item Code": codes,
+        "Item Name": noms,
+        "Category Code": categories,
+        "Category Name": [CATEGORIES[c] for c in categories],
+    })
+    annex4 = pd.DataFrame({
+        "Item Code": codes,
+        "Item Name": noms,
+        "Loss Rate (%)": np.round(np.clip(rng.gamma(6.0, 1.8, n_articles), 0, 30), 2),
+    })
+    return annex1, annex4
+
+
+def _prix_articles(n_articles, seed):
+    rng = np.random.default_rng(seed + 1)
+    gros = np.round(np.clip(rng.lognormal(np.log(6.0), 0.4, n_articles), 0.5, 40), 2)
+    marge = np.clip(rng.normal(1.6, 0.2, n_articles), 1.05, 3)
+    return gros, marge
+
+
+def generer_prix_gros(annex1, debut=DEBUT, fin=FIN, seed=0):
+    """
+    annex3 : un prix de gros par jour et par article (variations autour du prix de base,
+    processus AR(1) sur le logarithme du prix).
+    """
+    rng = np.random.default_rng(seed + 2)
+    jours = pd.date_range(debut, fin, freq="D")
+    gros, _ = _prix_articles(len(annex1), seed)
+    bruit = rng.normal(0, 0.03, (len(jours), len(annex1)))
+    ecarts = np.zeros_like(bruit)
+    for i in range(1, len(jours)):
+        ecarts[i] = 0.98 * ecarts[i - 1] + bruit[i]
+    variations = np.exp(ecarts)
+    return pd.DataFrame({
+        "Date": np.repeat(jours.strftime("%Y-%m-%d"), len(annex1)),
+        "Item Code": np.tile(annex1["Item Code"].to_numpy(), len(jours)),
+        "Wholesale Price (RMB/kg)": np.round((gros * variations).ravel(), 2),
+    })
+
+
+def iter_ventes(annex1, n_ventes, chunksize=1_000_000, debut=DEBUT, fin=FIN, seed=0):
+    """
+    annex2 par morceaux de chunksize lignes, en ordre chronologique.
+    """
+    rng = np.random.default_rng(seed + 3)
+    codes = annex1["Item Code"].to_numpy()
+    gros, marge = _prix_articles(len(codes), seed)
+    # Popularité des articles : quelques articles font la majorité des ventes
+    popularite = rng.zipf(1.6, len(codes)).astype(np.float64)
+    popularite /= popularite.sum()
+    t0 = pd.Timestamp(debut).value
+    duree = pd.Timestamp(fin).value + 86_400 * 10**9 - t0
+
+    for depart in range(0, n_ventes, chunksize):
+        n = min(chunksize, n_ventes - depart)
+        # Instants triés : le morceau couvre sa part de la période
+        instants = pd.to_datetime(t0 + (depart + np.sort(rng.random(n)) * n) / n_ventes * duree)
+        articles = rng.choice(len(codes), n, p=popularite)
+        retour = rng.random(n) < 0.001
+        quantite = np.round(np.clip(rng.lognormal(np.log(0.45), 0.7, n), 0.001, 160), 3)
+        prix = np.round(gros[articles] * marge[articles] * rng.normal(1, 0.05, n), 1)
+        remise = rng.random(n) < 0.05
+        yield pd.DataFrame({
+            "Date": instants.strftime("%Y-%m-%d"),
+            "Time": instants.strftime("%H:%M:%S.%f").str[:-3],
+            "Item Code": codes[articles],
+            "Quantity Sold (kilo)": np.where(retour, -quantite, quantite),
+            "Unit Selling Price (RMB/kg)": np.where(remise, np.round(prix * 0.8, 1), prix),
+            "Sale or Return": np.where(retour, "return", "sale"),
+            "Discount (Yes/No)": np.where(remise, "Yes", "No"),
+        })
+
+
+def generer_annexes(n_ventes, n_articles=251, seed=0):
+    """
+    Les quatre annexes en mémoire : (annex1, annex2, annex3, annex4).
+    """
+    annex1, annex4 = generer_articles(n_articles, seed)
+    annex2 = pd.concat(iter_ventes(annex1, n_ventes, seed=seed), ignore_index=True)
+    return annex1, annex2, generer_prix_gros(annex1, seed=seed), annex4
+
+
+def ecrire_annexes(dossier, n_ventes, n_articles=251, chunksize=1_000_000, seed=0):
+    """
+    Écrit annex1.csv ... annex4.csv dans dossier ; annex2 est écrit morceau par morceau.
+    Renvoie la liste des fichiers.
+    """
+    dossier = Path(dossier)
+    dossier.mkdir(parents=True, exist_ok=True)
+    annex1, annex4 = generer_articles(n_articles, seed)
+    annex1.to_csv(dossier / "annex1.csv", index=False)
+    for i, morceau in enumerate(iter_ventes(annex1, n_ventes, chunksize, seed=seed)):
+        morceau.to_csv(dossier / "annex2.csv", index=False, mode="w" if i == 0 else "a", header=i == 0)
+    generer_prix_gros(annex1, seed=seed).to_csv(dossier / "annex3.csv", index=False)
+    annex4.to_csv(dossier / "annex4.csv", index=False)
+    journal.info("Annexes synthétiques écrites dans %s (%d ventes)", dossier, n_ventes)
+    return [dossier / f"annex{i}.csv" for i in range(1, 5)]
+
+
+def ventes_fusionnees(n_ventes, n_articles=251, seed=0):
+    """
+    Ventes jointes aux articles, au prix de gros du jour et au taux de perte,
+    avec les noms de colonnes produits par LoadData.fusionner (entrée du notebook 02).
+    """
+    return fusionner_annexes(*generer_annexes(n_ventes, n_articles, seed))
+
+
+def fusionner_annexes(annex1, annex2, annex3, annex4):
+    """
+    Jointure de ventes_fusionnees, à partir des annexes en mémoire ou relues
+    depuis les fichiers de ecrire_annexes.
+    """
+    ventes = annex2.merge(annex1, on="Item Code", how="left")
+    ventes = ventes.merge(annex3, on=["Date", "Item Code"], how="left")
+    ventes = ventes.merge(annex4, on="Item Code", how="left", suffixes=("_x", "_y"))
+    ventes["Date_x"] = ventes["Date"]
+    ventes["Date_y"] = ventes["Date"]
+    colonnes = ["Date_x", "Time", "Item Code", "Quantity Sold (kilo)", "Unit Selling Price (RMB/kg)",
+                "Sale or Return", "Discount (Yes/No)", "Item Name_x", "Category Code", "Category Name",
+                "Date_y", "Wholesale Price (RMB/kg)", "Item Name_y", "Loss Rate (%)"]
+    return ventes[colonnes]
@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# Les modules de src/ s'importent directement, comme dans les notebooks (init_notebooks.py)
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
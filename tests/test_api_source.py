@@ -0,0 +1,101 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pandas as pd
+import pytest
+
+from api_source import SourceAPI
+from data_loader import LoadData
+
+VENTES = [{"Item Code": 100 + i, "Quantity Sold (kilo)": round(0.1 * i, 1)} for i in range(25)]
+PAR_PAGE = 10
+
+
+class _Ventes(BaseHTTPRequestHandler):
+    # API paginée : ?page=1, 2, ... ; page vide après la dernière ; ETag par page
+    def do_GET(self):
+        serveur = self.server
+        params = parse_qs(urlparse(self.path).query)
+        page = int(params.get("page", ["1"])[0])
+        with serveur.verrou:
+            serveur.requetes.append(page)
+            if page in serveur.pannes:
+                serveur.pannes.remove(page)
+                self.send_response(503)
+                self.end_headers()
+                return
+        corps = json.dumps({"data": VENTES[(page - 1) * PAR_PAGE:page * PAR_PAGE]}).encode("utf-8")
+        etag = f'"page-{page}-v{serveur.version}"'
+        if self.headers.get("If-None-Match") == etag:
+            with serveur.verrou:
+                serveur.non_modifiees += 1
+            self.send_response(304)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(corps)))
+        self.send_header("ETag", etag)
+        self.end_headers()
+        self.wfile.write(corps)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def serveur():
+    serveur = ThreadingHTTPServer(("127.0.0.1", 0), _Ventes)
+    serveur.verrou = threading.Lock()
+    serveur.requetes, serveur.pannes, serveur.non_modifiees, serveur.version = [], set(), 0, 1
+    thread = threading.Thread(target=serveur.serve_forever, daemon=True)
+    thread.start()
+    serveur.url = f"http://127.0.0.1:{serveur.server_address[1]}/ventes"
+    yield serveur
+    serveur.shutdown()
+    serveur.server_close()
+
+
+def _options(**options):
+    return dict({"page_param": "page", "cle_donnees": "data", "max_workers": 2, "backoff": 0.01}, **options)
+
+
+def test_pages_concatenees(serveur):
+    df = SourceAPI(serveur.url, **_options()).charger()
+    pd.testing.assert_frame_equal(df, pd.DataFrame(VENTES))
+    # 3 pages pleines, puis arrêt à la première page vide
+    assert set(serveur.requetes) == {1, 2, 3, 4}
+
+
+def test_nombre_de_pages_connu_et_nouvelle_tentative(serveur):
+    serveur.pannes.add(2)
+    df = SourceAPI(serveur.url, **_options(pages=3)).charger()
+    pd.testing.assert_frame_equal(df, pd.DataFrame(VENTES))
+    assert serveur.requetes.count(2) == 2
+
+
+def test_reponse_304_reutilise_le_cache(serveur, tmp_path):
+    source = SourceAPI(serveur.url, **_options(pages=3, cache_dir=tmp_path / "cache"))
+    premier = source.charger()
+    assert serveur.non_modifiees == 0
+    second = source.charger()
+    assert serveur.non_modifiees == 3
+    pd.testing.assert_frame_equal(second, premier)
+
+    # Nouvelle version des pages : l'ETag change, le corps est téléchargé à nouveau
+    serveur.version = 2
+    source.charger()
+    assert serveur.non_modifiees == 3
+
+
+def test_integration_load_data(serveur, tmp_path):
+    options = _options()
+    chargement = LoadData(serveur.url, "api", api_options=options, cache_dir=tmp_path / "cache", size=12)
+    pd.testing.assert_frame_equal(chargement.data, pd.DataFrame(VENTES).head(12))
+    assert any((tmp_path / "cache" / "api").iterdir())
+
+    morceaux = list(LoadData(serveur.url, "api", api_options=options, chunksize=4).iter_chunks())
+    assert max(len(m) for m in morceaux) <= 4
+    pd.testing.assert_frame_equal(pd.concat(morceaux, ignore_index=True), pd.DataFrame(VENTES))
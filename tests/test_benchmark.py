@@ -0,0 +1,54 @@
+import json
+
+import pandas as pd
+import pytest
+
+import benchmark
+import synthetique
+
+
+def test_ecrire_annexes_par_morceaux(tmp_path):
+    fichiers = synthetique.ecrire_annexes(tmp_path, 2500, n_articles=40, chunksize=1000, seed=1)
+    annex1, annex2, annex3, annex4 = [pd.read_csv(f) for f in fichiers]
+    attendu = pd.concat(synthetique.iter_ventes(annex1, 2500, chunksize=1000, seed=1), ignore_index=True)
+    assert len(annex2) == 2500
+    pd.testing.assert_frame_equal(annex2[["Item Code", "Quantity Sold (kilo)"]],
+                                  attendu[["Item Code", "Quantity Sold (kilo)"]])
+    instants = pd.to_datetime(annex2["Date"] + " " + annex2["Time"])
+    assert instants.is_monotonic_increasing
+    assert set(annex2["Item Code"]) <= set(annex1["Item Code"])
+    assert len(annex3) == 40 * len(pd.date_range(synthetique.DEBUT, synthetique.FIN))
+    assert annex4["Loss Rate (%)"].between(0, 30).all()
+
+    # Même jointure depuis les fichiers que depuis la mémoire
+    fusion = synthetique.fusionner_annexes(annex1, annex2, annex3, annex4)
+    assert list(fusion.columns) == list(synthetique.ventes_fusionnees(100, n_articles=40).columns)
+    assert len(fusion) == 2500 and fusion["Wholesale Price (RMB/kg)"].notna().all()
+
+
+def test_executer_tous_les_cas(tmp_path):
+    fichier = tmp_path / "resultats.jsonl"
+    resultats = benchmark.executer([2000], fichier=fichier, dossier=tmp_path / "donnees", memoire=False)
+    assert set(resultats["cas"]) == set(benchmark._cas())
+    assert resultats["erreur"].isna().all(), resultats.loc[resultats["erreur"].notna(), ["cas", "erreur"]]
+    assert (resultats["temps_s"] > 0).all()
+    with open(fichier, encoding="utf-8") as f:
+        assert len([json.loads(ligne) for ligne in f]) == len(resultats)
+
+
+def test_cas_par_morceaux_et_comparaison(tmp_path, monkeypatch):
+    fichier = tmp_path / "resultats.jsonl"
+    cas = ["LoadData.load_data", "LoadData.iter_chunks"]
+    for version in ("aaaaaaa", "bbbbbbb"):
+        monkeypatch.setattr(benchmark, "version", lambda: version)
+        benchmark.executer([1000, 3000], cas=cas, fichier=fichier, taille_max_memoire=1000)
+    resultats = benchmark.lire_resultats(fichier)
+    # Au-delà de taille_max_memoire, seuls les cas par morceaux sont lancés
+    assert sorted(resultats.loc[resultats["lignes"] == 3000, "cas"].unique()) == ["LoadData.iter_chunks"]
+    assert resultats["memoire_pic_mo"].notna().all()
+
+    table = benchmark.comparer(fichier)
+    assert len(table) == 3
+    assert {"rapport_temps", "rapport_memoire", "regression"} <= set(table.columns)
+    with pytest.raises(ValueError, match="Cas inconnus"):
+        benchmark.executer([1000], cas=["absent"], fichier=None)
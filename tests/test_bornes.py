@@ -0,0 +1,69 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from analysis import Analisis
+from bornes import BornesIQR, BornesPercentile, BornesZScore, Moments, TDigest
+
+QS = [0, 0.05, 0.25, 0.5, 0.75, 0.9, 1]
+
+
+def _gamma(n, seed=0):
+    return np.random.default_rng(seed).gamma(2, 1, n)
+
+
+def test_tdigest_exact_sous_compression():
+    # 100 valeurs avec compression=200 : un centroïde par valeur
+    x = _gamma(100)
+    digest = TDigest().ajouter(x)
+    np.testing.assert_array_equal(digest.quantile(QS), pd.Series(x).quantile(QS).to_numpy())
+    assert digest.quantile(0.5) == pd.Series(x).median()
+
+
+def test_tdigest_fusion_exacte_sous_compression():
+    x = _gamma(150)
+    digest = TDigest().ajouter(x[:60]).fusionner(TDigest().ajouter(x[60:]))
+    np.testing.assert_allclose(digest.quantile(QS), pd.Series(x).quantile(QS).to_numpy(), rtol=1e-12)
+
+
+def test_tdigest_approche_au_dela():
+    x = _gamma(200_000)
+    digest = TDigest()
+    for morceau in np.array_split(x, 20):
+        digest.ajouter(morceau)
+    assert len(digest.moyennes) < 1000
+    # Erreur exprimée en rang : quelques millièmes au plus
+    rangs = np.searchsorted(np.sort(x), digest.quantile([0.01, 0.25, 0.5, 0.75, 0.99])) / len(x)
+    np.testing.assert_allclose(rangs, [0.01, 0.25, 0.5, 0.75, 0.99], atol=0.003)
+    assert digest.quantile(0) == x.min() and digest.quantile(1) == x.max()
+
+
+def test_tdigest_sans_compression():
+    x = _gamma(20_000)
+    digest = TDigest(compression=None).ajouter(x[:5000]).fusionner(TDigest(compression=None).ajouter(x[5000:]))
+    np.testing.assert_allclose(digest.quantile(QS), pd.Series(x).quantile(QS).to_numpy(), rtol=1e-12)
+
+
+def test_moments_par_lots():
+    x = _gamma(1000)
+    moments = Moments()
+    for morceau in np.array_split(x, 7):
+        moments.ajouter(morceau)
+    assert moments.n == 1000
+    assert moments.moyenne == pytest.approx(x.mean())
+    assert moments.variance() == pytest.approx(x.var(ddof=1))
+    assert (moments.min, moments.max) == (x.min(), x.max())
+
+
+def test_bornes_comme_analisis():
+    x = pd.Series(_gamma(150), name="UnitPrice")
+    ventes = pd.DataFrame({"UnitPrice": x})
+    iqr = BornesIQR().fit(x)
+    pd.testing.assert_frame_equal(Analisis(ventes).iqr("UnitPrice", bornes=iqr), Analisis(ventes).iqr("UnitPrice"))
+    winsorise = Analisis(ventes.copy()).winsorize_column("UnitPrice", method="percentile")
+    pd.testing.assert_series_equal(BornesPercentile().fit(x).transform(x), winsorise["UnitPrice"])
+
+    zscore = BornesZScore(seuil=2).partial_fit(x[:70]).partial_fit(x[70:])
+    lower, upper = zscore.bornes
+    assert lower == pytest.approx(x.mean() - 2 * x.std())
+    assert upper == pytest.approx(x.mean() + 2 * x.std())
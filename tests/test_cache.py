@@ -0,0 +1,78 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from cache import CacheColonnes, ecrire_colonnes, lire_colonnes, remplacer_colonne
+from data_loader import LoadData
+
+
+def _valeurs(serie):
+    # Texte comparé valeur par valeur, valeurs manquantes ramenées à None
+    serie = serie.astype(object)
+    return serie.where(serie.notna(), None).tolist()
+
+
+@pytest.fixture
+def ventes():
+    rng = np.random.default_rng(0)
+    n = 500
+    return pd.DataFrame({
+        "Date": pd.date_range("2020-07-01", periods=n, freq="h").astype(str),
+        "Item Code": rng.integers(10**14, 10**14 + 50, n),
+        "Quantity Sold (kilo)": rng.gamma(2, 0.3, n).round(3),
+        "Sale or Return": rng.choice(["sale", "return"], n),
+        "Discount (Yes/No)": np.where(rng.random(n) < 0.1, None, rng.choice(["Yes", "No"], n)),
+    })
+
+
+def test_aller_retour_colonnes(tmp_path, ventes):
+    ventes = ventes.assign(Date=pd.to_datetime(ventes["Date"]))
+    ecrire_colonnes(tmp_path / "table", ventes)
+    relues = lire_colonnes(tmp_path / "table")
+    assert list(relues.columns) == list(ventes.columns)
+    pd.testing.assert_series_equal(relues["Date"], ventes["Date"], check_dtype=False)
+    for col in ["Item Code", "Quantity Sold (kilo)"]:
+        pd.testing.assert_series_equal(relues[col], ventes[col])
+    for col in ["Sale or Return", "Discount (Yes/No)"]:
+        assert _valeurs(relues[col]) == _valeurs(ventes[col])
+
+
+def test_lecture_partielle(tmp_path, ventes):
+    ecrire_colonnes(tmp_path / "table", ventes)
+    relues = lire_colonnes(tmp_path / "table", columns=["Quantity Sold (kilo)"], nrows=10)
+    pd.testing.assert_frame_equal(relues, ventes[["Quantity Sold (kilo)"]].head(10))
+
+
+def test_remplacer_colonne(tmp_path, ventes):
+    ecrire_colonnes(tmp_path / "table", ventes)
+    remplacer_colonne(tmp_path / "table", "Quantity Sold (kilo)", ventes["Quantity Sold (kilo)"] * 2)
+    relues = lire_colonnes(tmp_path / "table")
+    pd.testing.assert_series_equal(relues["Quantity Sold (kilo)"], ventes["Quantity Sold (kilo)"] * 2)
+    with pytest.raises(ValueError):
+        remplacer_colonne(tmp_path / "table", "Quantity Sold (kilo)", ventes["Quantity Sold (kilo)"].head(3))
+
+
+def test_cache_identique_au_csv(tmp_path, ventes):
+    source = tmp_path / "annex2.csv"
+    ventes.to_csv(source, index=False)
+    attendu = pd.read_csv(source)
+
+    cache = CacheColonnes(tmp_path / "cache")
+    assert not cache.est_valide(source)
+    premier = LoadData(str(source), "csv", cache_dir=tmp_path / "cache").data
+    assert cache.est_valide(source)
+    second = LoadData(str(source), "csv", cache_dir=tmp_path / "cache").data
+    for charge in (premier, second):
+        for col in attendu.columns:
+            assert _valeurs(charge[col]) == _valeurs(attendu[col])
+
+
+def test_cache_reconstruit_si_la_source_change(tmp_path, ventes):
+    source = tmp_path / "annex2.csv"
+    ventes.to_csv(source, index=False)
+    cache = CacheColonnes(tmp_path / "cache")
+    LoadData(str(source), "csv", cache_dir=tmp_path / "cache")
+
+    ventes.head(10).to_csv(source, index=False)
+    assert not cache.est_valide(source)
+    assert len(LoadData(str(source), "csv", cache_dir=tmp_path / "cache").data) == 10
@@ -0,0 +1,147 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from cleaning import Cleaning
+
+
+def _reference(ventes):
+    # Logique d'origine de clear_nunique : nunique() == 1, puis (a == b).all() deux à deux
+    constantes = [col for col in ventes.columns if ventes[col].nunique() == 1]
+    reste = ventes.drop(columns=constantes)
+    cols = reste.columns.tolist()
+    doublons = {cols[j] for i in range(len(cols)) for j in range(i + 1, len(cols))
+                if (reste[cols[i]] == reste[cols[j]]).all()}
+    return constantes, doublons
+
+
+@pytest.fixture
+def ventes():
+    rng = np.random.default_rng(0)
+    n = 500
+    ventes = pd.DataFrame({
+        "Item Code": rng.integers(0, 50, n),
+        "Quantity Sold (kilo)": rng.gamma(2, 0.4, n).round(3),
+        "Sale or Return": rng.choice(["sale", "return"], n),
+        "Pays": "Chine",
+        "Taux": 1.0,
+        "Vide": np.nan,
+        "Avec manquants": np.where(rng.random(n) < 0.1, np.nan, 3.0),
+    })
+    ventes["Item Code (réel)"] = ventes["Item Code"].astype(np.float64)
+    ventes["Type de vente"] = ventes["Sale or Return"].astype("category")
+    ventes["Quantité"] = ventes["Quantity Sold (kilo)"]
+    ventes["Copie manquants"] = ventes["Avec manquants"]
+    return ventes
+
+
+def test_detecter_colonnes_comme_reference(ventes):
+    resultat = Cleaning(ventes).detecter_colonnes()
+    constantes, doublons = _reference(ventes)
+    assert resultat["constantes"] == constantes
+    assert set(resultat["doublons"]) == doublons
+    # Doublon entre un entier et un réel de mêmes valeurs
+    assert resultat["doublons"]["Item Code (réel)"] == "Item Code"
+    assert resultat["doublons"]["Type de vente"] == "Sale or Return"
+
+
+def test_clear_nunique(ventes):
+    constantes, doublons = _reference(ventes)
+    nettoyees = Cleaning(ventes.copy()).clear_nunique()
+    assert list(nettoyees.columns) == [col for col in ventes.columns if col not in constantes and col not in doublons]
+
+
+def _date_reference(serie):
+    # Règle de clear_date d'origine, sur toute la colonne (valeurs manquantes comprises)
+    converties = pd.to_datetime(serie, format="%Y-%m-%d", errors="coerce")
+    return converties.notna().mean() > 0.8 and (converties.dt.hour == 0).mean() > 0.8
+
+
+@pytest.mark.parametrize("manquantes", [0.0, 0.1, 0.3, 0.6])
+def test_inferer_types_compte_les_manquantes(manquantes):
+    rng = np.random.default_rng(1)
+    n = 500
+    dates = pd.Series(pd.date_range("2022-01-01", periods=n, freq="D").strftime("%Y-%m-%d"), dtype=object)
+    dates[rng.random(n) < manquantes] = None
+    nombres = pd.Series(rng.uniform(0, 10, n).round(2).astype(str), dtype=object)
+    nombres[rng.random(n) < manquantes] = None
+    nettoyage = Cleaning(pd.DataFrame({"Date": dates, "Prix": nombres}))
+    types = nettoyage.inferer_types(echantillon=n)
+    assert (types["Date"] == "date") == _date_reference(dates)
+    assert (types["Prix"] == "numerique") == (pd.to_numeric(nombres, errors="coerce").notna().mean() > 0.8)
+
+    nettoyage.clear_date(echantillon=n)
+    assert pd.api.types.is_datetime64_any_dtype(nettoyage.ventes["Date"]) == _date_reference(dates)
+
+
+def test_optimiser_types_aller_retour_float32():
+    rng = np.random.default_rng(2)
+    n = 1000
+    ventes = pd.DataFrame({
+        "Prix": rng.integers(10, 5000, n) / 10,          # une décimale : float32 sans perte
+        "Quantite": rng.integers(1, 2000, n) / 1000,     # trois décimales
+        "Mesure": rng.uniform(0, 1, n),                  # 16 chiffres : gardé en float64
+        "Ecart": rng.uniform(0, 1, n),                   # idem, sauf avec rtol
+        "Stock": rng.integers(0, 200, n),                # > 127 : int16 signé, pas uint8
+        "Variation": rng.integers(-100, 100, n),
+    })
+    ventes.loc[::50, "Prix"] = np.nan
+    origine = ventes.copy()
+    reduit = Cleaning(ventes.copy()).optimiser_types(rtol={"Ecart": 1e-6})
+
+    assert reduit["Prix"].dtype == np.float32 and reduit["Quantite"].dtype == np.float32
+    for col, d in (("Prix", 1), ("Quantite", 3)):
+        np.testing.assert_array_equal(np.round(reduit[col].to_numpy(dtype=np.float64), d), origine[col].to_numpy())
+    assert reduit["Mesure"].dtype == np.float64
+    assert reduit["Ecart"].dtype == np.float32
+    np.testing.assert_allclose(reduit["Ecart"], origine["Ecart"], rtol=1e-6)
+    assert reduit["Stock"].dtype == np.int16 and reduit["Variation"].dtype == np.int8
+    assert (reduit["Stock"] - 199).min() == origine["Stock"].min() - 199
+
+    # Moins de décimales autorisées que la colonne n'en a : pas de conversion
+    assert Cleaning(origine.copy()).optimiser_types(decimales=2)["Quantite"].dtype == np.float64
+    # rtol global
+    assert Cleaning(origine.copy()).optimiser_types(rtol=1e-6)["Mesure"].dtype == np.float32
+
+
+@pytest.fixture
+def ventes_clusters():
+    rng = np.random.default_rng(4)
+    n = 3000
+    ventes = pd.DataFrame({
+        "Id": np.arange(n),
+        "QuantityCluster": rng.integers(0, 3, n),
+        "QuantityKg": rng.lognormal(0, 0.8, n),
+        "UnitPrice": rng.normal(10, 2, n),
+        "LossRate": rng.gamma(2, 3, n),
+    })
+    ventes.loc[rng.random(n) < 0.01, "UnitPrice"] = np.nan
+    return ventes
+
+
+def test_remove_outliers_by_clusters_comme_colonne_par_colonne(ventes_clusters):
+    colonnes = ["QuantityKg", "UnitPrice", "LossRate"]
+    filtre, bornes = Cleaning.remove_outliers_by_clusters(ventes_clusters, "QuantityCluster", colonnes)
+    # Référence : une passe de remove_outliers_by_cluster par colonne, toutes sur les données d'origine
+    gardes = set(ventes_clusters["Id"])
+    for col in colonnes:
+        gardes &= set(Cleaning.remove_outliers_by_cluster(ventes_clusters, "QuantityCluster", col)["Id"])
+    assert set(filtre["Id"]) == gardes
+    assert filtre["Id"].is_monotonic_increasing
+    pd.testing.assert_frame_equal(filtre, ventes_clusters[ventes_clusters["Id"].isin(gardes)].reset_index(drop=True))
+    assert list(bornes.index) == [0, 1, 2]
+
+
+def test_appliquer_bornes_sur_d_autres_donnees(ventes_clusters):
+    colonnes = ["QuantityKg", "LossRate"]
+    apprentissage, nouvelles = ventes_clusters.iloc[:2000], ventes_clusters.iloc[2000:].copy()
+    _, bornes = Cleaning.remove_outliers_by_clusters(apprentissage, "QuantityCluster", colonnes, factor=1.0)
+    nouvelles.loc[nouvelles.index[:5], "QuantityCluster"] = 9     # cluster inconnu : écarté
+    filtre = Cleaning.appliquer_bornes(nouvelles, "QuantityCluster", bornes)
+
+    attendu = nouvelles["QuantityCluster"].isin(bornes.index)
+    for col in colonnes:
+        bas = nouvelles["QuantityCluster"].map(bornes[("lower", col)])
+        haut = nouvelles["QuantityCluster"].map(bornes[("upper", col)])
+        attendu &= nouvelles[col].between(bas, haut)
+    pd.testing.assert_frame_equal(filtre, nouvelles[attendu].reset_index(drop=True))
@@ -0,0 +1,85 @@
+import numpy as np
+import pandas as pd
+import pytest
+from matplotlib import cbook
+
+from cube import CubeAgregats
+
+
+@pytest.fixture
+def ventes():
+    rng = np.random.default_rng(0)
+    n = 4000
+    articles = rng.integers(0, 30, n)
+    ventes = pd.DataFrame({
+        "Date": (pd.Timestamp("2021-03-01") + pd.to_timedelta(rng.integers(0, 20 * 24 * 60, n), unit="min")),
+        "ItemCode": articles,
+        "ItemName": pd.Series(articles).map(lambda a: f"article {a}"),
+        "CategoryCode": articles % 4,
+        "QuantityCluster": rng.integers(0, 3, n),
+        "QuantityKg": rng.gamma(2, 0.4, n),
+        "UnitPrice": rng.uniform(1, 30, n),
+    })
+    ventes.loc[rng.random(n) < 0.05, "UnitPrice"] = np.nan
+    return ventes
+
+
+def _attendu(ventes, par, mesure):
+    cles = ventes.assign(Date=ventes["Date"].dt.normalize())
+    return cles.groupby(par)[mesure].agg(["sum", "count", "mean", "min", "max"])
+
+
+@pytest.mark.parametrize("par", [["ItemCode"], ["Date", "QuantityCluster"], ["CategoryCode"]])
+@pytest.mark.parametrize("mesure", ["QuantityKg", "UnitPrice"])
+def test_requete_identique_a_groupby(ventes, par, mesure):
+    cube = CubeAgregats(mesures=["QuantityKg", "UnitPrice"]).ajouter(ventes)
+    resultat = cube.requete(par, mesure, ["sum", "count", "mean", "min", "max"])
+    pd.testing.assert_frame_equal(resultat.sort_index(), _attendu(ventes, par, mesure).sort_index(),
+                                  check_dtype=False, check_names=False)
+
+
+def test_requete_filtree(ventes):
+    cube = CubeAgregats(mesures=["QuantityKg"]).ajouter(ventes)
+    resultat = cube.requete("ItemCode", "QuantityKg", ["sum"], filtre={"QuantityCluster": [0, 2]})
+    attendu = ventes[ventes["QuantityCluster"].isin([0, 2])].groupby("ItemCode")["QuantityKg"].sum()
+    pd.testing.assert_series_equal(resultat["sum"], attendu, check_names=False)
+
+
+def test_ajout_par_lots(tmp_path, ventes):
+    # Lots qui se recoupent sur plusieurs jours
+    ventes = ventes.sort_values("Date", ignore_index=True)
+    lots = [ventes.iloc[:1500], ventes.iloc[1500:2600].sample(frac=1, random_state=0), ventes.iloc[2600:]]
+    cube = CubeAgregats(tmp_path / "cube", mesures=["QuantityKg", "UnitPrice"])
+    for lot in lots:
+        cube.ajouter(lot)
+    relu = CubeAgregats(tmp_path / "cube")
+    attendu = _attendu(ventes, ["Date", "ItemCode"], "UnitPrice").sort_index()
+    for c in (cube, relu):
+        resultat = c.requete(["Date", "ItemCode"], "UnitPrice", ["sum", "count", "mean", "min", "max"])
+        # Les dates relues du disque sont en datetime64[ns]
+        pd.testing.assert_frame_equal(resultat.sort_index(), attendu, check_dtype=False, check_names=False,
+                                      check_index_type=False)
+
+
+def test_quantiles_a_alpha_pres(ventes):
+    cube = CubeAgregats(mesures=["UnitPrice"], alpha=0.01).ajouter(ventes)
+    resultat = cube.requete("CategoryCode", "UnitPrice", ["q25", "q50", "q75"])
+    for q in (25, 50, 75):
+        # Le sketch renvoie la valeur de rang ceil(q * (n - 1)), à alpha près en relatif
+        attendu = ventes.groupby("CategoryCode")["UnitPrice"].quantile(q / 100, interpolation="higher")
+        np.testing.assert_allclose(resultat[f"q{q}"], attendu, rtol=0.01)
+
+
+def test_boxplot_stats_moustaches_sur_les_donnees(ventes):
+    ventes = ventes.copy()
+    ventes.loc[[0, 1, 2], "QuantityKg"] = [15.0, 12.0, 20.0]
+    cube = CubeAgregats(mesures=["QuantityKg"], alpha=0.001).ajouter(ventes)
+    stats = {s["label"]: s for s in cube.boxplot_stats("CategoryCode", "QuantityKg")}
+    for categorie, groupe in ventes.groupby("CategoryCode")["QuantityKg"]:
+        attendu = cbook.boxplot_stats(groupe.to_numpy(), whis=1.5)[0]
+        for cle in ("q1", "med", "q3", "whislo", "whishi"):
+            # Quantiles du sketch : valeur de rang supérieur, à alpha près
+            assert stats[categorie][cle] == pytest.approx(attendu[cle], rel=0.02), (categorie, cle)
+        iqr = stats[categorie]["q3"] - stats[categorie]["q1"]
+        assert stats[categorie]["whishi"] <= stats[categorie]["q3"] + 1.5 * iqr
+        assert stats[categorie]["whishi"] < groupe.max()
@@ -0,0 +1,155 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from data_loader import LoadData
+
+
+def test_erreur_de_chargement_relancee(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        LoadData(str(tmp_path / "absent.csv"), "csv")
+    with pytest.raises(ValueError):
+        LoadData(str(tmp_path / "absent.csv"), "parquet")
+
+
+def test_erreur_de_chargement_ignoree(tmp_path, caplog):
+    chargement = LoadData(str(tmp_path / "absent.csv"), "csv", ignorer_erreurs=True)
+    assert chargement.data is None
+    assert "Erreur lors du chargement" in caplog.text
+
+
+@pytest.fixture
+def fichier_ventes(tmp_path):
+    rng = np.random.default_rng(0)
+    n = 1000
+    ventes = pd.DataFrame({
+        "Date": pd.date_range("2023-01-01", periods=n, freq="6h").strftime("%Y-%m-%d %H:%M:%S"),
+        "ItemCode": rng.integers(100, 130, n),
+        "QuantityKg": rng.uniform(0.1, 5, n).round(3),
+        "UnitPrice": rng.uniform(2, 20, n).round(2),
+    })
+    chemin = tmp_path / "ventes.csv"
+    ventes.to_csv(chemin, index=False)
+    return chemin
+
+
+def _reference(chemin, columns=None, size=None, start=None, end=None):
+    # Lecture complète puis filtres : ce que iter_chunks doit reproduire sans tout charger
+    df = pd.read_csv(chemin)
+    dates = pd.to_datetime(df["Date"])
+    if start is not None:
+        df = df[dates >= pd.Timestamp(start)]
+    if end is not None:
+        df = df[dates.loc[df.index] <= pd.Timestamp(end)]
+    if columns is not None:
+        df = df[columns]
+    return df.head(size).reset_index(drop=True) if size is not None else df.reset_index(drop=True)
+
+
+@pytest.mark.parametrize("options", [
+    {},
+    {"size": 137},
+    {"columns": ["ItemCode", "UnitPrice"], "size": 250},
+    {"date_col": "Date", "start": "2023-02-01", "end": "2023-03-15 12:00"},
+    {"columns": ["QuantityKg"], "size": 40, "date_col": "Date", "start": "2023-04-01"},
+])
+def test_iter_chunks_identique_a_la_lecture_complete(fichier_ventes, options):
+    options = dict(options)
+    size, columns = options.pop("size", None), options.pop("columns", None)
+    chargement = LoadData(str(fichier_ventes), "csv", size=size, columns=columns, chunksize=64)
+    assert chargement.data is None
+    morceaux = list(chargement.iter_chunks(**options))
+    assert all(0 < len(m) <= 64 for m in morceaux)
+    resultat = pd.concat(morceaux, ignore_index=True)
+    attendu = _reference(fichier_ventes, columns, size, options.get("start"), options.get("end"))
+    pd.testing.assert_frame_equal(resultat, attendu)
+
+
+def test_iter_chunks_limite_poussee_au_parseur(fichier_ventes, monkeypatch):
+    lues = []
+    lecture = pd.read_csv
+
+    def read_csv(*args, **kwargs):
+        lues.append(kwargs.get("nrows"))
+        return lecture(*args, **kwargs)
+
+    monkeypatch.setattr(pd, "read_csv", read_csv)
+    morceaux = list(LoadData(str(fichier_ventes), "csv", size=100, chunksize=30).iter_chunks())
+    assert lues == [100]
+    assert [len(m) for m in morceaux] == [30, 30, 30, 10]
+
+
+def test_iter_chunks_excel(fichier_ventes, tmp_path):
+    classeur = tmp_path / "ventes.xlsx"
+    pd.read_csv(fichier_ventes).head(300).to_excel(classeur, index=False)
+    chargement = LoadData(str(classeur), "excel", columns=["Date", "UnitPrice"], size=120, chunksize=50)
+    resultat = pd.concat(chargement.iter_chunks(), ignore_index=True)
+    pd.testing.assert_frame_equal(resultat, _reference(fichier_ventes, ["Date", "UnitPrice"], 120))
+
+
+def test_profil_en_streaming(fichier_ventes):
+    profil = LoadData(str(fichier_ventes), "csv", chunksize=100).profil()
+    complet = LoadData(str(fichier_ventes), "csv").profil()
+    assert profil.lignes == complet.lignes == 1000
+    pd.testing.assert_frame_equal(profil.tete, complet.tete)
+    pd.testing.assert_frame_equal(profil.queue.reset_index(drop=True), complet.queue.reset_index(drop=True))
+
+
+@pytest.fixture
+def annexes():
+    rng = np.random.default_rng(3)
+    n = 2000
+    ventes = pd.DataFrame({
+        "ItemCode": rng.integers(0, 60, n),          # codes 50-59 absents des articles
+        "QuantityKg": rng.uniform(0.1, 5, n),
+        "Nom": "vente",                              # en conflit avec articles.Nom
+    })
+    articles = pd.DataFrame({"ItemCode": np.arange(50), "Nom": [f"article {i}" for i in range(50)],
+                             "CategoryCode": np.arange(50) % 6})
+    pertes = pd.DataFrame({"ItemCode": rng.permutation(55), "LossRate": rng.uniform(0, 20, 55)})
+    # Clé non unique : fusion classique
+    prix = pd.DataFrame({"ItemCode": rng.integers(0, 60, 150), "WholesalePrice": rng.uniform(1, 10, 150)})
+    return [ventes, articles, pertes, prix]
+
+
+def _meme_contenu(resultat, attendu):
+    assert sorted(resultat.columns) == sorted(attendu.columns)
+    colonnes = sorted(attendu.columns)
+    trier = lambda df: df[colonnes].sort_values(colonnes, ignore_index=True)
+    pd.testing.assert_frame_equal(trier(resultat), trier(attendu), check_dtype=False)
+
+
+@pytest.mark.parametrize("how", ["inner", "left"])
+@pytest.mark.parametrize("ordre", [[0, 1, 2, 3], [0, 2, 1], [1, 0, 3, 2]])
+def test_fusionner_planifie_comme_fusionner(fichier_ventes, annexes, how, ordre):
+    chargement = LoadData(str(fichier_ventes), "csv")
+    tables = [annexes[i] for i in ordre]
+    attendu = chargement.fusionner(tables, on="ItemCode", how=how)
+    resultat = chargement.fusionner_planifie(tables, on="ItemCode", how=how)
+    _meme_contenu(resultat, attendu)
+    assert len(resultat) == len(attendu)
+
+
+def test_fusionner_planifie_cle_multiple(fichier_ventes, annexes):
+    ventes, articles = annexes[0], annexes[1]
+    ventes = ventes.assign(CategoryCode=ventes["ItemCode"] % 6)
+    chargement = LoadData(str(fichier_ventes), "csv")
+    on = ["ItemCode", "CategoryCode"]
+    _meme_contenu(chargement.fusionner_planifie([ventes, articles], on=on),
+                  chargement.fusionner([ventes, articles], on=on))
+    assert chargement.fusionner_planifie([ventes, None], on="ItemCode") is None
+
+
+def test_charger_sources(fichier_ventes, tmp_path):
+    pd.read_csv(fichier_ventes).head(50).to_excel(tmp_path / "ventes.xlsx", index=False)
+    sources = [
+        {"source": str(fichier_ventes), "source_type": "csv"},
+        {"source": str(fichier_ventes), "source_type": "csv", "columns": ["ItemCode"], "size": 10},
+        {"source": str(tmp_path / "ventes.xlsx"), "source_type": "excel"},
+    ]
+    complet, extrait, classeur = LoadData.charger_sources(sources, max_workers=3)
+    pd.testing.assert_frame_equal(complet, pd.read_csv(fichier_ventes))
+    pd.testing.assert_frame_equal(extrait, pd.read_csv(fichier_ventes, usecols=["ItemCode"], nrows=10))
+    pd.testing.assert_frame_equal(classeur, pd.read_csv(fichier_ventes).head(50))
+    with pytest.raises(FileNotFoundError):
+        LoadData.charger_sources(sources + [{"source": str(tmp_path / "absent.csv")}])
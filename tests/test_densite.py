@@ -0,0 +1,55 @@
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.cluster import DBSCAN
+from sklearn.preprocessing import StandardScaler
+
+from densite import dbscan_1d
+
+
+def _sklearn(x, eps, min_samples, standardiser=True):
+    x = np.asarray(x, dtype=np.float64).reshape(-1, 1)
+    if standardiser:
+        x = StandardScaler().fit_transform(x)
+    return DBSCAN(eps=eps, min_samples=min_samples).fit(x).labels_
+
+
+def _valeurs(seed, n=2000):
+    rng = np.random.default_rng(seed)
+    # Mélange de paquets denses, de valeurs isolées et d'ex aequo (prix arrondis)
+    return np.concatenate([rng.normal(5, 0.3, n // 2), rng.normal(12, 1.5, n // 4),
+                           rng.uniform(0, 40, n - n // 2 - n // 4)]).round(1)
+
+
+@pytest.mark.parametrize("seed", range(5))
+@pytest.mark.parametrize("eps, min_samples", [(0.05, 5), (0.02, 10), (0.3, 3)])
+def test_dbscan_1d_identique_a_sklearn(seed, eps, min_samples):
+    x = _valeurs(seed)
+    np.testing.assert_array_equal(dbscan_1d(x, eps, min_samples), _sklearn(x, eps, min_samples))
+
+
+@pytest.mark.parametrize("eps", [0.1, 0.2, 0.3])
+def test_dbscan_1d_sans_standardisation(eps):
+    # Valeurs au dixième : de nombreux voisins sont à exactement eps
+    x = _valeurs(0)
+    np.testing.assert_array_equal(dbscan_1d(x, eps, 5, standardiser=False), _sklearn(x, eps, 5, standardiser=False))
+
+
+def test_dbscan_1d_par_groupe():
+    rng = np.random.default_rng(1)
+    x = _valeurs(1)
+    groupes = rng.choice(["a", "b", "c"], len(x))
+    labels = dbscan_1d(x, 0.1, 5, groupes=groupes)
+    for groupe in np.unique(groupes):
+        masque = groupes == groupe
+        np.testing.assert_array_equal(labels[masque], _sklearn(x[masque], 0.1, 5))
+
+
+def test_dbscan_1d_valeurs_manquantes():
+    x = _valeurs(2)
+    avec_nan = x.copy()
+    avec_nan[::50] = np.nan
+    labels = dbscan_1d(pd.Series(avec_nan), 0.05, 5)
+    assert (labels[::50] == -1).all()
+    valides = ~np.isnan(avec_nan)
+    np.testing.assert_array_equal(labels[valides], _sklearn(avec_nan[valides], 0.05, 5))
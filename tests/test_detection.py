@@ -0,0 +1,79 @@
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.cluster import DBSCAN
+from sklearn.ensemble import IsolationForest
+from sklearn.preprocessing import StandardScaler
+
+from detection import MasqueAnomalies, detecter_anomalies
+from exploratory import Exploratory
+
+COLONNES = ["QuantityKg", "UnitPrice", "LossRate"]
+
+
+@pytest.fixture
+def ventes():
+    rng = np.random.default_rng(5)
+    n = 1001  # pas un multiple de 8 : dernier octet incomplet une fois compacté
+    ventes = pd.DataFrame({
+        "QuantityKg": rng.lognormal(0, 1, n),
+        "UnitPrice": rng.normal(10, 2, n),
+        "LossRate": rng.gamma(2, 3, n),
+    }, index=pd.RangeIndex(100, 100 + n))
+    ventes.loc[ventes.index[::97], "UnitPrice"] = np.nan
+    ventes.loc[ventes.index[:3], "UnitPrice"] = [40.0, -20.0, 35.0]
+    return ventes
+
+
+@pytest.mark.parametrize("methode", ["iqr", "z_score"])
+def test_masques_comme_exploratory(ventes, methode):
+    masques = detecter_anomalies(ventes, COLONNES, [methode])
+    for col in COLONNES:
+        attendu = getattr(Exploratory(ventes), methode)(col).index
+        assert list(ventes.index[masques.masque(col, methode)]) == list(attendu)
+
+
+def test_isolation_forest_comme_sklearn(ventes):
+    valeurs = ventes[["LossRate"]]
+    attendu = IsolationForest(contamination=0.05, random_state=0).fit_predict(valeurs) == -1
+    masques = detecter_anomalies(ventes, ["LossRate"], ["isolation_forest"],
+                                 options={"isolation_forest": {"random_state": 0}})
+    np.testing.assert_array_equal(masques.masque("LossRate", "isolation_forest"), attendu)
+
+
+def test_dbscan_comme_sklearn(ventes):
+    valeurs = StandardScaler().fit_transform(ventes[["QuantityKg"]])
+    attendu = DBSCAN(eps=0.3, min_samples=5).fit(valeurs).labels_ == -1
+    masques = detecter_anomalies(ventes, ["QuantityKg"], ["dbscan"], options={"dbscan": {"eps": 0.3}})
+    np.testing.assert_array_equal(masques.masque("QuantityKg", "dbscan"), attendu)
+
+
+def test_lot_identique_aux_appels_separes(ventes):
+    copie = ventes.copy()
+    methodes = ("iqr", "z_score", "dbscan")
+    lot = detecter_anomalies(ventes, COLONNES, methodes, n_jobs=4)
+    pd.testing.assert_frame_equal(ventes, copie)
+    assert lot.paires == [(col, m) for col in COLONNES for m in methodes]
+    for col in COLONNES:
+        for methode in methodes:
+            seul = detecter_anomalies(ventes, [col], [methode], n_jobs=1)
+            np.testing.assert_array_equal(lot.masque(col, methode), seul.masque(col, methode))
+    with pytest.raises(ValueError, match="inconnues"):
+        detecter_anomalies(ventes, COLONNES, ["iqr", "lof"])
+
+
+def test_masque_compacte_aller_retour(ventes):
+    clair = detecter_anomalies(ventes, COLONNES, ("iqr", "z_score", "dbscan"))
+    compacte = detecter_anomalies(ventes, COLONNES, ("iqr", "z_score", "dbscan"), compacte=True)
+    assert compacte.matrice.dtype == np.uint8
+    assert compacte.matrice.shape == (-(-len(ventes) // 8), len(clair.paires))
+    np.testing.assert_array_equal(compacte.masques(), clair.masques())
+    assert compacte.nombre() == clair.nombre()
+    pd.testing.assert_frame_equal(compacte.to_frame(), clair.to_frame())
+    assert compacte.to_frame().index.equals(ventes.index)
+
+    # Matrice quelconque, dont les derniers bits de remplissage
+    matrice = np.random.default_rng(6).random((13, 5)) < 0.3
+    masques = MasqueAnomalies(matrice, [("c", str(j)) for j in range(5)], pd.RangeIndex(13), compacte=True)
+    np.testing.assert_array_equal(masques.masques(), matrice)
+    np.testing.assert_array_equal(masques.masque("c", "3"), matrice[:, 3])
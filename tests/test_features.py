@@ -0,0 +1,89 @@
+import numpy as np
+import pandas as pd
+
+from features import INDICATEURS, MagasinIndicateurs, calculer_indicateurs
+
+
+def _ventes(jours, par_jour=4, graine=0):
+    rng = np.random.default_rng(graine)
+    dates = np.repeat(pd.date_range("2023-01-01", periods=jours, freq="D"), par_jour)
+    n = len(dates)
+    return pd.DataFrame({
+        "Date": dates + pd.to_timedelta(rng.integers(0, 86400, n), unit="s"),
+        "ItemName": rng.choice(["chou", "piment", "poivron"], n),
+        "QuantityKg": rng.uniform(0.1, 5, n),
+        "UnitPrice": rng.uniform(2, 20, n),
+        "WholesalePrice": rng.uniform(1, 10, n),
+        "LossRate": rng.uniform(0, 20, n),
+    })
+
+
+def _trier(df):
+    return df.sort_values(["Date", "ItemName", "QuantityKg"]).reset_index(drop=True)
+
+
+def _verifier(magasin, attendu):
+    stock = _trier(magasin.charger())
+    attendu = _trier(attendu)
+    assert len(stock) == len(attendu)
+    np.testing.assert_array_equal(stock["Date"].to_numpy(), attendu["Date"].to_numpy())
+    for col in ["QuantityKg"] + INDICATEURS:
+        np.testing.assert_allclose(stock[col].to_numpy(dtype=np.float64),
+                                   calculer_indicateurs(attendu)[col] if col in INDICATEURS
+                                   else attendu[col], rtol=1e-6)
+
+
+def test_ajout_seul_idempotent(tmp_path):
+    ventes = _ventes(10)
+    magasin = MagasinIndicateurs(tmp_path / "stock")
+    assert magasin.ajouter(ventes[ventes["Date"] < "2023-01-06"]) == 20
+    assert magasin.ajouter(ventes) == 20
+    assert magasin.ajouter(ventes) == 0
+    assert len(magasin.partitions()) == 2
+    _verifier(magasin, ventes)
+    assert len(magasin.charger(start="2023-01-03", end="2023-01-04 23:59")) == 8
+
+
+def test_lignes_tardives_signalees(tmp_path, caplog):
+    ventes = _ventes(6)
+    magasin = MagasinIndicateurs(tmp_path / "stock")
+    magasin.ajouter(ventes)
+    tardives = _ventes(2, graine=1)
+    assert magasin.ajouter(tardives) == 0
+    assert "8 ligne(s) ignorée(s)" in caplog.text
+    _verifier(magasin, ventes)
+
+
+def test_lignes_tardives_remplacees(tmp_path):
+    ventes = _ventes(10)
+    magasin = MagasinIndicateurs(tmp_path / "stock")
+    magasin.ajouter(ventes[ventes["Date"] < "2023-01-04"])
+    magasin.ajouter(ventes[ventes["Date"] < "2023-01-08"])
+    magasin.ajouter(ventes)
+
+    # Corrections du 3 (partition 0) et du 5 (partition 1), plus deux jours nouveaux
+    corrections = _ventes(13, par_jour=3, graine=2)
+    jours = corrections["Date"].dt.normalize()
+    corrections = corrections[jours.isin(pd.to_datetime(["2023-01-03", "2023-01-05", "2023-01-12", "2023-01-13"]))]
+    assert magasin.ajouter(corrections, remplacer=True) == len(corrections)
+
+    remplaces = ventes["Date"].dt.normalize().isin(pd.to_datetime(["2023-01-03", "2023-01-05"]))
+    _verifier(magasin, pd.concat([ventes[~remplaces], corrections]))
+    assert magasin.derniere_date.normalize() == pd.Timestamp("2023-01-13")
+    assert sum(p["lignes"] for p in magasin.partitions()) == len(ventes) - 8 + len(corrections)
+
+
+def test_partition_videe_supprimee(tmp_path):
+    ventes = _ventes(6)
+    magasin = MagasinIndicateurs(tmp_path / "stock")
+    magasin.ajouter(ventes[ventes["Date"] < "2023-01-02"])
+    magasin.ajouter(ventes)
+    corrections = _ventes(1, graine=3)
+    magasin.ajouter(corrections, remplacer=True)
+    noms = [p["nom"] for p in magasin.partitions()]
+    assert noms == ["part_00001", "part_00002"]
+    assert not (tmp_path / "stock" / "part_00000").exists()
+    _verifier(magasin, pd.concat([ventes[ventes["Date"] >= "2023-01-02"], corrections]))
+    # Les numéros ne sont pas réutilisés après suppression
+    magasin.ajouter(_ventes(8, graine=4).query("Date >= '2023-01-07'"))
+    assert magasin.partitions()[-1]["nom"] == "part_00003"
@@ -0,0 +1,80 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from analysis import Analisis
+from cleaning import Cleaning
+from data_loader import LoadData
+from hors_memoire import TableDisque
+
+NUMERIQUES = ["QuantityKg", "UnitPrice"]
+
+
+@pytest.fixture
+def ventes():
+    rng = np.random.default_rng(0)
+    n = 6000
+    dates = pd.Timestamp("2020-07-01") + pd.to_timedelta(np.sort(rng.integers(0, 150, n)), unit="D")
+    ventes = pd.DataFrame({
+        "Date": dates.strftime("%Y-%m-%d"),
+        "ItemCode": rng.integers(0, 12, n),
+        "QuantityKg": rng.gamma(2, 0.4, n).round(3),
+        "UnitPrice": np.r_[rng.uniform(1, 20, n - 30), rng.uniform(100, 200, 30)].round(2),
+        "SaleOrReturn": rng.choice(["sale", "return"], n, p=[0.98, 0.02]),
+        "Pays": "Chine",
+    })
+    ventes["Prix"] = ventes["UnitPrice"]
+    return ventes
+
+
+@pytest.fixture
+def table(tmp_path, ventes):
+    # Plusieurs fragments par mois : écriture par morceaux depuis un CSV
+    source = tmp_path / "ventes.csv"
+    ventes.to_csv(source, index=False)
+    return TableDisque(tmp_path / "table").ajouter(LoadData(str(source), "csv", chunksize=1000).iter_chunks())
+
+
+def test_charger(table, ventes):
+    assert table.lignes == len(ventes)
+    assert len(table.partitions()) > 5
+    charge = table.charger()
+    pd.testing.assert_frame_equal(charge[NUMERIQUES + ["ItemCode"]], ventes[NUMERIQUES + ["ItemCode"]])
+
+
+def test_detecter_colonnes(table, ventes):
+    assert table.detecter_colonnes() == Cleaning(ventes).detecter_colonnes()
+
+
+@pytest.mark.parametrize("qs", [[0.25, 0.75], [0, 0.05, 0.5, 0.95, 1]])
+def test_quantiles_exacts(table, ventes, qs):
+    # Petits compartiments et petite limite : plusieurs passages de resserrement
+    options = {"compartiments": 8, "limite": 50}
+    resultat = table.quantiles(NUMERIQUES, qs, interpolation="numpy", **options)
+    for col in NUMERIQUES:
+        assert (resultat[col].to_numpy() == ventes[col].quantile(qs).to_numpy()).all()
+    resultat = table.quantiles(NUMERIQUES, qs, groupe="ItemCode", **options)
+    attendu = ventes.groupby("ItemCode")[NUMERIQUES].quantile(qs)
+    assert (resultat.to_numpy() == attendu.to_numpy()).all()
+
+
+def test_remove_outliers_by_clusters(tmp_path, table, ventes):
+    filtree, bornes = table.remove_outliers_by_clusters("ItemCode", NUMERIQUES, tmp_path / "filtree")
+    attendu, bornes_attendues = Cleaning.remove_outliers_by_clusters(ventes, "ItemCode", NUMERIQUES)
+    pd.testing.assert_frame_equal(bornes, bornes_attendues, check_names=False)
+    pd.testing.assert_frame_equal(filtree.charger(NUMERIQUES + ["ItemCode"]),
+                                  attendu[NUMERIQUES + ["ItemCode"]].reset_index(drop=True))
+
+
+@pytest.mark.parametrize("methode", ["iqr", "percentile"])
+def test_winsorize_column(table, ventes, methode):
+    table.winsorize_column("UnitPrice", method=methode)
+    attendu = Analisis(ventes.copy()).winsorize_column("UnitPrice", method=methode)
+    pd.testing.assert_series_equal(table.charger(["UnitPrice"])["UnitPrice"], attendu["UnitPrice"])
+
+
+@pytest.mark.parametrize("methode", ["standard", "minmax", "robust"])
+def test_mise_a_echelle(tmp_path, table, ventes, methode):
+    sortie, echelle = table.mise_a_echelle(NUMERIQUES, methode, dossier=tmp_path / "echelle")
+    attendu, _ = Analisis(ventes).mise_a_echelle(NUMERIQUES, methode)
+    np.testing.assert_allclose(sortie.charger(NUMERIQUES).to_numpy(), attendu, rtol=1e-9, atol=1e-12)
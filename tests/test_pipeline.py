@@ -0,0 +1,137 @@
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+from pipeline import Pipeline, pipeline_ventes
+
+APPELS = []
+
+
+def lire(chemin):
+    APPELS.append("lire")
+    return pd.read_csv(chemin)
+
+
+def arrondir(df, decimales=1):
+    APPELS.append("arrondir")
+    return df.assign(Prix=df["Prix"].round(decimales))
+
+
+def par_article(df):
+    APPELS.append("par_article")
+    return df.groupby("Article")[["Prix"]].mean()
+
+
+def compter(df):
+    APPELS.append("compter")
+    return pd.DataFrame({"lignes": [len(df)]})
+
+
+def figures(moyennes, comptes, dossier):
+    APPELS.append("figures")
+    dossier = Path(dossier)
+    dossier.mkdir(parents=True, exist_ok=True)
+    fichiers = [dossier / "moyennes.txt", dossier / "comptes.txt"]
+    fichiers[0].write_text(moyennes.to_string())
+    fichiers[1].write_text(comptes.to_string())
+    return pd.DataFrame({"fichier": [str(f) for f in fichiers]})
+
+
+@pytest.fixture
+def source(tmp_path):
+    chemin = tmp_path / "ventes.csv"
+    pd.DataFrame({"Article": ["chou", "piment", "chou", "poivron"],
+                  "Prix": [1.04, 2.51, 1.12, 3.33]}).to_csv(chemin, index=False)
+    return chemin
+
+
+def _pipeline(tmp_path, source, decimales=1):
+    pipeline = Pipeline(tmp_path / "cache", max_workers=2)
+    pipeline.ajouter("lecture", lire, params={"chemin": str(source)}, fichiers=[str(source)])
+    pipeline.ajouter("arrondi", arrondir, ["lecture"], params={"decimales": decimales})
+    pipeline.ajouter("moyennes", par_article, ["arrondi"])
+    pipeline.ajouter("comptes", compter, ["arrondi"])
+    pipeline.ajouter("figures", figures, ["moyennes", "comptes"],
+                     params={"dossier": str(tmp_path / "figures")}, sorties="fichier")
+    return pipeline
+
+
+@pytest.fixture(autouse=True)
+def vider_appels():
+    APPELS.clear()
+
+
+def test_deuxieme_execution_depuis_le_cache(tmp_path, source):
+    premier = _pipeline(tmp_path, source).executer()
+    assert sorted(APPELS) == ["arrondir", "compter", "figures", "lire", "par_article"]
+    APPELS.clear()
+    second = _pipeline(tmp_path, source).executer()
+    assert APPELS == []
+    for nom in premier:
+        pd.testing.assert_frame_equal(second[nom], premier[nom])
+    assert second["moyennes"].index.name == "Article"
+
+
+def test_parametre_modifie(tmp_path, source):
+    _pipeline(tmp_path, source).executer()
+    APPELS.clear()
+    _pipeline(tmp_path, source, decimales=0).executer()
+    assert sorted(APPELS) == ["arrondir", "compter", "figures", "par_article"]
+    APPELS.clear()
+    _pipeline(tmp_path, source, decimales=0).executer()
+    assert APPELS == []
+
+
+def test_empreinte_inchangee_ne_relance_pas_la_suite(tmp_path, source):
+    _pipeline(tmp_path, source, decimales=2).executer()
+    APPELS.clear()
+    _pipeline(tmp_path, source, decimales=3).executer()
+    assert APPELS == ["arrondir"]
+
+
+def test_fichier_source_modifie(tmp_path, source):
+    _pipeline(tmp_path, source).executer()
+    APPELS.clear()
+    pd.read_csv(source).assign(Prix=lambda df: df["Prix"] * 2).to_csv(source, index=False)
+    resultats = _pipeline(tmp_path, source).executer(["moyennes"])
+    assert sorted(APPELS) == ["arrondir", "lire", "par_article"]
+    assert resultats["moyennes"].loc["chou", "Prix"] == pytest.approx((2.1 + 2.2) / 2)
+
+
+def test_figures_supprimees_relancees(tmp_path, source):
+    resultats = _pipeline(tmp_path, source).executer()
+    APPELS.clear()
+    Path(resultats["figures"]["fichier"].iloc[0]).unlink()
+    _pipeline(tmp_path, source).executer()
+    assert APPELS == ["figures"]
+    assert all(Path(f).is_file() for f in resultats["figures"]["fichier"])
+
+
+def test_invalider_et_forcer(tmp_path, source):
+    pipeline = _pipeline(tmp_path, source)
+    pipeline.executer()
+    APPELS.clear()
+    pipeline.invalider("comptes")
+    pipeline.executer()
+    assert APPELS == ["compter"]
+    APPELS.clear()
+    pipeline.executer("comptes", forcer=True)
+    assert sorted(APPELS) == ["arrondir", "compter", "lire"]
+
+
+def test_graphe_invalide(tmp_path, source):
+    pipeline = _pipeline(tmp_path, source)
+    with pytest.raises(ValueError, match="déjà définie"):
+        pipeline.ajouter("lecture", lire)
+    with pytest.raises(ValueError, match="Entrées inconnues"):
+        pipeline.ajouter("autre", compter, ["absente"])
+    with pytest.raises(ValueError, match="Étape inconnue"):
+        pipeline.executer("absente")
+
+
+def test_pipeline_ventes_figures_verifiees(tmp_path):
+    pipeline = pipeline_ventes(tmp_path / "raw", tmp_path / "cache", reports_dir=tmp_path / "figures")
+    assert pipeline.etapes["figures"].sorties == "fichier"
+    assert list(pipeline.etapes) == ["chargement", "nettoyage", "segmentation", "non_saisonnier", "saisonnier",
+                                     "rapport_saisonnier", "rapport_non_saisonnier", "figures"]
@@ -0,0 +1,57 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from profiling import CompteurDistincts, Profil
+
+
+@pytest.fixture
+def ventes():
+    rng = np.random.default_rng(0)
+    n = 3000
+    ventes = pd.DataFrame({
+        "Item Code": rng.integers(0, 40, n),
+        "Quantity Sold (kilo)": rng.choice([0.1, 0.2, 0.5, 1.0, np.nan], n),
+        "Sale or Return": rng.choice(["sale", "return"], n, p=[0.95, 0.05]),
+        "Discount (Yes/No)": rng.choice(["Yes", "No", None], n),
+    })
+    # Lignes recopiées pour avoir des doublons connus
+    return pd.concat([ventes, ventes.sample(200, random_state=0)], ignore_index=True)
+
+
+def _verifier(profil, ventes):
+    resume = profil.resume()
+    assert profil.shape == ventes.shape
+    assert profil.doublons == ventes.duplicated().sum()
+    for col in ventes.columns:
+        assert resume.loc[col, "distincts"] == ventes[col].nunique()
+        assert resume.loc[col, "nuls"] == ventes[col].isna().sum()
+
+
+def test_profil_identique_a_pandas(ventes):
+    profil = Profil.construire(ventes)
+    _verifier(profil, ventes)
+    assert profil.colonnes["Item Code"]["min"] == ventes["Item Code"].min()
+    assert profil.colonnes["Quantity Sold (kilo)"]["max"] == ventes["Quantity Sold (kilo)"].max()
+    pd.testing.assert_frame_equal(profil.tete, ventes.head(5))
+    pd.testing.assert_frame_equal(profil.queue, ventes.tail(5))
+
+
+def test_profil_par_morceaux(ventes):
+    morceaux = [ventes.iloc[i:i + 700] for i in range(0, len(ventes), 700)]
+    _verifier(Profil.construire(iter(morceaux)), ventes)
+
+    fusion = Profil.construire(morceaux[0])
+    for morceau in morceaux[1:]:
+        fusion.fusionner(Profil.construire(morceau))
+    _verifier(fusion, ventes)
+
+
+def test_compteur_hyperloglog():
+    hachages = pd.util.hash_array(np.arange(200_000)).astype(np.uint64)
+    compteur = CompteurDistincts(p=12, seuil_exact=1000)
+    for i in range(0, len(hachages), 50_000):
+        compteur.ajouter(hachages[i:i + 50_000])
+    assert compteur.registres is not None
+    # Erreur relative ~ 1.04 / sqrt(4096) = 1.6 % ; marge de 4 écarts-types
+    assert abs(compteur.estimation() - 200_000) / 200_000 < 0.065
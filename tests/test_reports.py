@@ -0,0 +1,57 @@
+import matplotlib
+
+matplotlib.use("Agg")
+
+import numpy as np
+import pandas as pd
+import pytest
+from matplotlib import cbook
+
+from cube import CubeAgregats
+from reports import _stats_boites, ordre_segments, relation_prix
+
+
+@pytest.fixture
+def ventes():
+    # Numérotation arbitraire des clusters, comme le KMeans du notebook 02 :
+    # 0 = quantités moyennes, 1 = grandes quantités, 2 = faibles quantités
+    rng = np.random.default_rng(0)
+    quantites = {0: (2.0, 0.2), 1: (10.0, 1.0), 2: (0.3, 0.05)}
+    morceaux = [pd.DataFrame({"QuantityCluster": c, "QuantityKg": rng.normal(m, s, 200),
+                              "ItemName": rng.choice(["chou", "piment", "poivron"], 200),
+                              "Margin": rng.normal(1, 0.2, 200), "NetMargin": rng.normal(0.5, 0.2, 200)})
+                for c, (m, s) in quantites.items()]
+    return pd.concat(morceaux, ignore_index=True)
+
+
+def test_ordre_segments_independant_de_la_numerotation(ventes):
+    assert list(ordre_segments(ventes)) == [2, 0, 1]
+    renumerotees = ventes.assign(QuantityCluster=ventes["QuantityCluster"].map({2: 0, 0: 1, 1: 2}))
+    assert list(ordre_segments(renumerotees)) == [0, 1, 2]
+
+
+def test_stats_boites_identiques_a_matplotlib(ventes):
+    # Points extrêmes de part et d'autre : les moustaches doivent s'arrêter aux valeurs observées
+    ventes = ventes.copy()
+    ventes.loc[[0, 1, 250], "QuantityKg"] = [9.0, -4.0, 30.0]
+    stats = {s["label"]: s for s in _stats_boites(ventes, "QuantityCluster", "QuantityKg")}
+    for cluster, groupe in ventes.groupby("QuantityCluster")["QuantityKg"]:
+        attendu = cbook.boxplot_stats(groupe.to_numpy(), whis=1.5)[0]
+        for cle in ("q1", "med", "q3", "whislo", "whishi"):
+            assert stats[cluster][cle] == pytest.approx(attendu[cle]), (cluster, cle)
+        assert stats[cluster]["whishi"] in set(groupe)
+
+
+def test_relation_prix_calcule_le_taux_de_perte(ventes, tmp_path):
+    rng = np.random.default_rng(1)
+    ventes = ventes.assign(Date=pd.Timestamp("2023-01-01") + pd.to_timedelta(rng.integers(0, 5, len(ventes)), unit="D"),
+                           ItemCode=rng.integers(0, 4, len(ventes)), UnitPrice=rng.uniform(2, 20, len(ventes)),
+                           LossRate=rng.uniform(0, 20, len(ventes)))
+    # Cube construit comme depuis ventes_not_seasonal : pas de RelativeLossRate
+    cube = CubeAgregats(dimensions=["Date", "ItemCode"], mesures=["QuantityKg", "UnitPrice", "LossRate"]).ajouter(ventes)
+    relation_prix(cube, chemin=tmp_path / "cube.png")
+    relation_prix(ventes, chemin=tmp_path / "ventes.png")
+    assert "RelativeLossRate" not in ventes
+    assert (tmp_path / "cube.png").is_file() and (tmp_path / "ventes.png").is_file()
+    with pytest.raises(ValueError, match="LossRate"):
+        relation_prix(ventes.drop(columns="LossRate"))
@@ -0,0 +1,84 @@
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.preprocessing import MinMaxScaler, RobustScaler, StandardScaler
+
+from scaling import Echelle
+
+COLONNES = ["QuantityKg", "UnitPrice", "LossRate"]
+SKLEARN = {"minmax": MinMaxScaler, "standard": StandardScaler, "robust": RobustScaler}
+
+
+@pytest.fixture
+def ventes():
+    rng = np.random.default_rng(0)
+    n = 3000
+    return pd.DataFrame({
+        "ItemName": rng.choice(["chou", "piment"], n),
+        "QuantityKg": rng.lognormal(0, 1, n),
+        "UnitPrice": rng.uniform(2, 20, n),
+        "LossRate": rng.integers(0, 30, n),
+    })
+
+
+@pytest.mark.parametrize("methode", ["minmax", "standard", "robust"])
+def test_fit_identique_a_sklearn(ventes, methode):
+    bloc = Echelle(methode, dtype=np.float64).fit_transform(ventes, COLONNES)
+    np.testing.assert_allclose(bloc, SKLEARN[methode]().fit_transform(ventes[COLONNES]), rtol=1e-9, atol=1e-12)
+
+
+@pytest.mark.parametrize("methode", ["minmax", "standard"])
+def test_partial_fit_identique_a_fit(ventes, methode):
+    complet = Echelle(methode).fit(ventes, COLONNES)
+    lots = Echelle(methode)
+    for debut in range(0, len(ventes), 700):
+        lots.partial_fit(ventes.iloc[debut:debut + 700], COLONNES)
+    np.testing.assert_allclose(lots.centre, complet.centre, rtol=1e-10)
+    np.testing.assert_allclose(lots.echelle, complet.echelle, rtol=1e-10)
+
+
+def test_partial_fit_robust_approche(ventes):
+    complet = Echelle("robust").fit(ventes, COLONNES)
+    lots = Echelle("robust")
+    for debut in range(0, len(ventes), 700):
+        lots.partial_fit(ventes.iloc[debut:debut + 700], COLONNES)
+    # Quantiles approchés : écart borné par une fraction de l'étendue de chaque colonne
+    etendue = (ventes[COLONNES].max() - ventes[COLONNES].min()).to_numpy()
+    assert (np.abs(lots.centre - complet.centre) <= 0.02 * etendue).all()
+    assert (np.abs(lots.echelle - complet.echelle) <= 0.04 * etendue).all()
+
+
+def test_partial_fit_sans_colonnes(ventes):
+    echelle = Echelle().partial_fit(ventes)
+    assert echelle.colonnes == COLONNES
+    with pytest.raises(ValueError, match="aucune colonne numérique"):
+        Echelle().partial_fit(ventes[["ItemName"]])
+
+
+def test_transform_inplace_identique_au_bloc(ventes):
+    echelle = Echelle("robust").fit(ventes, COLONNES)
+    bloc = echelle.transform(ventes)
+    assert bloc.dtype == np.float32 and bloc.shape == (len(ventes), len(COLONNES))
+    copie = echelle.transform(ventes.copy(), inplace=True)
+    assert (copie[COLONNES].dtypes == np.float32).all()
+    np.testing.assert_array_equal(copie[COLONNES].to_numpy(), bloc)
+    assert copie["ItemName"].equals(ventes["ItemName"])
+    np.testing.assert_allclose(echelle.inverse_transform(bloc), ventes[COLONNES], rtol=1e-5, atol=1e-5)
+
+
+def test_sauvegarde_et_rechargement(ventes, tmp_path):
+    echelle = Echelle("minmax", dtype=np.float64).fit(ventes, COLONNES)
+    echelle.sauvegarder(tmp_path / "echelle.json")
+    rechargee = Echelle.charger(tmp_path / "echelle.json")
+    assert rechargee.methode == "minmax" and rechargee.dtype == np.float64
+    assert rechargee.colonnes == COLONNES
+    np.testing.assert_array_equal(rechargee.transform(ventes), echelle.transform(ventes))
+    # partial_fit après rechargement recommence à zéro sur les mêmes colonnes
+    rechargee.partial_fit(ventes.iloc[:100])
+    assert rechargee.colonnes == COLONNES
+    np.testing.assert_allclose(rechargee.centre, ventes[COLONNES].iloc[:100].min().to_numpy())
+
+
+def test_transform_avant_fit(ventes):
+    with pytest.raises(ValueError):
+        Echelle().transform(ventes)
@@ -0,0 +1,63 @@
+from itertools import combinations
+
+import numpy as np
+import pytest
+
+from segmentation import SegmentationQuantite, coude
+
+
+def _inertie(x, labels):
+    return sum(((x[labels == l] - x[labels == l].mean()) ** 2).sum() for l in np.unique(labels))
+
+
+def _force_brute(x, k):
+    # Toutes les découpes des valeurs distinctes triées en k intervalles consécutifs
+    uniques = np.unique(x)
+    meilleure = np.inf
+    for coupures in combinations(range(1, len(uniques)), k - 1):
+        labels = np.searchsorted(uniques[list(coupures)], x, side="right")
+        meilleure = min(meilleure, _inertie(x, labels))
+    return meilleure
+
+
+@pytest.mark.parametrize("seed", range(4))
+@pytest.mark.parametrize("k", [1, 2, 3, 4])
+def test_segmentation_optimale(seed, k):
+    rng = np.random.default_rng(seed)
+    # Quantités au dixième de kilo : peu de valeurs distinctes, beaucoup d'ex aequo
+    valeurs = np.sort(rng.gamma(2, 2, 12)).round(1)
+    x = rng.choice(valeurs, 180, p=np.linspace(2, 1, 12) / np.linspace(2, 1, 12).sum())
+    modele = SegmentationQuantite(k=k).fit(x)
+    attendu = _force_brute(x, k)
+    assert modele.inerties[k - 1] == pytest.approx(attendu, rel=1e-9, abs=1e-9)
+    assert _inertie(x, modele.predict(x)) == pytest.approx(attendu, rel=1e-9, abs=1e-9)
+
+
+def test_labels_tries_par_quantite():
+    rng = np.random.default_rng(0)
+    x = np.concatenate([rng.normal(1, 0.1, 100), rng.normal(10, 1, 100), rng.normal(50, 2, 20)])
+    modele = SegmentationQuantite(k=3).fit(x)
+    labels = modele.predict(x)
+    assert modele.centres == sorted(modele.centres)
+    assert (labels[:100] == 0).all() and (labels[100:200] == 1).all() and (labels[200:] == 2).all()
+    assert list(modele.etiqueter([0, 1, 2])) == ["Faible quantité", "Quantité moyenne", "Grande quantité"]
+
+
+def test_coude_et_sauvegarde(tmp_path):
+    rng = np.random.default_rng(1)
+    x = np.concatenate([rng.normal(1, 0.1, 100), rng.normal(10, 0.5, 100), rng.normal(30, 1, 100)])
+    modele = SegmentationQuantite().fit(x)
+    assert modele.k == coude(modele.inerties)
+
+    modele.sauvegarder(tmp_path / "segmentation.json")
+    charge = SegmentationQuantite.charger(tmp_path / "segmentation.json")
+    np.testing.assert_array_equal(charge.predict(x), modele.predict(x))
+
+    with pytest.raises(ValueError):
+        SegmentationQuantite(k=3).predict(x)
+
+
+def test_valeurs_manquantes_hors_segment():
+    modele = SegmentationQuantite(k=3).fit([0.1, 0.2, 1.0, 1.1, 5.0, np.nan])
+    labels = modele.predict([np.nan, 0.15, 1.05, 6.0, np.inf])
+    np.testing.assert_array_equal(labels, [-1, 0, 1, 2, -1])
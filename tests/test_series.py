@@ -0,0 +1,79 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from series import MomentsMultivaries, SerieTemporelle
+
+COLONNES = ["QuantityKg", "UnitPrice", "LossRate"]
+
+
+@pytest.fixture
+def ventes():
+    rng = np.random.default_rng(0)
+    n = 3000
+    ventes = pd.DataFrame({
+        "DateTime": pd.Timestamp("2022-01-01") + pd.to_timedelta(rng.integers(0, 90 * 24, n), unit="h"),
+        "QuantityKg": rng.gamma(2, 0.5, n),
+        "UnitPrice": rng.uniform(1, 20, n),
+        "LossRate": rng.uniform(0, 15, n),
+    })
+    # Jours sans LossRate : valeur journalière manquante
+    ventes.loc[ventes["DateTime"].dt.day == 10, "LossRate"] = np.nan
+    return ventes
+
+
+def _quotidien(ventes):
+    jours = ventes["DateTime"].dt.normalize()
+    table = ventes.groupby(jours)[["QuantityKg", "UnitPrice"]].sum()
+    table["LossRate"] = ventes.groupby(jours)["LossRate"].mean()
+    return table[COLONNES]
+
+
+def _lots(ventes):
+    # Lots dans le désordre, avec des ventes tardives pour des jours déjà stockés
+    melange = ventes.sample(frac=1, random_state=1)
+    return [melange.iloc[i:i + 400] for i in range(0, len(melange), 400)]
+
+
+def test_tables_identiques_a_pandas(ventes):
+    serie = SerieTemporelle(COLONNES)
+    for lot in _lots(ventes):
+        serie.ajouter(lot)
+    attendu = _quotidien(ventes)
+    np.testing.assert_allclose(serie.quotidien().to_numpy(), attendu.to_numpy())
+    np.testing.assert_allclose(serie.moyenne_glissante().to_numpy(),
+                               attendu.fillna(0).rolling(7, min_periods=1).mean().to_numpy())
+
+
+def test_corr_saisonniere_incrementale(ventes):
+    serie = SerieTemporelle(COLONNES, decalage=5)
+    for lot in _lots(ventes):
+        serie.ajouter(lot)
+    log = np.log1p(_quotidien(ventes) + 5).dropna()
+    np.testing.assert_allclose(serie.corr().to_numpy(), log.corr().to_numpy())
+    np.testing.assert_allclose(serie.cov().to_numpy(), log.cov().to_numpy())
+    np.testing.assert_allclose(serie.saisonnier().to_numpy(), np.log1p(_quotidien(ventes) + 5).to_numpy())
+    np.testing.assert_allclose(serie.corr(brut=True).to_numpy(), _quotidien(ventes).dropna().corr().to_numpy())
+
+
+def test_decalage_fixe_au_premier_ajout(ventes):
+    lots = _lots(ventes)
+    serie = SerieTemporelle(COLONNES).ajouter(lots[0])
+    decalage = serie.decalage
+    assert decalage == abs(_quotidien(lots[0]).min().min()) + 1
+    for lot in lots[1:]:
+        serie.ajouter(lot)
+    assert serie.decalage == decalage
+
+
+def test_moments_ignorent_les_lignes_incompletes():
+    rng = np.random.default_rng(0)
+    x = rng.normal(size=(50, 3))
+    x[[3, 17], 1] = np.nan
+    moments = MomentsMultivaries(3)
+    for ligne in x:
+        moments.ajouter(ligne)
+    moments.retirer(x[3]).retirer(x[0])
+    attendu = pd.DataFrame(x[1:]).dropna()
+    assert moments.n == len(attendu)
+    np.testing.assert_allclose(moments.cov(), attendu.cov().to_numpy())
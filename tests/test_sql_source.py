@@ -0,0 +1,98 @@
+import sqlite3
+import threading
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import sql_source
+from data_loader import LoadData
+from sql_source import SourceSQL, connexion, fermer_connexions
+
+
+@pytest.fixture
+def base(tmp_path):
+    rng = np.random.default_rng(0)
+    n = 1000
+    ventes = pd.DataFrame({
+        "Date": (pd.Timestamp("2020-07-01") + pd.to_timedelta(np.arange(n) // 20, unit="D")).strftime("%Y-%m-%d"),
+        "Item Code": rng.integers(0, 30, n),
+        "Quantity Sold (kilo)": rng.gamma(2, 0.4, n).round(3),
+        "Discount (Yes/No)": rng.choice(["Yes", "No"], n),
+    })
+    ventes.loc[::97, "Quantity Sold (kilo)"] = np.nan
+    chemin = str(tmp_path / "ventes.db")
+    with sqlite3.connect(chemin) as conn:
+        conn.execute('CREATE TABLE ventes ("Date" TEXT, "Item Code" INTEGER, '
+                     '"Quantity Sold (kilo)" REAL, "Discount (Yes/No)" TEXT)')
+        conn.executemany("INSERT INTO ventes VALUES (?, ?, ?, ?)",
+                         ventes.astype(object).where(ventes.notna(), None).itertuples(index=False))
+    yield chemin
+    fermer_connexions()
+
+
+def _attendu(chemin, sql="SELECT * FROM ventes", params=()):
+    with sqlite3.connect(chemin) as conn:
+        return pd.read_sql_query(sql, conn, params=params)
+
+
+def test_charger_identique_a_read_sql(base):
+    pd.testing.assert_frame_equal(SourceSQL(base, "ventes").charger(chunksize=64), _attendu(base),
+                                  check_dtype=False)
+    df = SourceSQL(base, "ventes").charger()
+    assert df["Item Code"].dtype == np.int64 and df["Quantity Sold (kilo)"].dtype == np.float64
+
+
+def test_iter_chunks_memes_types_que_charger(base):
+    source = SourceSQL(base, "ventes")
+    charge = source.charger()
+    morceaux = list(source.iter_chunks(chunksize=100))
+    assert len(morceaux) == 10
+    for morceau in morceaux:
+        pd.testing.assert_series_equal(morceau.dtypes, charge.dtypes)
+    pd.testing.assert_frame_equal(pd.concat(morceaux, ignore_index=True), charge)
+
+
+def test_reel_dans_colonne_entiere(base):
+    with sqlite3.connect(base) as conn:
+        conn.execute("INSERT INTO ventes VALUES ('2020-09-20', 1.5, 0.2, 'No')")
+    df = SourceSQL(base, "ventes").charger()
+    assert df["Item Code"].dtype == np.float64 and df["Item Code"].iloc[-1] == 1.5
+
+
+def test_filtres_de_dates_inclusifs(base):
+    source = SourceSQL(base, "ventes", date_col="Date", item_col="Item Code")
+    df = source.charger(start="2020-07-03", end=pd.Timestamp("2020-07-05"), items=[1, 2, 3])
+    attendu = _attendu(base, 'SELECT * FROM ventes WHERE "Date" BETWEEN ? AND ? AND "Item Code" IN (1, 2, 3)',
+                       ("2020-07-03", "2020-07-05"))
+    pd.testing.assert_frame_equal(df, attendu, check_dtype=False)
+    assert df["Date"].min() == "2020-07-03" and df["Date"].max() == "2020-07-05"
+    assert source.compter(start="2020-07-03", end="2020-07-05", items=[1, 2, 3]) == len(attendu)
+
+
+def test_une_connexion_par_thread(base):
+    connexions = {}
+    ensemble = threading.Barrier(4)
+
+    def lire():
+        connexions[threading.get_ident()] = connexion(base)
+        # Threads vivants en même temps : aucune connexion n'est fermée entre-temps
+        ensemble.wait()
+
+    threads = [threading.Thread(target=lire) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len({id(conn) for conn in connexions.values()}) == 4
+    assert connexion(base) is connexion(base)
+
+
+def test_chargements_paralleles(base):
+    attendu = _attendu(base)
+    sources = [{"source": base, "source_type": "sql", "table": "ventes"} for _ in range(16)]
+    for df in LoadData.charger_sources(sources, max_workers=8):
+        pd.testing.assert_frame_equal(df, attendu, check_dtype=False)
+    # Les connexions des threads du pool terminés sont fermées à la connexion suivante
+    connexion(base)
+    assert all(thread.is_alive() for thread, _ in sql_source._connexions)